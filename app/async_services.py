@@ -0,0 +1,108 @@
+"""Async counterparts of the idea/brief services for AsyncSession-backed routes.
+
+The hot reads (idea lookup, calendar range) are issued natively through the async session.
+Everything else delegates to the sync implementations in :mod:`app.services` via
+``AsyncSession.run_sync`` so the persistence rules live in exactly one place.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import services
+from app.lib.cache import calendar_cache
+from app.lib.calendar import window_bounds
+from app.models import Idea, IdeaBrief, IdeaBriefVersion
+from app.schemas import BriefContent, IdeaRead
+
+
+async def fetch_idea(db: AsyncSession, idea_id: int) -> Idea:
+    """Return an idea or raise a 404."""
+    idea = await db.get(Idea, idea_id)
+    if not idea:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Idea not found",
+        )
+    return idea
+
+
+async def ideas_in_range(db: AsyncSession, start: date, end: date) -> list[Idea]:
+    """Fetch ideas within the inclusive date range ordered for deterministic views."""
+    result = await db.scalars(
+        select(Idea)
+        .where(Idea.target_date >= start, Idea.target_date <= end)
+        .order_by(Idea.target_date.asc(), Idea.created_at.asc())
+    )
+    return list(result)
+
+
+async def calendar_window(db: AsyncSession, year: int, month: int) -> list[IdeaRead]:
+    """Return the serialized ideas for a month grid, served from the window cache when warm."""
+    ideas, version = calendar_cache.get((year, month))
+    if ideas is None:
+        start, end = window_bounds(year, month)
+        ideas = [IdeaRead.model_validate(idea) for idea in await ideas_in_range(db, start, end)]
+        calendar_cache.put((year, month), ideas, version)
+    return ideas
+
+
+async def brief_updated_at(db: AsyncSession, idea_id: int) -> datetime | None:
+    """Return the brief timestamp behind its ETag without loading any content."""
+    return await db.scalar(services.brief_state_query(idea_id))
+
+
+async def fetch_idea_with_brief(db: AsyncSession, idea_id: int) -> Idea:
+    """Return an idea with ``idea.brief`` loaded in the same query, or raise a 404."""
+    idea = (await db.scalars(services.ideas_with_briefs_query([idea_id]))).first()
+    if not idea:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Idea not found",
+        )
+    return idea
+
+
+async def ideas_with_briefs(db: AsyncSession, idea_ids: list[int]) -> list[Idea]:
+    """Return ideas (briefs eager-loaded) in the order requested; unknown ids are skipped."""
+    result = await db.scalars(services.ideas_with_briefs_query(idea_ids))
+    found = {idea.id: idea for idea in result.unique()}
+    return [found[idea_id] for idea_id in dict.fromkeys(idea_ids) if idea_id in found]
+
+
+async def update_brief(
+    db: AsyncSession,
+    idea: Idea,
+    content: BriefContent,
+    autosave: bool = False,
+    label: str | None = None,
+    expected_updated_at: datetime | None = None,
+) -> IdeaBrief:
+    """Persist the latest brief content and optionally snapshot an autosave version."""
+    return await db.run_sync(
+        lambda session: services.update_brief(
+            session,
+            idea,
+            content,
+            autosave=autosave,
+            label=label,
+            expected_updated_at=expected_updated_at,
+        )
+    )
+
+
+async def list_versions(db: AsyncSession, idea: Idea, limit: int = 10) -> list[IdeaBriefVersion]:
+    """Return the most recent autosave versions for display."""
+    return await db.run_sync(lambda session: services.list_versions(session, idea, limit=limit))
+
+
+async def restore_version(
+    db: AsyncSession,
+    version_id: int,
+) -> tuple[IdeaBriefVersion, BriefContent]:
+    """Load a stored snapshot and parse it into a BriefContent payload."""
+    return await db.run_sync(lambda session: services.restore_version(session, version_id))
@@ -0,0 +1,240 @@
+"""Relational catalogue of brief attachments (the ``attachments`` table).
+
+A brief's ``AttachmentItem`` list lives inside ``IdeaBrief.content``; this module mirrors
+it into one indexed row per attachment so "which ideas use this clip" or "storage per
+month" are index scans instead of loading and parsing every brief. Rows are rewritten per
+idea from a session ``after_flush`` hook whenever a brief is created, its content changes
+or it is deleted, so ``update_brief``, ``restore_version`` and autosave flushes keep the
+catalogue in step inside their own transactions. Core bulk inserts bypass the hook and
+call :func:`sync_attachments` themselves.
+
+Databases that predate the table are filled by the ``backfill_attachments`` job, which
+streams briefs in ``idea_id`` order one batch per transaction and is safe to re-run.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import JOB_MAX_ATTEMPTS
+from app.models import Attachment, Idea, IdeaBrief, Job, utc_now
+from app.schemas import AttachmentRead, AttachmentUsage
+
+JOB_KIND = "backfill_attachments"
+SYNC_BATCH = 500
+BACKFILL_BATCH = 1000
+USAGE_GROUPS = ("month", "content_type", "idea")
+
+
+def brief_attachments(content: str | None) -> list[dict]:
+    """The attachment dicts of stored brief JSON (unreadable content has none)."""
+    if not content:
+        return []
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return []
+    return [
+        item for item in data.get("attachments") or () if isinstance(item, dict) and item.get("key")
+    ]
+
+
+def sync_attachments(conn: Connection, idea_ids: Iterable[int]) -> int:
+    """Rewrite the catalogue rows of ``idea_ids`` from their current briefs.
+
+    The delete runs first so it takes SQLite's write lock before the briefs are read: a
+    concurrent save cannot land between the read and the rewrite. Returns rows written.
+    """
+    idea_ids = list(dict.fromkeys(idea_ids))
+    written = 0
+    for offset in range(0, len(idea_ids), SYNC_BATCH):
+        chunk = idea_ids[offset : offset + SYNC_BATCH]
+        removed = conn.execute(
+            delete(Attachment)
+            .where(Attachment.idea_id.in_(chunk))
+            .returning(Attachment.idea_id, Attachment.key, Attachment.created_at)
+        ).all()
+        first_seen = {(row.idea_id, row.key): row.created_at for row in removed}
+        briefs = conn.execute(
+            select(IdeaBrief.idea_id, IdeaBrief.content, IdeaBrief.updated_at).where(
+                IdeaBrief.idea_id.in_(chunk)
+            )
+        ).all()
+        rows = [
+            {
+                "idea_id": brief.idea_id,
+                "position": position,
+                "item_id": str(item.get("id") or "")[:64],
+                "key": item["key"],
+                "filename": item.get("filename") or "",
+                "url": item.get("url") or "",
+                "content_type": item.get("content_type"),
+                "size": item.get("size"),
+                # New keys date from this save (or, when backfilling, the brief's last one).
+                "created_at": first_seen.get((brief.idea_id, item["key"]), brief.updated_at),
+            }
+            for brief in briefs
+            for position, item in enumerate(brief_attachments(brief.content))
+        ]
+        if rows:
+            conn.execute(insert(Attachment), rows)
+        written += len(rows)
+    return written
+
+
+def _content_changed(brief: IdeaBrief) -> bool:
+    return inspect(brief).attrs.content.history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_catalogue(session: Session, flush_context) -> None:
+    ideas = {obj.idea_id for obj in session.new if isinstance(obj, IdeaBrief)}
+    ideas |= {
+        obj.idea_id for obj in session.dirty if isinstance(obj, IdeaBrief) and _content_changed(obj)
+    }
+    ideas |= {
+        obj.idea_id if isinstance(obj, IdeaBrief) else obj.id
+        for obj in session.deleted
+        if isinstance(obj, IdeaBrief | Idea)
+    }
+    if ideas:
+        sync_attachments(session.connection(), ideas)
+
+
+def backfill_attachments(engine: Engine | None = None, *, batch_size: int = BACKFILL_BATCH) -> int:
+    """Rebuild the catalogue from every brief, ``batch_size`` briefs per transaction.
+
+    Rows of ideas that no longer have a brief are dropped at the end. Returns the number
+    of briefs synced.
+    """
+    engine = engine or database.engine
+    after, synced = 0, 0
+    while True:
+        with engine.begin() as conn:
+            idea_ids = conn.scalars(
+                select(IdeaBrief.idea_id)
+                .where(IdeaBrief.idea_id > after)
+                .order_by(IdeaBrief.idea_id)
+                .limit(batch_size)
+            ).all()
+            if not idea_ids:
+                break
+            sync_attachments(conn, idea_ids)
+        after, synced = idea_ids[-1], synced + len(idea_ids)
+    with engine.begin() as conn:
+        conn.execute(delete(Attachment).where(Attachment.idea_id.not_in(select(IdeaBrief.idea_id))))
+    return synced
+
+
+def queue_backfill(conn: Connection) -> bool:
+    """Queue the backfill once for a database whose briefs predate the catalogue."""
+    for probe in (select(Job.id).where(Job.kind == JOB_KIND), select(Attachment.id)):
+        if conn.execute(probe.limit(1)).first() is not None:
+            return False
+    if conn.execute(select(IdeaBrief.id).limit(1)).first() is None:
+        return False
+    conn.execute(
+        insert(Job),
+        {
+            "kind": JOB_KIND,
+            "payload": "{}",
+            "priority": 0,
+            "max_attempts": JOB_MAX_ATTEMPTS,
+            "available_at": utc_now(),
+        },
+    )
+    return True
+
+
+def _read(row) -> AttachmentRead:
+    return AttachmentRead(
+        id=row.id,
+        idea_id=row.idea_id,
+        idea_title=row.title,
+        item_id=row.item_id,
+        key=row.key,
+        filename=row.filename,
+        url=row.url,
+        content_type=row.content_type,
+        size=row.size,
+        created_at=row.created_at,
+    )
+
+
+def list_attachments(
+    db: Session,
+    *,
+    key: str | None = None,
+    idea_id: int | None = None,
+    content_type: str | None = None,
+    after_id: int | None = None,
+    limit: int = 100,
+) -> list[AttachmentRead]:
+    """Catalogue rows (with their idea's title) in id order; ``after_id`` pages."""
+    query = (
+        select(
+            Attachment.id,
+            Attachment.idea_id,
+            Idea.title,
+            Attachment.item_id,
+            Attachment.key,
+            Attachment.filename,
+            Attachment.url,
+            Attachment.content_type,
+            Attachment.size,
+            Attachment.created_at,
+        )
+        .join(Idea, Idea.id == Attachment.idea_id)
+        .order_by(Attachment.id)
+        .limit(limit)
+    )
+    if key is not None:
+        query = query.where(Attachment.key == key)
+    if idea_id is not None:
+        query = query.where(Attachment.idea_id == idea_id)
+    if content_type is not None:
+        # "video/" matches every video type; anything else is exact.
+        if content_type.endswith("/"):
+            query = query.where(Attachment.content_type.startswith(content_type, autoescape=True))
+        else:
+            query = query.where(Attachment.content_type == content_type)
+    if after_id is not None:
+        query = query.where(Attachment.id > after_id)
+    return [_read(row) for row in db.execute(query)]
+
+
+def attachment_usage(db: Session, by: str = "month") -> list[AttachmentUsage]:
+    """Attachment count and known bytes per month first attached, content type or idea."""
+    if by == "month":
+        group = func.strftime("%Y-%m", Attachment.created_at)
+    elif by == "content_type":
+        group = func.coalesce(Attachment.content_type, "")
+    elif by == "idea":
+        group = Attachment.idea_id
+    else:
+        raise ValueError(f"Unknown usage grouping {by!r}; expected one of {USAGE_GROUPS}")
+    rows = db.execute(
+        select(
+            group.label("group"),
+            func.count().label("attachments"),
+            func.count(func.distinct(Attachment.idea_id)).label("ideas"),
+            func.coalesce(func.sum(Attachment.size), 0).label("bytes"),
+        )
+        .group_by(group)
+        .order_by(group)
+    ).all()
+    return [
+        AttachmentUsage(
+            group=str(row.group),
+            attachments=row.attachments,
+            ideas=row.ideas,
+            bytes=row.bytes,
+        )
+        for row in rows
+    ]
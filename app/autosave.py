@@ -0,0 +1,244 @@
+"""Write-behind buffer that coalesces brief autosaves into batched transactions.
+
+The autosave endpoint only records the latest ``BriefContent`` per idea here and returns.
+A background thread flushes everything pending every ``AUTOSAVE_FLUSH_INTERVAL`` seconds
+(or sooner once ``AUTOSAVE_MAX_PENDING`` ideas are waiting) in a single transaction, so a
+burst of keystroke-debounced saves becomes one brief update and one version row.
+
+Routes keep read-your-writes by consulting :meth:`AutosaveBuffer.peek` before the
+database, and flush an idea before any direct write, restore or version listing so the
+history stays ordered. Pending saves live in process memory: ``main.lifespan`` flushes
+them on shutdown, but a hard crash loses at most one interval of edits. A draft that
+keeps failing to flush is dropped after ``AUTOSAVE_MAX_ATTEMPTS`` tries rather than
+blocking the other ideas' saves.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import AUTOSAVE_FLUSH_INTERVAL, AUTOSAVE_MAX_ATTEMPTS, AUTOSAVE_MAX_PENDING
+from app.models import Idea, utc_now
+from app.schemas import BriefContent
+from app.services import stage_brief_update
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingAutosave:
+    content: BriefContent
+    label: str | None
+    updated_at: datetime = field(default_factory=utc_now)
+    submits: int = 1
+    # Consecutive failed flushes, carried over when a newer submit supersedes the entry.
+    failures: int = 0
+
+
+class AutosaveBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        flush_interval: float = AUTOSAVE_FLUSH_INTERVAL,
+        max_pending: int = AUTOSAVE_MAX_PENDING,
+        max_attempts: int = AUTOSAVE_MAX_ATTEMPTS,
+    ) -> None:
+        self._session_factory = session_factory or (lambda: database.SessionLocal())
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending: dict[int, PendingAutosave] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.submitted = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, idea_id: int, content: BriefContent, label: str | None) -> PendingAutosave:
+        """Record the latest content for an idea; the previous pending save is superseded."""
+        with self._lock:
+            previous = self._pending.get(idea_id)
+            pending = PendingAutosave(
+                content=content,
+                label=label,
+                submits=previous.submits + 1 if previous else 1,
+                failures=previous.failures if previous else 0,
+            )
+            self._pending[idea_id] = pending
+            self.submitted += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            if self.running:
+                self._wake.set()
+            else:
+                self.flush()
+        return pending
+
+    def peek(self, idea_id: int) -> PendingAutosave | None:
+        with self._lock:
+            return self._pending.get(idea_id)
+
+    def discard(self, idea_id: int) -> None:
+        with self._lock:
+            self._pending.pop(idea_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, idea_ids: Iterable[int] | None = None) -> int:
+        """Write pending saves (all, or only ``idea_ids``); returns the number written.
+
+        Entries stay visible to :meth:`peek` until their commit lands, so reads never fall
+        back to the old row mid-flush; afterwards only entries that were not superseded by
+        a newer submit are removed. The batch is written in one transaction; if that fails
+        each idea is retried in its own, so one bad entry cannot hold back the others. An
+        entry that fails ``max_attempts`` flushes is dropped with an error logged. When
+        ``idea_ids`` is given and one of them is still pending after a failure, the error
+        is re-raised so the caller does not write past a draft that was never persisted.
+        """
+        with self._flush_lock:
+            with self._lock:
+                keys = list(self._pending) if idea_ids is None else [
+                    idea_id for idea_id in idea_ids if idea_id in self._pending
+                ]
+                batch = {idea_id: self._pending[idea_id] for idea_id in keys}
+            if not batch:
+                return 0
+            try:
+                written = self._write(batch)
+            except Exception as exc:
+                if len(batch) == 1:
+                    written, errors = 0, {idea_id: exc for idea_id in batch}
+                else:
+                    logger.warning("Autosave batch failed; retrying its %d ideas", len(batch))
+                    written, errors = 0, {}
+                    for idea_id, entry in batch.items():
+                        try:
+                            written += self._write({idea_id: entry})
+                        except Exception as error:
+                            errors[idea_id] = error
+                blocked = [
+                    idea_id
+                    for idea_id, error in errors.items()
+                    if self._record_failure(idea_id, batch[idea_id], error)
+                ]
+                if idea_ids is not None and blocked:
+                    raise errors[blocked[0]] from None
+            self.flushed += written
+            self.flushes += 1
+            return written
+
+    def _write(self, batch: dict[int, PendingAutosave]) -> int:
+        db = self._session_factory()
+        try:
+            ideas = db.query(Idea).filter(Idea.id.in_(batch)).all()
+            for idea in ideas:
+                entry = batch[idea.id]
+                stage_brief_update(
+                    db,
+                    idea,
+                    entry.content,
+                    autosave=True,
+                    label=entry.label,
+                    updated_at=entry.updated_at,
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            for idea_id, entry in batch.items():
+                if self._pending.get(idea_id) is entry:
+                    del self._pending[idea_id]
+        return len(ideas)
+
+    def _record_failure(self, idea_id: int, entry: PendingAutosave, error: Exception) -> bool:
+        """Count a failed flush of ``entry``; returns whether the idea still has a pending save."""
+        with self._lock:
+            self.failed += 1
+            entry.failures += 1
+            current = self._pending.get(idea_id)
+            if current is None:
+                return False
+            current.failures = max(current.failures, entry.failures)
+            if current.failures < self.max_attempts:
+                return True
+            del self._pending[idea_id]
+            self.dropped += 1
+        logger.error(
+            "Dropped the buffered autosave of idea %s after %d failed flushes",
+            idea_id,
+            current.failures,
+            exc_info=error,
+        )
+        return False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autosave-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write out everything still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            started = time.perf_counter()
+            try:
+                written = self.flush()
+            except Exception:  # keep the flusher alive; entries stay pending
+                logger.exception("Autosave flush failed")
+                continue
+            if written:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.debug("Flushed %s autosaves in %.1fms", written, elapsed_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+autosave_buffer = AutosaveBuffer()
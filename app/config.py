@@ -5,12 +5,102 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 APP_DIR = BASE_DIR / "app"
 STATIC_DIR = APP_DIR / "static"
 TEMPLATE_DIR = APP_DIR / "templates"
 DB_PATH = BASE_DIR / "contenthub.db"
 DATABASE_URL = os.getenv("CONTENTHUB_DB_URL", f"sqlite:///{DB_PATH}")
+# "production" applies WAL + tuned pragmas to SQLite connections; "basic" keeps SQLite defaults.
+SQLITE_PROFILE = os.getenv("CONTENTHUB_SQLITE_PROFILE", "production")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("CONTENTHUB_SQLITE_CACHE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("CONTENTHUB_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("CONTENTHUB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Connections reserved for GET routes; they run with query_only so they can never take a write lock.
+READ_POOL_SIZE = int(os.getenv("CONTENTHUB_READ_POOL_SIZE", "8"))
+# Calendar windows kept in the per-process LRU (0 disables it). The cache is invalidated by
+# writes in the same process, so multi-worker deployments should disable it or pin writes.
+CALENDAR_CACHE_SIZE = int(os.getenv("CONTENTHUB_CALENDAR_CACHE_SIZE", "24"))
+BRIEF_CONTENT_CACHE_SIZE = int(os.getenv("CONTENTHUB_BRIEF_CACHE_SIZE", "128"))
+# Brief versions are stored as deltas; a full keyframe is written at least this often.
+VERSION_KEYFRAME_INTERVAL = int(os.getenv("CONTENTHUB_VERSION_KEYFRAME_INTERVAL", "50"))
+# Background pruning of autosave versions (policy in app.retention).
+VERSION_COMPACTION = _env_flag("CONTENTHUB_VERSION_COMPACTION", default=True)
+VERSION_COMPACTION_INTERVAL = float(os.getenv("CONTENTHUB_VERSION_COMPACTION_SECONDS", "900"))
+VERSION_COMPACTION_BATCH = int(os.getenv("CONTENTHUB_VERSION_COMPACTION_BATCH", "200"))
+# Autosaves are buffered in memory and flushed in batches (see app.autosave).
+AUTOSAVE_BUFFER = _env_flag("CONTENTHUB_AUTOSAVE_BUFFER", default=True)
+AUTOSAVE_FLUSH_INTERVAL = float(os.getenv("CONTENTHUB_AUTOSAVE_FLUSH_SECONDS", "2.0"))
+AUTOSAVE_MAX_PENDING = int(os.getenv("CONTENTHUB_AUTOSAVE_MAX_PENDING", "200"))
+# A buffered autosave that fails this many flushes in a row is dropped (and logged).
+AUTOSAVE_MAX_ATTEMPTS = int(os.getenv("CONTENTHUB_AUTOSAVE_MAX_ATTEMPTS", "5"))
+# Template ratings are aggregated in memory and applied in batched UPDATEs (see app.ratings).
+RATING_QUEUE = _env_flag("CONTENTHUB_RATING_QUEUE", default=True)
+RATING_FLUSH_INTERVAL = float(os.getenv("CONTENTHUB_RATING_FLUSH_SECONDS", "1.0"))
+RATING_MAX_PENDING = int(os.getenv("CONTENTHUB_RATING_MAX_PENDING", "500"))
+# Hybrid retriever (see app.rag): hashing-embedder width and the word budget per chunk.
+RAG_EMBED_DIM = int(os.getenv("CONTENTHUB_RAG_EMBED_DIM", "256"))
+RAG_CHUNK_WORDS = int(os.getenv("CONTENTHUB_RAG_CHUNK_WORDS", "120"))
+# Memory-mapped IVF-PQ index for retrieval embeddings, kept next to the SQLite file
+# (see app.rag.ann). Below ANN_MIN_ROWS chunks the exact scan is already fast enough.
+ANN_INDEX = _env_flag("CONTENTHUB_ANN_INDEX", default=True)
+ANN_NPROBE = int(os.getenv("CONTENTHUB_ANN_NPROBE", "32"))
+ANN_MIN_ROWS = int(os.getenv("CONTENTHUB_ANN_MIN_ROWS", "20000"))
+# Archive ingestion (see app.ingest): worker processes (0 = one per CPU) and files per
+# write transaction.
+INGEST_WORKERS = int(os.getenv("CONTENTHUB_INGEST_WORKERS", "0"))
+INGEST_BATCH = int(os.getenv("CONTENTHUB_INGEST_BATCH", "200"))
+# SQLite-backed job queue (see app.jobs): worker processes started with the app (0 = none),
+# jobs leased per round trip, lease length, retry policy and idle poll interval.
+JOB_WORKERS = int(os.getenv("CONTENTHUB_JOB_WORKERS", "1"))
+JOB_BATCH = int(os.getenv("CONTENTHUB_JOB_BATCH", "10"))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("CONTENTHUB_JOB_VISIBILITY_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("CONTENTHUB_JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF = float(os.getenv("CONTENTHUB_JOB_RETRY_BACKOFF_SECONDS", "5"))
+JOB_POLL_INTERVAL = float(os.getenv("CONTENTHUB_JOB_POLL_SECONDS", "0.5"))
+# Workers delete jobs that finished more than JOB_RETENTION seconds ago, checking every
+# JOB_PURGE_INTERVAL seconds (0 leaves finished jobs for `python -m app.jobs purge`).
+JOB_RETENTION = float(os.getenv("CONTENTHUB_JOB_RETENTION_SECONDS", str(7 * 86400)))
+JOB_PURGE_INTERVAL = float(os.getenv("CONTENTHUB_JOB_PURGE_SECONDS", "3600"))
+# Hook pattern mining (see app.patterns): queue incremental updates on brief/template
+# writes, clusters in the model and rows per mini-batch step.
+PATTERN_MINING = _env_flag("CONTENTHUB_PATTERN_MINING", default=True)
+PATTERN_CLUSTERS = int(os.getenv("CONTENTHUB_PATTERN_CLUSTERS", "32"))
+PATTERN_BATCH = int(os.getenv("CONTENTHUB_PATTERN_BATCH", "1024"))
+# Generation (see app.generation): LLM backend ("stub" is a deterministic local model) and
+# the stub's simulated latency per call.
+LLM_BACKEND = os.getenv("CONTENTHUB_LLM", "stub")
+LLM_STUB_LATENCY = float(os.getenv("CONTENTHUB_LLM_STUB_LATENCY_SECONDS", "0"))
+# Semantic response cache for generation (see app.rag.response_cache): entry and byte
+# caps, time to live, and the intent similarity that counts as a near-duplicate prompt.
+RESPONSE_CACHE_ENTRIES = int(os.getenv("CONTENTHUB_RESPONSE_CACHE_ENTRIES", "1024"))
+RESPONSE_CACHE_BYTES = int(os.getenv("CONTENTHUB_RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("CONTENTHUB_RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("CONTENTHUB_RESPONSE_CACHE_SIMILARITY", "0.92"))
+# Streaming hook variants (see app.generation.stream_hook_variants): LLM calls in flight per
+# request and the request's overall deadline; clients may ask for less, never more.
+GENERATION_CONCURRENCY = int(os.getenv("CONTENTHUB_GENERATION_CONCURRENCY", "4"))
+GENERATION_TIMEOUT = float(os.getenv("CONTENTHUB_GENERATION_TIMEOUT_SECONDS", "30"))
+# Rendered calendar day/week HTML kept in process (see app.routers.pages.render_weeks), capped
+# by total characters (0 disables), and the directory for Jinja's compiled-template bytecode
+# cache (empty uses Jinja's per-user temp directory; CONTENTHUB_JINJA_BYTECODE_CACHE=0 turns
+# it off).
+CALENDAR_FRAGMENT_CACHE_CHARS = int(
+    os.getenv("CONTENTHUB_CALENDAR_FRAGMENT_CACHE_CHARS", str(32 * 1024 * 1024))
+)
+JINJA_BYTECODE_CACHE = _env_flag("CONTENTHUB_JINJA_BYTECODE_CACHE", default=True)
+JINJA_CACHE_DIR = os.getenv("CONTENTHUB_JINJA_CACHE_DIR", "")
+
+# Serve the calendar + brief endpoints from an AsyncSession (aiosqlite for SQLite URLs).
+ASYNC_DB = _env_flag("CONTENTHUB_ASYNC_DB")
 
 # Ensure key folders exist when the app spins up (important for StaticFiles/Jinja2).
 for directory in (STATIC_DIR, TEMPLATE_DIR):
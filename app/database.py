@@ -2,24 +2,88 @@
 
 from __future__ import annotations
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL,
+    READ_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    SQLITE_PROFILE,
+)
 
 
-def _build_engine(url: str) -> Engine:
-    return create_engine(
-        url,
-        connect_args={"check_same_thread": False},
-    )
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
 
 
-engine = _build_engine(DATABASE_URL)
+def _install_sqlite_pragmas(engine: Engine, *, profile: str, readonly: bool = False) -> None:
+    """Apply the connection pragmas for ``profile`` every time the pool opens a connection."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            if profile == "production":
+                # WAL lets readers proceed while an autosave holds the write lock.
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+                cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+            if readonly:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def _build_engine(url: str, *, readonly: bool = False, profile: str = SQLITE_PROFILE) -> Engine:
+    if not _is_sqlite(url):
+        return create_engine(url, pool_pre_ping=True)
+    options: dict = {"connect_args": {"check_same_thread": False}}
+    if readonly and make_url(url).database not in (None, "", ":memory:"):
+        options.update(pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+    engine = create_engine(url, **options)
+    _install_sqlite_pragmas(engine, profile=profile, readonly=readonly)
+    return engine
+
+
+def _async_url(url: str) -> str:
+    """Point SQLite URLs at the aiosqlite driver so both engines share one database file."""
+    parsed = make_url(url)
+    if parsed.drivername in {"sqlite", "sqlite+pysqlite"}:
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def _build_async_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(_async_url(url))
+    if _is_sqlite(url):
+        _install_sqlite_pragmas(engine.sync_engine, profile=SQLITE_PROFILE)
+    return engine
+
+
+database_url = DATABASE_URL
+engine = _build_engine(database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+read_engine = _build_engine(database_url, readonly=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+# The async engine is built lazily so aiosqlite is only required when async routes are enabled.
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
 
 def get_db():
     """Provide a database session dependency for FastAPI routes."""
@@ -30,8 +94,51 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Provide a session from the read-only pool for GET routes that never write."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Return the async session factory, building the aiosqlite engine on first use."""
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        async_engine = _build_async_engine(database_url)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return AsyncSessionLocal
+
+
+async def get_async_db():
+    """Provide an AsyncSession dependency for the async-native routes."""
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled aiosqlite connections (called from the app lifespan)."""
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
+
+
 def configure_database(url: str) -> None:
     """Rebuild the engine/session for tests or custom deployments."""
-    global engine, SessionLocal
+    global database_url, engine, SessionLocal, read_engine, ReadSessionLocal
+    global async_engine, AsyncSessionLocal
+    database_url = url
     engine = _build_engine(url)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    read_engine = _build_engine(url, readonly=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    async_engine = None
+    AsyncSessionLocal = None
@@ -0,0 +1,264 @@
+"""Retrieval-augmented generation: retrieve precedent, prompt the LLM, cache the answer.
+
+:func:`generate_hooks` retrieves the chunks most relevant to an intent from the
+process-wide :data:`app.rag.retrieval_index`, builds a prompt quoting them, and asks the
+configured :mod:`app.rag.llm` client for numbered hook lines. Answers are memoised in
+:data:`app.rag.response_cache.response_cache` under the intent and a fingerprint of the
+retrieved context, so a repeated (or near-duplicate) request costs one retrieval instead
+of an LLM call.
+
+:func:`stream_hook_variants` fans one call per angle out concurrently and yields each
+variant as it finishes, so the streaming endpoint never waits on the slowest one;
+:func:`save_variants` appends the finished hooks to the idea's brief in one commit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator, Sequence
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.autosave import autosave_buffer
+from app.config import GENERATION_CONCURRENCY, GENERATION_TIMEOUT
+from app.models import Idea, IdeaBrief
+from app.rag import RetrievalFilter, RetrievalHit, retrieval_index
+from app.rag.llm import LLMClient, acomplete, get_llm
+from app.rag.response_cache import (
+    ResponseCache,
+    context_fingerprint,
+    normalize_intent,
+    response_cache,
+)
+from app.schemas import (
+    BriefBlock,
+    BriefContent,
+    HookGeneration,
+    HookVariant,
+    RetrievedChunk,
+)
+from app.services import parse_brief_content, update_brief
+
+SYSTEM = (
+    "You write short-form video hooks for academic and technical creators: STEM majors, "
+    "student founders and hacker-house builders. Ground every hook in the context."
+)
+# Characters of each retrieved chunk quoted in the prompt.
+SNIPPET_CHARS = 240
+# One per streamed variant, in order; each makes its own prompt (and cache entry).
+ANGLES = (
+    "curiosity gap",
+    "contrarian take",
+    "personal story",
+    "step-by-step how-to",
+    "surprising number",
+    "common mistake",
+    "before and after",
+    "challenge to the viewer",
+)
+_NUMBERED = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+_llm: LLMClient | None = None
+
+
+def default_llm() -> LLMClient:
+    """The process-wide client for ``CONTENTHUB_LLM``, built on first use."""
+    global _llm
+    if _llm is None:
+        _llm = get_llm()
+    return _llm
+
+
+def _snippet(text: str) -> str:
+    return " ".join(text.split())[:SNIPPET_CHARS]
+
+
+def hooks_prompt(intent: str, hits: Sequence[RetrievalHit], count: int) -> str:
+    context = " | ".join(_snippet(hit.text) for hit in hits)
+    return (
+        f"{SYSTEM}\n"
+        f"Task: {' '.join(intent.split())}\n"
+        f"Return exactly {count} hooks, one per line, numbered.\n"
+        f"Context: {context}"
+    )
+
+
+def variant_prompt(intent: str, hits: Sequence[RetrievalHit], angle: str) -> str:
+    return f"{hooks_prompt(intent, hits, 1)}\nAngle: {angle}"
+
+
+def parse_lines(text: str, count: int) -> list[str]:
+    """The first ``count`` non-empty lines with list numbering/bullets stripped."""
+    lines = (_NUMBERED.sub("", line).strip() for line in text.splitlines())
+    return [line for line in lines if line][:count]
+
+
+def chunk(hit: RetrievalHit) -> RetrievedChunk:
+    return RetrievedChunk(
+        kind=hit.kind,
+        id=hit.source_id,
+        text=hit.text,
+        score=hit.score,
+        bm25_rank=hit.bm25_rank,
+        dense_rank=hit.dense_rank,
+    )
+
+
+def retrieve(
+    conn: Connection, intent: str, context: int, where: RetrievalFilter | None = None
+) -> list[RetrievalHit]:
+    """Top ``context`` chunks for the prompt (none when ``context`` is 0)."""
+    if not context:
+        return []
+    # Retrieve with the normalised intent: phrasing noise ("could you give me...") would
+    # otherwise shift the context, and with it the response cache key.
+    return retrieval_index.search(conn, normalize_intent(intent) or intent, context, where=where)
+
+
+def generate_hooks(
+    conn: Connection,
+    intent: str,
+    *,
+    count: int = 5,
+    context: int = 6,
+    where: RetrievalFilter | None = None,
+    llm: LLMClient | None = None,
+    cache: ResponseCache | None = response_cache,
+) -> HookGeneration:
+    started = time.perf_counter()
+    hits = retrieve(conn, intent, context, where)
+    query = normalize_intent(intent)
+    task = f"hooks:{count}"
+    fingerprint = context_fingerprint(hits)
+    cached = cache.lookup(task, intent, fingerprint) if cache is not None else None
+    if cached is not None:
+        text, near = cached.response, cached.intent != query
+    else:
+        near = False
+        client = llm or default_llm()
+        called = time.perf_counter()
+        text = client.complete(hooks_prompt(intent, hits, count))
+        if cache is not None:
+            cache.store(
+                task,
+                intent,
+                fingerprint,
+                text,
+                sources={(hit.kind, hit.source_id) for hit in hits},
+                cost_seconds=time.perf_counter() - called,
+            )
+    return HookGeneration(
+        hooks=parse_lines(text, count),
+        context=[chunk(hit) for hit in hits],
+        cached=cached is not None,
+        near_duplicate=near,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+async def stream_hook_variants(
+    intent: str,
+    hits: Sequence[RetrievalHit],
+    *,
+    variants: int = 4,
+    concurrency: int = GENERATION_CONCURRENCY,
+    timeout: float = GENERATION_TIMEOUT,
+    llm: LLMClient | None = None,
+    cache: ResponseCache | None = response_cache,
+) -> AsyncIterator[HookVariant]:
+    """Yield one :class:`HookVariant` per angle in completion order.
+
+    At most ``concurrency`` LLM calls are in flight (cache hits skip the queue). A call
+    that raises yields a variant carrying the error; calls still running after
+    ``timeout`` seconds are cancelled and yielded as ``"timeout"``. Closing the generator
+    early cancels whatever is still running.
+    """
+    client = llm or default_llm()
+    fingerprint = context_fingerprint(hits)
+    sources = {(hit.kind, hit.source_id) for hit in hits}
+    gate = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    def elapsed_ms() -> float:
+        return round((loop.time() - started) * 1000, 3)
+
+    async def run(index: int, angle: str) -> HookVariant:
+        task = f"variant:{angle}"
+        cached = cache.lookup(task, intent, fingerprint) if cache is not None else None
+        if cached is not None:
+            text = cached.response
+        else:
+            async with gate:
+                called = time.perf_counter()
+                text = await acomplete(client, variant_prompt(intent, hits, angle))
+            if cache is not None:
+                cost = time.perf_counter() - called
+                cache.store(task, intent, fingerprint, text, sources=sources, cost_seconds=cost)
+        lines = parse_lines(text, 1)
+        return HookVariant(
+            index=index,
+            angle=angle,
+            hook=lines[0] if lines else None,
+            cached=cached is not None,
+            error=None if lines else "empty",
+            elapsed_ms=elapsed_ms(),
+        )
+
+    tasks = {
+        asyncio.create_task(run(index, angle)): (index, angle)
+        for index, angle in enumerate(ANGLES[:variants])
+    }
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = started + timeout - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=tasks.__getitem__):
+                index, angle = tasks[task]
+                try:
+                    yield task.result()
+                except Exception as exc:  # one failed variant must not end the stream
+                    error = f"{type(exc).__name__}: {exc}"[:200]
+                    yield HookVariant(
+                        index=index, angle=angle, error=error, elapsed_ms=elapsed_ms()
+                    )
+        for task in sorted(pending, key=tasks.__getitem__):
+            task.cancel()
+            index, angle = tasks[task]
+            yield HookVariant(index=index, angle=angle, error="timeout", elapsed_ms=elapsed_ms())
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def save_variants(
+    db: Session, idea: Idea, intent: str, variants: Sequence[HookVariant]
+) -> IdeaBrief | None:
+    """Append the finished hooks to the brief under a heading, as one autosave version.
+
+    Each hook becomes an unchecked checklist block, in angle order. Buffered edits are
+    flushed first so the append lands on the latest content.
+    """
+    hooks = sorted((variant for variant in variants if variant.hook), key=lambda v: v.index)
+    if not hooks:
+        return None
+    autosave_buffer.flush([idea.id])
+    db.refresh(idea)
+    content = parse_brief_content(idea.brief) if idea.brief is not None else BriefContent()
+    added = [BriefBlock(id=str(uuid.uuid4()), type="heading", text=f"Hooks: {intent}")]
+    added += [
+        BriefBlock(id=str(uuid.uuid4()), type="checklist", text=variant.hook, checked=False)
+        for variant in hooks
+    ]
+    # Parsed content is shared through brief_content_cache: copy, never mutate.
+    content = content.model_copy(update={"blocks": [*content.blocks, *added]})
+    return update_brief(db, idea, content, autosave=True, label="Generated hooks")
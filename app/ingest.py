@@ -0,0 +1,471 @@
+"""Parallel ingestion of creator archives (scripts, threads, transcripts, notes).
+
+Source files stream through a pipeline of generator stages::
+
+    discover -> normalise -> chunk -> embed -> persist
+
+``discover`` walks the given paths in the parent process and drops files whose
+:class:`~app.models.IngestCheckpoint` fingerprint (size + mtime) is unchanged, so a rerun
+resumes an interrupted import (a file that was only touched is re-read, found
+byte-identical by checksum and not rewritten). The CPU-bound middle stages run in worker
+processes on tasks of ``task_files`` files; at most ``2 * workers`` tasks are in flight,
+so a slow database write throttles file reading instead of piling results up in memory.
+``persist`` writes ``batch_size`` documents per transaction -- documents, chunks with
+their float32 embeddings, and the checkpoint rows -- so a crash loses at most the batch
+in progress. Each stage reports items (files; chunks for ``embed``) and busy seconds
+(summed across workers) in :class:`IngestReport`.
+
+    python -m app.ingest ~/archive --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import TypeVar
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from app import database
+from app.config import INGEST_BATCH, INGEST_WORKERS
+from app.migrations import run_migrations
+from app.models import ArchiveChunk, ArchiveDocument, IngestCheckpoint, utc_now
+from app.rag.chunking import chunk_document
+from app.rag.embedders import HashingEmbedder
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+KINDS = {
+    ".md": "note",
+    ".markdown": "note",
+    ".txt": "note",
+    ".html": "page",
+    ".htm": "page",
+    ".json": "thread",
+    ".srt": "transcript",
+    ".vtt": "transcript",
+}
+STAGES = ("discover", "normalise", "chunk", "embed", "persist")
+
+_CUE_TIMING = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?[.,]\d{3}\s+-->")
+_TAG = re.compile(r"<[^>]+>")
+_BLOCK_TAG = re.compile(r"</?(p|div|br|h[1-6]|li|tr|section|article)\b[^>]*>", re.IGNORECASE)
+_SCRIPT = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+# C0/C1 controls (except tab/newline) and zero-width/bidi formatting characters.
+_CONTROL = re.compile("[\x00-\x08\x0b-\x1f\x7f-\x9f\u200b-\u200f\u202a-\u202e\u2060\ufeff]")
+_SPACES = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_POST_KEYS = ("full_text", "text", "content", "body")
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    path: str
+    fingerprint: str
+
+
+@dataclass(frozen=True)
+class Document:
+    path: str
+    fingerprint: str
+    checksum: str
+    kind: str
+    title: str
+    body: str
+    chunks: tuple[str, ...] = ()
+    embeddings: np.ndarray | None = None
+    error: str | None = None
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class IngestReport:
+    seen: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    ingested: int = 0
+    failed: int = 0
+    chunks: int = 0
+    wall_seconds: float = 0.0
+    stages: dict[str, StageStats] = field(
+        default_factory=lambda: {name: StageStats() for name in STAGES}
+    )
+
+    def add(self, stage: str, items: int, seconds: float) -> None:
+        self.stages[stage].items += items
+        self.stages[stage].seconds += seconds
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.seen} files: {self.ingested} ingested ({self.chunks} chunks), "
+            f"{self.skipped} already done, {self.unchanged} unchanged, {self.failed} failed "
+            f"in {self.wall_seconds:.1f}s"
+        ]
+        for name, stats in self.stages.items():
+            lines.append(
+                f"  {name:<10} {stats.items:>9} items {stats.seconds:8.2f}s busy "
+                f"{stats.rate:>10,.0f}/s"
+            )
+        return "\n".join(lines)
+
+
+# -- normalise ---------------------------------------------------------------------------
+
+
+def _clean(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL.sub("", text)
+    lines = (_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _from_html(raw: str) -> str:
+    raw = _BLOCK_TAG.sub("\n\n", _SCRIPT.sub("", raw))
+    return html.unescape(_TAG.sub("", raw))
+
+
+def _from_subtitles(raw: str) -> str:
+    """Cue text of an SRT/WebVTT file, one paragraph per run of cues."""
+    lines = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line or line == "WEBVTT" or line.isdigit() or _CUE_TIMING.match(line):
+            continue
+        lines.append(_TAG.sub("", line))
+    return " ".join(lines)
+
+
+def _from_thread(raw: str) -> str:
+    data = json.loads(raw)
+    if isinstance(data, dict):
+        data = next((data[key] for key in ("posts", "tweets", "thread") if key in data), [data])
+    posts = []
+    for post in data:
+        if isinstance(post, str):
+            posts.append(post)
+        elif isinstance(post, dict):
+            posts.extend(post[key] for key in _POST_KEYS if isinstance(post.get(key), str))
+    return "\n\n".join(posts)
+
+
+def _title(path: Path, body: str) -> str:
+    first = body.split("\n", 1)[0].lstrip("#").strip()
+    return (first or path.stem)[:200]
+
+
+def normalise(source: SourceFile) -> Document:
+    """Read one file and reduce it to plain text with blank-line separated paragraphs."""
+    path = Path(source.path)
+    kind = KINDS.get(path.suffix.lower(), "note")
+    try:
+        raw_bytes = path.read_bytes()
+    except OSError as exc:
+        return Document(source.path, source.fingerprint, "", kind, "", "", error=str(exc))
+    checksum = hashlib.sha256(raw_bytes).hexdigest()
+    raw = raw_bytes.decode("utf-8", errors="replace")
+    try:
+        if kind == "page":
+            raw = _from_html(raw)
+        elif kind == "transcript":
+            raw = _from_subtitles(raw)
+        elif kind == "thread":
+            raw = _from_thread(raw)
+    except (ValueError, TypeError) as exc:
+        return Document(source.path, source.fingerprint, checksum, kind, "", "", error=str(exc))
+    body = _clean(raw)
+    # A transcript's first line is just whatever was said first.
+    title = path.stem if kind == "transcript" else _title(path, body)
+    return Document(source.path, source.fingerprint, checksum, kind, title, body)
+
+
+# -- worker side -------------------------------------------------------------------------
+
+_embedder: HashingEmbedder | None = None
+
+
+def _worker_embedder() -> HashingEmbedder:
+    # One per process so the embedder's feature-slot cache stays warm across tasks.
+    global _embedder
+    if _embedder is None:
+        _embedder = HashingEmbedder()
+    return _embedder
+
+
+def _timed(fn: Callable[[T], U], stats: list) -> Callable[[T], U]:
+    def run(item: T) -> U:
+        started = time.perf_counter()
+        try:
+            return fn(item)
+        finally:
+            stats[0] += 1
+            stats[1] += time.perf_counter() - started
+
+    return run
+
+
+def _chunk(document: Document) -> Document:
+    if document.error or not document.body:
+        return document
+    return replace(document, chunks=tuple(chunk_document(document.title, document.body)))
+
+
+def _embed(documents: Iterable[Document], stats: list) -> list[Document]:
+    """Embed the chunks of a whole task in one call (the embedder is vectorised)."""
+    documents = list(documents)
+    started = time.perf_counter()
+    texts = [text for document in documents for text in document.chunks]
+    if not texts:
+        return documents
+    vectors = _worker_embedder().embed(texts)
+    offset = 0
+    for index, document in enumerate(documents):
+        if document.chunks:
+            end = offset + len(document.chunks)
+            documents[index] = replace(document, embeddings=vectors[offset:end])
+            offset = end
+    stats[0] += len(texts)
+    stats[1] += time.perf_counter() - started
+    return documents
+
+
+def process_files(sources: Sequence[SourceFile]) -> tuple[list[Document], dict[str, list]]:
+    """normalise -> chunk -> embed for one task's files; runs in a worker process."""
+    stats = {stage: [0, 0.0] for stage in ("normalise", "chunk", "embed")}
+    normalised = map(_timed(normalise, stats["normalise"]), sources)
+    chunked = map(_timed(_chunk, stats["chunk"]), normalised)
+    return _embed(chunked, stats["embed"]), stats
+
+
+# -- parent side -------------------------------------------------------------------------
+
+
+def discover(paths: Iterable[str | Path]) -> Iterator[SourceFile]:
+    """Every supported file under ``paths``, with its size + mtime fingerprint."""
+    for root in map(Path, paths):
+        candidates = [root] if root.is_file() else sorted(root.rglob("*"))
+        for path in candidates:
+            if path.is_file() and path.suffix.lower() in KINDS:
+                stat = path.stat()
+                yield SourceFile(str(path.resolve()), f"{stat.st_size}:{stat.st_mtime_ns}")
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run_tasks(
+    tasks: Iterable[list[SourceFile]], executor: Executor | None, window: int
+) -> Iterator[tuple[list[Document], dict[str, list]]]:
+    """Results of :func:`process_files` in task order, with at most ``window`` in flight."""
+    if executor is None:
+        yield from map(process_files, tasks)
+        return
+    pending: deque[Future] = deque()
+    for task in tasks:
+        if len(pending) >= window:
+            # Backpressure: the next file is only read once the oldest task is drained.
+            yield pending.popleft().result()
+        pending.append(executor.submit(process_files, task))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _load_done(conn: Connection) -> dict[str, tuple[str, str | None]]:
+    query = select(
+        IngestCheckpoint.source_path, IngestCheckpoint.fingerprint, IngestCheckpoint.embedder
+    ).where(IngestCheckpoint.status == "done")
+    return {row.source_path: (row.fingerprint, row.embedder) for row in conn.execute(query)}
+
+
+def persist(
+    conn: Connection, documents: Sequence[Document], signature: str, report: IngestReport
+) -> None:
+    """Write one batch (documents, chunks, checkpoints); the caller owns the transaction."""
+    paths = [document.path for document in documents]
+    previous = {
+        row.source_path: row
+        for row in conn.execute(
+            select(IngestCheckpoint).where(IngestCheckpoint.source_path.in_(paths))
+        )
+    }
+    checkpoints = []
+    fresh = []
+    for document in documents:
+        checkpoint = {
+            "source_path": document.path,
+            "fingerprint": document.fingerprint,
+            "checksum": document.checksum,
+            "status": "done",
+            "document_id": None,
+            "chunks": len(document.chunks),
+            "embedder": signature,
+            "error": None,
+            "updated_at": utc_now(),
+        }
+        old = previous.get(document.path)
+        if document.error:
+            checkpoint.update(status="failed", checksum=None, error=document.error[:1000])
+            report.failed += 1
+        elif (
+            old is not None
+            and old.status == "done"
+            and (old.checksum, old.embedder) == (document.checksum, signature)
+        ):
+            # Touched but byte-identical: keep the stored document.
+            checkpoint.update(document_id=old.document_id, chunks=old.chunks)
+            report.unchanged += 1
+        else:
+            fresh.append(document)
+        checkpoints.append(checkpoint)
+
+    replaced = [document.path for document in fresh]
+    old_ids = conn.scalars(
+        select(ArchiveDocument.id).where(ArchiveDocument.source_path.in_(replaced))
+    ).all()
+    if old_ids:
+        conn.execute(delete(ArchiveChunk).where(ArchiveChunk.document_id.in_(old_ids)))
+        conn.execute(delete(ArchiveDocument).where(ArchiveDocument.id.in_(old_ids)))
+    stored = [document for document in fresh if document.chunks]
+    if stored:
+        ids = conn.scalars(
+            insert(ArchiveDocument).returning(ArchiveDocument.id, sort_by_parameter_order=True),
+            [
+                {
+                    "source_path": document.path,
+                    "kind": document.kind,
+                    "title": document.title,
+                    "body": document.body,
+                    "word_count": len(document.body.split()),
+                    "ingested_at": utc_now(),
+                }
+                for document in stored
+            ],
+        ).all()
+        conn.execute(
+            insert(ArchiveChunk),
+            [
+                {
+                    "document_id": document_id,
+                    "ordinal": ordinal,
+                    "text": text,
+                    "embedding": vector.tobytes(),
+                }
+                for document_id, document in zip(ids, stored, strict=True)
+                for ordinal, (text, vector) in enumerate(
+                    zip(document.chunks, document.embeddings, strict=True)
+                )
+            ],
+        )
+        document_ids = dict(zip((document.path for document in stored), ids, strict=True))
+        for checkpoint in checkpoints:
+            checkpoint["document_id"] = document_ids.get(
+                checkpoint["source_path"], checkpoint["document_id"]
+            )
+    report.ingested += len(fresh)
+    report.chunks += sum(len(document.chunks) for document in fresh)
+    conn.execute(delete(IngestCheckpoint).where(IngestCheckpoint.source_path.in_(paths)))
+    conn.execute(insert(IngestCheckpoint), checkpoints)
+
+
+def ingest(
+    paths: Iterable[str | Path],
+    *,
+    engine: Engine | None = None,
+    workers: int = INGEST_WORKERS,
+    batch_size: int = INGEST_BATCH,
+    task_files: int = 16,
+) -> IngestReport:
+    """Load every supported file under ``paths``; ``workers=1`` runs in-process."""
+    engine = engine or database.engine
+    workers = workers or os.cpu_count() or 1
+    signature = HashingEmbedder().signature
+    report = IngestReport()
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        done = _load_done(conn)
+
+    def pending(sources: Iterator[SourceFile]) -> Iterator[SourceFile]:
+        while True:
+            began = time.perf_counter()
+            source = next(sources, None)
+            report.add("discover", 0, time.perf_counter() - began)
+            if source is None:
+                return
+            report.seen += 1
+            report.add("discover", 1, 0.0)
+            if done.get(source.path) == (source.fingerprint, signature):
+                report.skipped += 1
+                continue
+            yield source
+
+    def merged(results: Iterator[tuple[list[Document], dict]]) -> Iterator[Document]:
+        for documents, stats in results:
+            for stage, (items, seconds) in stats.items():
+                report.add(stage, items, seconds)
+            yield from documents
+
+    tasks = _batched(pending(discover(paths)), task_files)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        documents = merged(_run_tasks(tasks, executor, window=2 * workers))
+        for batch in _batched(documents, batch_size):
+            began = time.perf_counter()
+            with engine.begin() as conn:
+                persist(conn, batch, signature, report)
+            report.add("persist", len(batch), time.perf_counter() - began)
+            logger.info("ingest: committed %d files (%d ingested)", len(batch), report.ingested)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load creator archives into ContentHub")
+    parser.add_argument("paths", nargs="+", help="files or directories to ingest")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="0 = one per CPU")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    database.Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
+    report = ingest(args.paths, workers=args.workers, batch_size=args.batch_size)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""Durable background jobs stored in SQLite, and the worker processes that run them.
+
+Producers call :func:`app.services.enqueue_job` inside their own transaction, so a job
+exists exactly when the write that asked for it committed. Workers claim work with one
+``UPDATE ... RETURNING`` that leases up to ``JOB_BATCH`` ready jobs (highest
+``priority`` first, then oldest ``available_at``): the lease stamps a fresh token and
+pushes ``available_at`` out by the visibility timeout. A worker that dies mid-job simply
+lets the lease expire and the job becomes ready again (or fails, if that was its last
+attempt), so delivery is at-least-once and handlers must be idempotent. Finished jobs are
+acknowledged in one executemany per batch, and only while the worker's token is still
+current. A failed job is retried with exponential backoff until ``max_attempts``, after
+which it stays ``failed`` for inspection.
+
+``main.lifespan`` starts ``JOB_WORKERS`` worker processes next to uvicorn; ``python -m
+app.jobs worker`` runs more elsewhere against the same database. Handlers run outside the
+web process, so they must not change data the web process caches in memory (calendar,
+templates, retrieval index) -- that kind of work stays on the request path or its
+in-process background threads.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import database
+from app.attachments import JOB_KIND as BACKFILL_ATTACHMENTS
+from app.attachments import backfill_attachments
+from app.config import (
+    JOB_BATCH,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_PURGE_INTERVAL,
+    JOB_RETENTION,
+    JOB_RETRY_BACKOFF,
+    JOB_VISIBILITY_TIMEOUT,
+    JOB_WORKERS,
+)
+from app.ingest import ingest
+from app.models import Job, utc_now
+from app.patterns import JOB_KIND as MINE_PATTERNS
+from app.patterns import update_patterns
+from app.search import rebuild_search_index
+from app.services import enqueue_job
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("queued", "leased", "done", "failed")
+
+handlers: dict[str, Callable[[dict], object]] = {}
+
+
+def handler(kind: str) -> Callable[[Callable[[dict], object]], Callable[[dict], object]]:
+    """Register the function that runs jobs of ``kind`` (it receives the payload dict)."""
+
+    def register(fn: Callable[[dict], object]) -> Callable[[dict], object]:
+        handlers[kind] = fn
+        return fn
+
+    return register
+
+
+_JOBS = Job.__table__
+_OWNED = (_JOBS.c.id == bindparam("job_id")) & (_JOBS.c.lease_token == bindparam("token"))
+# A lease that expired on the job's last attempt: its worker died mid-job (OOM, crash)
+# as many times as the job may run, so the job is failed instead of leased again.
+_EXHAUSTED = (_JOBS.c.status == "leased") & (_JOBS.c.attempts >= _JOBS.c.max_attempts)
+LEASE_EXPIRED = "lease expired on the final attempt (worker lost)"
+# Built once with bound parameters: the queue's hot path skips per-call statement building.
+_LEASE = (
+    update(_JOBS)
+    .where(
+        _JOBS.c.id.in_(
+            select(_JOBS.c.id)
+            .where(
+                _JOBS.c.status.in_(("queued", "leased")),
+                _JOBS.c.available_at <= bindparam("now", type_=_JOBS.c.available_at.type),
+            )
+            .order_by(_JOBS.c.priority.desc(), _JOBS.c.available_at)
+            .limit(bindparam("limit"))
+            .scalar_subquery()
+        )
+    )
+    .values(
+        status=case((_EXHAUSTED, "failed"), else_="leased"),
+        lease_token=case((_EXHAUSTED, None), else_=bindparam("token")),
+        attempts=case((_EXHAUSTED, _JOBS.c.attempts), else_=_JOBS.c.attempts + 1),
+        available_at=case(
+            (_EXHAUSTED, _JOBS.c.available_at),
+            else_=bindparam("expires", type_=_JOBS.c.available_at.type),
+        ),
+        finished_at=case(
+            (_EXHAUSTED, bindparam("now", type_=_JOBS.c.finished_at.type)),
+            else_=_JOBS.c.finished_at,
+        ),
+        last_error=case((_EXHAUSTED, LEASE_EXPIRED), else_=_JOBS.c.last_error),
+    )
+    .returning(
+        _JOBS.c.id,
+        _JOBS.c.kind,
+        _JOBS.c.payload,
+        _JOBS.c.attempts,
+        _JOBS.c.max_attempts,
+        _JOBS.c.status,
+    )
+)
+_COMPLETE = (
+    update(_JOBS)
+    .where(_OWNED)
+    .values(
+        status="done",
+        lease_token=None,
+        finished_at=bindparam("now", type_=_JOBS.c.finished_at.type),
+    )
+)
+_EXTEND = (
+    update(_JOBS)
+    .where(_OWNED)
+    .values(available_at=bindparam("expires", type_=_JOBS.c.available_at.type))
+)
+
+
+@dataclass(frozen=True)
+class LeasedJob:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    token: str
+
+
+class JobQueue:
+    def __init__(
+        self,
+        engine: Engine | None = None,
+        *,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+        retry_backoff: float = JOB_RETRY_BACKOFF,
+    ) -> None:
+        self._engine = engine
+        self.visibility_timeout = visibility_timeout
+        self.retry_backoff = retry_backoff
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine or database.engine
+
+    def enqueue(self, kind: str, payload: dict | None = None, **options) -> int:
+        """Queue one job in its own transaction (see :func:`enqueue_job` for ``options``)."""
+        with Session(self.engine) as db:
+            job = enqueue_job(db, kind, payload, **options)
+            db.commit()
+            return job.id
+
+    def enqueue_many(
+        self,
+        kind: str,
+        payloads: Iterable[dict],
+        *,
+        priority: int = 0,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> list[int]:
+        now = utc_now()
+        rows = [
+            {
+                "kind": kind,
+                "payload": json.dumps(payload, separators=(",", ":")),
+                "priority": priority,
+                "max_attempts": max_attempts,
+                "available_at": now,
+                "created_at": now,
+            }
+            for payload in payloads
+        ]
+        if not rows:
+            return []
+        with self.engine.begin() as conn:
+            return list(
+                conn.scalars(insert(Job).returning(Job.id, sort_by_parameter_order=True), rows)
+            )
+
+    def lease(self, limit: int = 1, *, visibility_timeout: float | None = None) -> list[LeasedJob]:
+        """Claim up to ``limit`` ready jobs (including ones whose lease expired).
+
+        An expired lease on a job's last attempt fails the job instead, so a handler that
+        kills its worker is not re-run forever.
+        """
+        now = utc_now()
+        timeout = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        token = secrets.token_hex(16)
+        params = {
+            "now": now,
+            "limit": limit,
+            "token": token,
+            "expires": now + timedelta(seconds=timeout),
+        }
+        with self.engine.begin() as conn:
+            rows = conn.execute(_LEASE, params).all()
+        for row in rows:
+            if row.status == "failed":
+                logger.error("Job %s (%s) failed: %s", row.id, row.kind, LEASE_EXPIRED)
+        jobs = [
+            LeasedJob(
+                row.id, row.kind, json.loads(row.payload), row.attempts, row.max_attempts, token
+            )
+            for row in rows
+            if row.status == "leased"
+        ]
+        return sorted(jobs, key=lambda job: job.id)
+
+    def complete(self, jobs: Sequence[LeasedJob]) -> int:
+        """Mark jobs done; returns how many were still leased by us (others were lost)."""
+        if not jobs:
+            return 0
+        now = utc_now()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                _COMPLETE, [{"job_id": job.id, "token": job.token, "now": now} for job in jobs]
+            )
+        return result.rowcount
+
+    def fail(self, job: LeasedJob, error: str, *, retry: bool = True) -> str:
+        """Record a failure: requeue with backoff, or give up after ``max_attempts``."""
+        if retry and job.attempts < job.max_attempts:
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+            values = {"status": "queued", "available_at": utc_now() + timedelta(seconds=delay)}
+        else:
+            values = {"status": "failed", "finished_at": utc_now()}
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.lease_token == job.token)
+                .values(lease_token=None, last_error=error[:2000], **values)
+            )
+        return values["status"]
+
+    def extend(self, jobs: Sequence[LeasedJob], seconds: float | None = None) -> int:
+        """Push the lease of still-owned ``jobs`` out by ``seconds`` from now."""
+        if not jobs:
+            return 0
+        expires = utc_now() + timedelta(seconds=seconds or self.visibility_timeout)
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                _EXTEND,
+                [{"job_id": job.id, "token": job.token, "expires": expires} for job in jobs],
+            )
+        return result.rowcount
+
+    def stats(self) -> dict[str, int]:
+        with self.engine.connect() as conn:
+            counts = dict(conn.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def purge(self, older_than: timedelta) -> int:
+        """Delete jobs that finished successfully more than ``older_than`` ago."""
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                delete(Job).where(Job.status == "done", Job.finished_at < utc_now() - older_than)
+            )
+        return result.rowcount
+
+
+job_queue = JobQueue()
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue | None = None,
+        *,
+        batch_size: int = JOB_BATCH,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        retention: float = JOB_RETENTION,
+        purge_interval: float = JOB_PURGE_INTERVAL,
+    ) -> None:
+        self.queue = queue or job_queue
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self.completed = 0
+        self.failed = 0
+        self.purged = 0
+        self._next_purge = 0.0
+
+    def run_once(self) -> int:
+        """Lease one batch and run it; returns the number of jobs leased."""
+        jobs = self.queue.lease(self.batch_size)
+        leased_at = time.monotonic()
+        done: list[LeasedJob] = []
+        for index, job in enumerate(jobs):
+            if time.monotonic() - leased_at > self.queue.visibility_timeout / 2:
+                # Long batch: keep the jobs we have not reached yet from being re-leased.
+                self.queue.extend(jobs[index:])
+                leased_at = time.monotonic()
+            fn = handlers.get(job.kind)
+            if fn is None:
+                self.queue.fail(job, f"no handler registered for {job.kind!r}", retry=False)
+                self.failed += 1
+                continue
+            try:
+                fn(job.payload)
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+                self.queue.fail(job, f"{type(exc).__name__}: {exc}")
+                self.failed += 1
+            else:
+                done.append(job)
+        self.completed += self.queue.complete(done)
+        return len(jobs)
+
+    def purge_finished(self) -> int:
+        """Delete jobs done over ``retention`` seconds ago, at most once per ``purge_interval``."""
+        if self.purge_interval <= 0 or time.monotonic() < self._next_purge:
+            return 0
+        self._next_purge = time.monotonic() + self.purge_interval
+        purged = self.queue.purge(timedelta(seconds=self.retention))
+        self.purged += purged
+        return purged
+
+    def run(self, should_stop: Callable[[], bool]) -> None:
+        while not should_stop():
+            try:
+                self.purge_finished()
+                leased = self.run_once()
+            except Exception:
+                logger.exception("Job worker iteration failed")
+                leased = 0
+            if not leased:
+                time.sleep(self.poll_interval)
+
+
+def _worker_main(
+    url: str, modules: Sequence[str], stop, batch_size: int, poll_interval: float
+) -> None:
+    database.configure_database(url)
+    for module in modules:
+        importlib.import_module(module)
+    parent = os.getppid()
+    worker = Worker(batch_size=batch_size, poll_interval=poll_interval)
+    # Exit on shutdown, or if the web process died without telling us.
+    worker.run(lambda: stop.is_set() or os.getppid() != parent)
+
+
+class WorkerPool:
+    """Worker processes that live as long as the app (started from ``main.lifespan``)."""
+
+    def __init__(
+        self,
+        count: int = JOB_WORKERS,
+        *,
+        modules: Sequence[str] = (),
+        batch_size: int = JOB_BATCH,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ) -> None:
+        self.count = count
+        self.modules = tuple(modules)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = None
+        self._processes: list = []
+
+    @property
+    def running(self) -> bool:
+        return any(process.is_alive() for process in self._processes)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop = self._context.Event()
+        self._processes = [
+            self._context.Process(
+                target=_worker_main,
+                args=(
+                    database.database_url,
+                    self.modules,
+                    self._stop,
+                    self.batch_size,
+                    self.poll_interval,
+                ),
+                name=f"contenthub-jobs-{n}",
+            )
+            for n in range(self.count)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def join(self) -> None:
+        for process in self._processes:
+            process.join()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask workers to finish their current batch; leases of anything cut off expire."""
+        if self._stop is None:
+            return
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
+
+
+job_workers = WorkerPool()
+
+
+# -- handlers ----------------------------------------------------------------------------
+
+
+@handler("ingest_archive")
+def _ingest_archive(payload: dict) -> None:
+    report = ingest(payload["paths"])
+    logger.info("Archive ingest finished:\n%s", report.summary())
+
+
+@handler("rebuild_search")
+def _rebuild_search(payload: dict) -> None:
+    rebuild_search_index(database.engine)
+
+
+@handler(BACKFILL_ATTACHMENTS)
+def _backfill_attachments(payload: dict) -> None:
+    synced = backfill_attachments(database.engine)
+    logger.info("Attachment catalogue rebuilt from %d briefs", synced)
+
+
+@handler(MINE_PATTERNS)
+def _mine_patterns(payload: dict) -> None:
+    update_patterns(
+        ideas=payload.get("ideas", ()),
+        templates=payload.get("templates", ()),
+        rebuild=payload.get("rebuild", False),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ContentHub background jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="run job workers in the foreground")
+    worker.add_argument("--concurrency", type=int, default=1)
+    worker.add_argument("--batch-size", type=int, default=JOB_BATCH)
+    commands.add_parser("stats", help="print job counts by status")
+    purge = commands.add_parser("purge", help="delete finished jobs")
+    purge.add_argument("--days", type=float, default=7.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    if args.command == "stats":
+        print(json.dumps(job_queue.stats()))
+    elif args.command == "purge":
+        print(f"deleted {job_queue.purge(timedelta(days=args.days))} finished jobs")
+    else:
+        pool = WorkerPool(args.concurrency, batch_size=args.batch_size)
+        pool.start()
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Compact encoding for brief version snapshots (keyframes + structural deltas).
+
+Snapshots are stored in ``IdeaBriefVersion.snapshot`` as one of:
+
+* legacy plain JSON (``{...}``) written before this codec existed,
+* ``K1:`` + base64(zlib(JSON)) -- a keyframe holding the full brief,
+* ``D1:`` + base64(zlib(delta)) -- changes against the keyframe named by
+  ``IdeaBriefVersion.base_version_id``.
+
+A delta lists the top-level fields that differ from the keyframe. List fields (blocks,
+shots, CTAs, hashtags, attachments) are encoded item by item: an ``int`` points at an
+identical item in the keyframe's list, a ``"start:stop"`` string covers a run of them, and
+a one-element list carries a new/edited item verbatim. Autosaves usually touch a handful
+of items, so deltas stay tiny even for briefs with hundreds of blocks, and restoring never
+needs more than keyframe + delta.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from functools import lru_cache
+from typing import Any
+
+KEYFRAME_PREFIX = "K1:"
+DELTA_PREFIX = "D1:"
+
+
+class SnapshotDecodeError(ValueError):
+    """Raised when a stored snapshot cannot be decoded."""
+
+
+def _pack(payload: str) -> str:
+    return base64.b64encode(zlib.compress(payload.encode("utf-8"), 6)).decode("ascii")
+
+
+def _unpack(payload: str) -> str:
+    try:
+        return zlib.decompress(base64.b64decode(payload)).decode("utf-8")
+    except (ValueError, zlib.error) as exc:
+        raise SnapshotDecodeError("Corrupt brief snapshot") from exc
+
+
+def _fingerprint(item: Any) -> str:
+    return json.dumps(item, sort_keys=True, separators=(",", ":"))
+
+
+def _compress_refs(refs: list) -> list:
+    """Collapse runs of consecutive keyframe indexes into ``"start:stop"`` strings."""
+    packed: list = []
+    run_start = run_end = None
+    for ref in refs + [None]:
+        if isinstance(ref, int) and run_end is not None and ref == run_end + 1:
+            run_end = ref
+            continue
+        if run_start is not None:
+            packed.append(run_start if run_start == run_end else f"{run_start}:{run_end + 1}")
+            run_start = run_end = None
+        if isinstance(ref, int):
+            run_start = run_end = ref
+        elif ref is not None:
+            packed.append(ref)
+    return packed
+
+
+def _expand_refs(source: list, refs: list) -> list:
+    items = []
+    for ref in refs:
+        if isinstance(ref, int):
+            items.append(source[ref])
+        elif isinstance(ref, str):
+            start, stop = (int(part) for part in ref.split(":"))
+            items.extend(source[start:stop])
+        else:
+            items.append(ref[0])
+    return items
+
+
+def is_legacy(snapshot: str) -> bool:
+    """Return True for plain-JSON snapshots written before the codec existed."""
+    return not snapshot.startswith((KEYFRAME_PREFIX, DELTA_PREFIX))
+
+
+def encode_keyframe(content_json: str) -> str:
+    return KEYFRAME_PREFIX + _pack(content_json)
+
+
+@lru_cache(maxsize=256)
+def decode_keyframe(snapshot: str) -> dict:
+    """Decode a keyframe (or legacy JSON) snapshot. The result is shared: do not mutate it."""
+    if snapshot.startswith(DELTA_PREFIX):
+        raise SnapshotDecodeError("Snapshot is a delta and needs its keyframe")
+    raw = snapshot
+    if snapshot.startswith(KEYFRAME_PREFIX):
+        raw = _unpack(snapshot[len(KEYFRAME_PREFIX) :])
+    try:
+        return json.loads(raw)
+    except ValueError as exc:
+        raise SnapshotDecodeError("Corrupt brief snapshot") from exc
+
+
+def encode_delta(base: dict, current: dict) -> str:
+    """Encode ``current`` as the set of changes against the keyframe content ``base``."""
+    changes: dict[str, Any] = {}
+    lists: dict[str, list] = {}
+    for field, value in current.items():
+        base_value = base.get(field)
+        if value == base_value:
+            continue
+        if isinstance(value, list) and isinstance(base_value, list):
+            positions: dict[str, int] = {}
+            for index, item in enumerate(base_value):
+                positions.setdefault(_fingerprint(item), index)
+            refs = [positions.get(_fingerprint(item), [item]) for item in value]
+            lists[field] = _compress_refs(refs)
+        else:
+            changes[field] = value
+    delta: dict[str, Any] = {}
+    if changes:
+        delta["set"] = changes
+    if lists:
+        delta["lists"] = lists
+    dropped = [field for field in base if field not in current]
+    if dropped:
+        delta["drop"] = dropped
+    return DELTA_PREFIX + _pack(json.dumps(delta, separators=(",", ":")))
+
+
+def apply_delta(base: dict, snapshot: str) -> dict:
+    """Rebuild the full content dict from a keyframe and a ``D1:`` snapshot."""
+    if not snapshot.startswith(DELTA_PREFIX):
+        raise SnapshotDecodeError("Snapshot is not a delta")
+    try:
+        delta = json.loads(_unpack(snapshot[len(DELTA_PREFIX) :]))
+        content = {k: v for k, v in base.items() if k not in delta.get("drop", ())}
+        content.update(delta.get("set", {}))
+        for field, refs in delta.get("lists", {}).items():
+            content[field] = _expand_refs(base.get(field) or [], refs)
+    except (ValueError, IndexError, TypeError, AttributeError) as exc:
+        raise SnapshotDecodeError("Corrupt brief delta") from exc
+    return content
+
+
+def encode_snapshot(
+    content_json: str,
+    keyframe: tuple[int, str] | None,
+    versions_since_keyframe: int,
+    interval: int,
+) -> tuple[str, int | None]:
+    """Pick the encoding for a new version: ``(snapshot, base_version_id)``.
+
+    A delta against ``keyframe`` (``(id, snapshot)`` of the idea's latest keyframe) is used
+    while fewer than ``interval`` versions reference it and the delta stays well below the
+    keyframe's size; otherwise the content becomes a fresh keyframe.
+    """
+    if keyframe is not None and versions_since_keyframe < interval:
+        keyframe_id, keyframe_snapshot = keyframe
+        try:
+            delta = encode_delta(decode_keyframe(keyframe_snapshot), json.loads(content_json))
+        except (SnapshotDecodeError, ValueError):
+            delta = None
+        if delta is not None and len(delta) * 4 < len(keyframe_snapshot) * 3:
+            return delta, keyframe_id
+    return encode_keyframe(content_json), None
@@ -0,0 +1,250 @@
+"""In-process caches: calendar windows and their rendered HTML, parsed brief content and the
+ranked template list."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from datetime import date, datetime
+
+from app.config import (
+    BRIEF_CONTENT_CACHE_SIZE,
+    CALENDAR_CACHE_SIZE,
+    CALENDAR_FRAGMENT_CACHE_CHARS,
+)
+from app.lib.calendar import windows_containing
+from app.schemas import BriefContent, IdeaRead, TemplateRead
+
+WindowKey = tuple[int, int]
+BriefKey = tuple[int, datetime]
+
+
+class MonthWindowCache:
+    """LRU of ``IdeaRead`` tuples per calendar window with write-driven invalidation.
+
+    Every window carries a version that is bumped on invalidation. Loads record the
+    version they started from and are discarded on ``put`` if a write landed meanwhile,
+    so a slow reader can never re-insert data that predates the write.
+    """
+
+    def __init__(self, maxsize: int = 24) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[WindowKey, tuple[IdeaRead, ...]] = OrderedDict()
+        self._versions: dict[WindowKey, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: WindowKey) -> tuple[list[IdeaRead] | None, int]:
+        """Return ``(ideas, version)``; ``ideas`` is None on a miss."""
+        with self._lock:
+            version = self._versions.get(key, 0)
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None, version
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(cached), version
+
+    def put(self, key: WindowKey, ideas: Iterable[IdeaRead], version: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._versions.get(key, 0) != version:
+                return
+            self._entries[key] = tuple(ideas)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: WindowKey, loader: Callable[[], list[IdeaRead]]) -> list[IdeaRead]:
+        ideas, version = self.get(key)
+        if ideas is None:
+            ideas = loader()
+            self.put(key, ideas, version)
+        return ideas
+
+    def version(self, key: WindowKey) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def invalidate_dates(self, *days: date | None) -> None:
+        """Drop every window that renders any of ``days`` (None entries are ignored)."""
+        keys = {key for day in days if day is not None for key in windows_containing(day)}
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in set(self._versions) | set(self._entries):
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+calendar_cache = MonthWindowCache(maxsize=CALENDAR_CACHE_SIZE)
+
+
+class FragmentCache:
+    """LRU of rendered HTML fragments, capped by their total length in characters.
+
+    Keys hold every value the fragment renders (for a calendar day, the id, title and
+    completed flag of each idea), so an edit yields a new key rather than needing an
+    invalidation, and fragments of superseded versions simply age out.
+    """
+
+    def __init__(self, max_chars: int = 32 * 1024 * 1024) -> None:
+        self.max_chars = max_chars
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key: Hashable, html: str) -> None:
+        if len(html) > self.max_chars:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= len(previous)
+            self._entries[key] = html
+            self._chars += len(html)
+            while self._chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "chars": self._chars,
+                "max_chars": self.max_chars,
+            }
+
+
+calendar_fragments = FragmentCache(max_chars=CALENDAR_FRAGMENT_CACHE_CHARS)
+
+
+class BriefContentCache:
+    """LRU of parsed ``BriefContent`` keyed by ``(brief.id, updated_at)``.
+
+    Every save moves ``updated_at``, so a key never maps to stale content and entries for
+    old revisions simply age out. Cached models are shared: callers must not mutate them.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[BriefKey, BriefContent] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: BriefKey) -> BriefContent | None:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, key: BriefKey, content: BriefContent) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+brief_content_cache = BriefContentCache(maxsize=BRIEF_CONTENT_CACHE_SIZE)
+
+
+class RankedTemplateCache:
+    """The ranked ``TemplateRead`` list, rebuilt on the first read after a template write.
+
+    Uses the same version check as :class:`MonthWindowCache` so a load that raced a
+    write is never stored.
+    """
+
+    def __init__(self) -> None:
+        self._items: tuple[TemplateRead, ...] | None = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self) -> tuple[list[TemplateRead] | None, int]:
+        with self._lock:
+            if self._items is None:
+                self.misses += 1
+                return None, self._version
+            self.hits += 1
+            return list(self._items), self._version
+
+    def put(self, items: Iterable[TemplateRead], version: int) -> None:
+        with self._lock:
+            if version == self._version:
+                self._items = tuple(items)
+
+    def get_or_load(self, loader: Callable[[], list[TemplateRead]]) -> list[TemplateRead]:
+        items, version = self.get()
+        if items is None:
+            items = loader()
+            self.put(items, version)
+        return items
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._items = None
+
+
+template_cache = RankedTemplateCache()
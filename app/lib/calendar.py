@@ -9,10 +9,32 @@ from typing import Iterable
 from app.models import Idea
 
 
+def window_bounds(year: int, month: int) -> tuple[date, date]:
+    """Return the inclusive first/last day of the 42-day grid shown for a month."""
+    first_day = date(year, month, 1)
+    start = first_day - timedelta(days=first_day.weekday())
+    return start, start + timedelta(days=41)
+
+
+def windows_containing(day: date) -> list[tuple[int, int]]:
+    """Return every (year, month) grid that renders ``day`` (its own month plus spill-over)."""
+    anchors = (
+        date(day.year, day.month, 1) - timedelta(days=1),
+        day,
+        date(day.year, day.month, 28) + timedelta(days=7),
+    )
+    windows = []
+    for anchor in anchors:
+        start, end = window_bounds(anchor.year, anchor.month)
+        if start <= day <= end:
+            windows.append((anchor.year, anchor.month))
+    return windows
+
+
 def month_context(year: int, month: int) -> dict:
     """Return metadata for a 6-week (42 day) calendar grid."""
     first_day = date(year, month, 1)
-    start = first_day - timedelta(days=first_day.weekday())
+    start, _ = window_bounds(year, month)
     days = [start + timedelta(days=i) for i in range(42)]
     weeks = [days[i : i + 7] for i in range(0, 42, 7)]
     last_day = days[-1]
@@ -0,0 +1,54 @@
+"""Strong entity tags for briefs and calendar windows, plus precondition matching.
+
+Brief tags are derived from ``IdeaBrief.updated_at`` (or a buffered autosave's timestamp,
+which the flusher persists unchanged), calendar tags from the window version kept by
+:class:`app.lib.cache.MonthWindowCache`. Either can be computed without loading or
+serializing the entity, so a matching ``If-None-Match`` is answered with a bare 304.
+"""
+
+from __future__ import annotations
+
+import secrets
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Window versions restart at zero with the process; the token keeps a tag issued by an
+# earlier run (or another worker) from matching a different window state.
+PROCESS_TOKEN = secrets.token_hex(4)
+
+
+def brief_etag(idea_id: int, updated_at: datetime) -> str:
+    if updated_at.tzinfo is None:
+        # SQLite hands back naive datetimes for the UTC values we store.
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    micros = (updated_at - _EPOCH) // timedelta(microseconds=1)
+    return f'"b{idea_id}-{micros:x}"'
+
+
+def window_etag(year: int, month: int, version: int) -> str:
+    return f'"c{year}-{month:02d}-{version}-{PROCESS_TOKEN}"'
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: str | None, etag: str) -> bool:
+    """Return True when ``If-None-Match`` lists ``etag`` (weak comparison) or is ``*``."""
+    if not header:
+        return False
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in _tags(header))
+
+
+def if_match(header: str | None, etag: str | None) -> bool:
+    """Return True when ``If-Match`` is absent or satisfied (strong comparison).
+
+    ``etag`` is None when the entity does not exist yet, which fails every ``If-Match``.
+    """
+    if header is None:
+        return True
+    if etag is None:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in tags
@@ -5,17 +5,33 @@ from __future__ import annotations
 import os
 import re
 import uuid
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 import boto3
 from botocore.client import BaseClient
-from botocore.exceptions import BotoCoreError, NoCredentialsError
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+
+# S3's multipart limits: parts of 5 MiB..5 GiB (the last may be smaller), 10,000 per upload.
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+MAX_PARTS = 10_000
+KEY_PREFIX = "briefs/"
 
 
 class StorageConfigError(RuntimeError):
     """Raised when storage settings are missing or invalid."""
 
 
+class MultipartUploadError(ValueError):
+    """S3 rejected a multipart call; ``code`` is S3's error code (e.g. ``NoSuchUpload``)."""
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
 def _bucket() -> str:
     bucket = os.getenv("CONTENTHUB_S3_BUCKET")
     if not bucket:
@@ -27,10 +43,25 @@ def _region() -> str:
     return os.getenv("CONTENTHUB_S3_REGION", "us-east-1")
 
 
+def _endpoint_url() -> str | None:
+    """S3-compatible endpoint (MinIO, a moto server...); unset means AWS."""
+    return os.getenv("CONTENTHUB_S3_ENDPOINT_URL") or None
+
+
 def _expires_seconds() -> int:
     return int(os.getenv("CONTENTHUB_S3_TTL", "3600"))
 
 
+def _sign_workers() -> int:
+    # SigV4 with cached credentials is pure-Python HMAC, so threads only pay off when
+    # signing blocks (credential refresh, remote signers); 1 signs inline.
+    return int(os.getenv("CONTENTHUB_S3_SIGN_WORKERS", "1"))
+
+
+def _part_size() -> int:
+    return int(os.getenv("CONTENTHUB_S3_PART_SIZE", str(64 * 1024 * 1024)))
+
+
 def _safe_filename(name: str | None) -> str:
     fallback = "upload"
     if not name:
@@ -41,31 +72,147 @@ def _safe_filename(name: str | None) -> str:
 
 @lru_cache(maxsize=1)
 def _s3_client() -> BaseClient:
-    return boto3.client("s3", region_name=_region())
+    return boto3.client("s3", region_name=_region(), endpoint_url=_endpoint_url())
 
 
-def build_presigned_upload(filename: str, content_type: str = "application/octet-stream") -> dict:
-    """Return presigned POST metadata for uploading a brief attachment."""
-    bucket = _bucket()
-    key = f"briefs/{uuid.uuid4().hex}-{_safe_filename(filename)}"
-    client = _s3_client()
+@lru_cache(maxsize=1)
+def _sign_pool() -> ThreadPoolExecutor:
+    # boto3 clients are thread-safe, so every worker shares the cached _s3_client.
+    return ThreadPoolExecutor(max_workers=_sign_workers(), thread_name_prefix="s3-sign")
+
+
+def _object_url(bucket: str, key: str) -> str:
+    endpoint = _endpoint_url()
+    if endpoint:
+        return f"{endpoint.rstrip('/')}/{bucket}/{key}"
+    return f"https://{bucket}.s3.{_region()}.amazonaws.com/{key}"
+
+
+def _new_key(filename: str | None) -> str:
+    return f"{KEY_PREFIX}{uuid.uuid4().hex}-{_safe_filename(filename)}"
+
+
+def _presign(
+    client: BaseClient, bucket: str, expires: int, filename: str, content_type: str
+) -> dict:
+    key = _new_key(filename)
     try:
         presigned = client.generate_presigned_post(
             Bucket=bucket,
             Key=key,
             Fields={"Content-Type": content_type},
             Conditions=[{"Content-Type": content_type}],
-            ExpiresIn=_expires_seconds(),
+            ExpiresIn=expires,
         )
     except (BotoCoreError, NoCredentialsError) as exc:
         raise StorageConfigError(f"Unable to generate upload URL: {exc}") from exc
-
-    region = _region()
-    url = f"https://{bucket}.s3.{region}.amazonaws.com/{key}"
     return {
         "key": key,
-        "url": url,
+        "url": _object_url(bucket, key),
         "upload_url": presigned["url"],
         "fields": presigned["fields"],
         "content_type": content_type,
     }
+
+
+def build_presigned_upload(filename: str, content_type: str = "application/octet-stream") -> dict:
+    """Return presigned POST metadata for uploading a brief attachment."""
+    return _presign(_s3_client(), _bucket(), _expires_seconds(), filename, content_type)
+
+
+def build_presigned_uploads(files: Sequence[tuple[str, str]]) -> list[dict]:
+    """Presigned POST metadata for many ``(filename, content_type)`` pairs, in order.
+
+    Settings are read and the client fetched once. With ``CONTENTHUB_S3_SIGN_WORKERS``
+    above 1 the signatures are computed on a shared thread pool of that size.
+    """
+    bucket, expires, client = _bucket(), _expires_seconds(), _s3_client()
+    if len(files) <= 1 or _sign_workers() <= 1:
+        return [_presign(client, bucket, expires, name, kind) for name, kind in files]
+    futures = [
+        _sign_pool().submit(_presign, client, bucket, expires, name, kind) for name, kind in files
+    ]
+    return [future.result() for future in futures]
+
+
+def part_size_for(size: int) -> int:
+    """``CONTENTHUB_S3_PART_SIZE``, grown as needed to fit ``size`` in 10,000 parts."""
+    part_size = max(_part_size(), MIN_PART_SIZE, -(-size // MAX_PARTS))
+    if part_size > MAX_PART_SIZE:
+        raise MultipartUploadError("EntityTooLarge", f"{size} bytes exceeds the multipart limit")
+    return part_size
+
+
+def _client_error(exc: ClientError) -> MultipartUploadError:
+    error = exc.response.get("Error", {})
+    return MultipartUploadError(error.get("Code", "Unknown"), error.get("Message", str(exc)))
+
+
+def _multipart_call(method: str, **params) -> dict:
+    try:
+        return getattr(_s3_client(), method)(Bucket=_bucket(), **params)
+    except ClientError as exc:
+        raise _client_error(exc) from exc
+    except (BotoCoreError, NoCredentialsError) as exc:
+        raise StorageConfigError(f"Multipart upload failed: {exc}") from exc
+
+
+def _check_key(key: str) -> None:
+    # Only objects this module named; a client cannot complete or abort arbitrary keys.
+    if not key.startswith(KEY_PREFIX) or ".." in key:
+        raise MultipartUploadError("InvalidKey", f"Not an attachment key: {key!r}")
+
+
+def start_multipart_upload(
+    filename: str, size: int, content_type: str = "application/octet-stream"
+) -> dict:
+    """Create a multipart upload and presign a PUT URL for every part.
+
+    Clients PUT ``parts[n]`` bytes ``[n * part_size, (n + 1) * part_size)`` in any order
+    and in parallel, keep each response's ``ETag``, and retry only the parts that failed.
+    """
+    part_size = part_size_for(size)
+    key = _new_key(filename)
+    created = _multipart_call("create_multipart_upload", Key=key, ContentType=content_type)
+    upload_id = created["UploadId"]
+    bucket, expires, client = _bucket(), _expires_seconds(), _s3_client()
+    parts = [
+        {
+            "part_number": number,
+            "url": client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                ExpiresIn=expires,
+            ),
+        }
+        for number in range(1, max(1, -(-size // part_size)) + 1)
+    ]
+    return {
+        "key": key,
+        "upload_id": upload_id,
+        "url": _object_url(bucket, key),
+        "content_type": content_type,
+        "part_size": part_size,
+        "parts": parts,
+    }
+
+
+def complete_multipart_upload(key: str, upload_id: str, parts: Sequence[tuple[int, str]]) -> dict:
+    """Assemble the uploaded ``(part_number, etag)`` parts; returns the object's size."""
+    _check_key(key)
+    _multipart_call(
+        "complete_multipart_upload",
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [{"PartNumber": number, "ETag": etag} for number, etag in sorted(parts)]
+        },
+    )
+    head = _multipart_call("head_object", Key=key)
+    return {"key": key, "url": _object_url(_bucket(), key), "size": head["ContentLength"]}
+
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    """Discard an unfinished upload and the parts stored so far."""
+    _check_key(key)
+    _multipart_call("abort_multipart_upload", Key=key, UploadId=upload_id)
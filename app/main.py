@@ -2,23 +2,64 @@
 
 from __future__ import annotations
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from app import database
-from app.config import STATIC_DIR
-from app.routers import ideas, pages, templates
+from app.autosave import autosave_buffer
+from app.config import (
+    ASYNC_DB,
+    AUTOSAVE_BUFFER,
+    JOB_WORKERS,
+    RATING_QUEUE,
+    STATIC_DIR,
+    VERSION_COMPACTION,
+)
+from app.jobs import job_workers
+from app.migrations import run_migrations
+from app.ratings import rating_queue
+from app.retention import version_compactor
+from app.routers import (
+    attachments,
+    generation,
+    ideas,
+    ideas_async,
+    jobs,
+    pages,
+    patterns,
+    search,
+    templates,
+)
+from app.services import ensure_seed_templates
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     database.Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
+    with database.SessionLocal() as db:
+        ensure_seed_templates(db)
+    if AUTOSAVE_BUFFER:
+        autosave_buffer.start()
+    if VERSION_COMPACTION:
+        version_compactor.start()
+    if RATING_QUEUE:
+        rating_queue.start()
+    if JOB_WORKERS:
+        job_workers.start()
     yield
+    await asyncio.to_thread(job_workers.stop)
+    await asyncio.to_thread(rating_queue.stop)
+    await asyncio.to_thread(version_compactor.stop)
+    # Guaranteed flush so acknowledged autosaves survive a graceful shutdown.
+    await asyncio.to_thread(autosave_buffer.stop)
+    await database.dispose_async_engine()
 
 
-def create_app() -> FastAPI:
+def create_app(async_db: bool = ASYNC_DB) -> FastAPI:
     app = FastAPI(
         title="ContentHub Calendar",
         version="0.4.0",
@@ -26,9 +67,17 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+    if async_db:
+        # Registered first so these handlers win the match for the paths they share.
+        app.include_router(ideas_async.router)
     app.include_router(pages.router)
     app.include_router(ideas.router)
     app.include_router(templates.router)
+    app.include_router(search.router)
+    app.include_router(jobs.router)
+    app.include_router(patterns.router)
+    app.include_router(generation.router)
+    app.include_router(attachments.router)
     return app
 
 
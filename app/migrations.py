@@ -0,0 +1,182 @@
+"""Idempotent schema upgrades for databases created by earlier releases.
+
+``Base.metadata.create_all`` only creates missing tables, so anything added to an
+existing table (columns, indexes) is applied here at startup. Data rewrites that can take
+a while on large databases are exposed through the CLI instead::
+
+    python -m app.migrations compact-versions
+    python -m app.migrations rebuild-search
+    python -m app.migrations backfill-attachments
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+
+from sqlalchemy import Float, cast, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from app import database, models  # noqa: F401 - models registers tables on Base.metadata
+from app.attachments import backfill_attachments, queue_backfill
+from app.config import VERSION_KEYFRAME_INTERVAL
+from app.database import Base
+from app.lib import brief_codec
+from app.models import IdeaBriefVersion, IdeaTemplate
+from app.search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_columns(engine: Engine) -> None:
+    """Add model columns missing from existing tables (they must be nullable or defaulted)."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                spec = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {spec}"))
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """Create model-declared indexes that are missing from already-existing tables."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(bind=engine)
+
+
+def backfill_template_scores(engine: Engine) -> None:
+    """Fill ``rating_score`` for templates rated before the column existed."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(IdeaTemplate)
+            .where(IdeaTemplate.rating_count > 0, IdeaTemplate.rating_score == 0)
+            .values(
+                rating_score=cast(IdeaTemplate.rating_sum, Float) / IdeaTemplate.rating_count
+            )
+        )
+
+
+def backfill_search_index(engine: Engine) -> None:
+    """Build the full-text index once for databases that predate it."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        indexed = conn.execute(text("SELECT 1 FROM search_index LIMIT 1")).first()
+        has_rows = conn.execute(
+            text("SELECT 1 FROM ideas UNION ALL SELECT 1 FROM idea_templates LIMIT 1")
+        ).first()
+    if has_rows and not indexed:
+        rebuild_search_index(engine)
+
+
+def queue_attachment_backfill(engine: Engine) -> None:
+    """Queue the ``backfill_attachments`` job once for briefs that predate the catalogue.
+
+    It streams every brief, so it runs on the job workers rather than blocking startup.
+    """
+    with engine.begin() as conn:
+        if queue_backfill(conn):
+            logger.info("Queued the attachment catalogue backfill")
+
+
+def run_migrations(engine: Engine) -> None:
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    backfill_template_scores(engine)
+    backfill_search_index(engine)
+    queue_attachment_backfill(engine)
+
+
+def compact_version_snapshots(
+    engine: Engine,
+    interval: int = VERSION_KEYFRAME_INTERVAL,
+) -> dict[str, int]:
+    """Rewrite legacy plain-JSON version snapshots as keyframes/deltas, one idea per commit.
+
+    Legacy rows that newer deltas already point at stay keyframes so those deltas keep
+    decoding. Returns byte counts before/after for reporting.
+    """
+    stats = {"ideas": 0, "versions": 0, "bytes_before": 0, "bytes_after": 0}
+    with Session(engine) as db:
+        idea_ids = db.scalars(
+            select(IdeaBriefVersion.idea_id)
+            .where(IdeaBriefVersion.snapshot.like("{%"))
+            .distinct()
+        ).all()
+        for idea_id in idea_ids:
+            versions = db.scalars(
+                select(IdeaBriefVersion)
+                .where(IdeaBriefVersion.idea_id == idea_id)
+                .order_by(IdeaBriefVersion.id.asc())
+            ).all()
+            referenced = {v.base_version_id for v in versions if v.base_version_id is not None}
+            keyframe: tuple[int, str] | None = None
+            since = 0
+            for version in versions:
+                if brief_codec.is_legacy(version.snapshot):
+                    stats["versions"] += 1
+                    stats["bytes_before"] += len(version.snapshot)
+                    try:
+                        payload = json.loads(version.snapshot)
+                    except ValueError:
+                        logger.warning("Skipping unreadable snapshot %s", version.id)
+                        continue
+                    canonical = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+                    if version.id in referenced:
+                        snapshot, base_id = brief_codec.encode_keyframe(canonical), None
+                    else:
+                        snapshot, base_id = brief_codec.encode_snapshot(
+                            canonical, keyframe, since, interval
+                        )
+                    version.snapshot = snapshot
+                    version.base_version_id = base_id
+                    stats["bytes_after"] += len(snapshot)
+                if version.base_version_id is None:
+                    keyframe, since = (version.id, version.snapshot), 0
+                else:
+                    since += 1
+            db.commit()
+            stats["ideas"] += 1
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ContentHub database maintenance")
+    parser.add_argument(
+        "command",
+        choices=["upgrade", "compact-versions", "rebuild-search", "backfill-attachments"],
+    )
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
+    if args.command == "rebuild-search":
+        rebuild_search_index(database.engine)
+    if args.command == "backfill-attachments":
+        print(f"synced attachments from {backfill_attachments(database.engine)} briefs")
+    if args.command == "compact-versions":
+        stats = compact_version_snapshots(database.engine)
+        saved = stats["bytes_before"] - stats["bytes_after"]
+        print(
+            f"rewrote {stats['versions']} snapshots across {stats['ideas']} ideas: "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes ({saved} saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
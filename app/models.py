@@ -4,7 +4,21 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -17,6 +31,10 @@ def utc_now() -> datetime:
 
 class Idea(Base):
     __tablename__ = "ideas"
+    __table_args__ = (
+        # Matches the calendar ordering so range scans and keyset seeks skip the sort step.
+        Index("ix_ideas_target_date_created_at_id", "target_date", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -57,6 +75,8 @@ class IdeaBriefVersion(Base):
     id = Column(Integer, primary_key=True)
     idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False, index=True)
     snapshot = Column(Text, nullable=False)
+    # Keyframe a delta snapshot decodes against; NULL for keyframes (see app.lib.brief_codec).
+    base_version_id = Column(Integer, nullable=True, index=True)
     label = Column(String(120), nullable=True)
     created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
 
@@ -75,3 +95,175 @@ class IdeaTemplate(Base):
     favorite = Column(Boolean, default=False, nullable=False)
     rating_sum = Column(Integer, default=0, nullable=False)
     rating_count = Column(Integer, default=0, nullable=False)
+    # rating_sum / rating_count, maintained on every rating so ranking can use an index.
+    rating_score = Column(Float, default=0.0, server_default="0", nullable=False)
+
+
+Index(
+    "ix_idea_templates_ranking",
+    IdeaTemplate.favorite.desc(),
+    IdeaTemplate.rating_score.desc(),
+    IdeaTemplate.created_at,
+)
+
+
+class ArchiveDocument(Base):
+    """A creator asset (script, thread, transcript, ...) loaded by :mod:`app.ingest`."""
+
+    __tablename__ = "archive_documents"
+
+    id = Column(Integer, primary_key=True)
+    source_path = Column(String(1024), nullable=False, unique=True)
+    kind = Column(String(20), nullable=False, index=True)
+    title = Column(String(200), nullable=False)
+    body = Column(Text, nullable=False)
+    word_count = Column(Integer, nullable=False, default=0)
+    ingested_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+    chunks = relationship(
+        "ArchiveChunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        order_by="ArchiveChunk.ordinal",
+    )
+
+
+class ArchiveChunk(Base):
+    __tablename__ = "archive_chunks"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("archive_documents.id"), nullable=False, index=True)
+    ordinal = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    # float32 vector from the embedder named by IngestCheckpoint.embedder.
+    embedding = Column(LargeBinary, nullable=False)
+
+    document = relationship("ArchiveDocument", back_populates="chunks")
+
+
+class IngestCheckpoint(Base):
+    """One row per source file the ingestion pipeline has finished (or failed) on.
+
+    A rerun skips files whose ``fingerprint`` (size + mtime) is unchanged, so an
+    interrupted import resumes where its last committed batch ended.
+    """
+
+    __tablename__ = "ingest_checkpoints"
+
+    source_path = Column(String(1024), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    checksum = Column(String(64), nullable=True)
+    status = Column(String(10), nullable=False)  # "done" | "failed"
+    document_id = Column(Integer, nullable=True)
+    chunks = Column(Integer, nullable=False, default=0)
+    embedder = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now, nullable=False)
+
+
+class Job(Base):
+    """A unit of background work in the SQLite-backed queue (see :mod:`app.jobs`).
+
+    ``available_at`` is when a queued job may run (retry backoff) or, while leased, when
+    its lease expires and another worker may take it over.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    priority = Column(Integer, nullable=False, default=0)
+    status = Column(String(10), nullable=False, default="queued")  # queued|leased|done|failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    available_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+    lease_token = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# Dequeue order; partial so finished jobs never slow the scan down.
+Index(
+    "ix_jobs_dequeue",
+    Job.priority.desc(),
+    Job.available_at,
+    sqlite_where=Job.status.in_(("queued", "leased")),
+)
+
+
+class PatternCluster(Base):
+    """One mini-batch k-means centroid of the hook pattern model (see :mod:`app.patterns`)."""
+
+    __tablename__ = "pattern_clusters"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # float32 vector in the space of the embedder named by ``embedder``.
+    centroid = Column(LargeBinary, nullable=False)
+    # Rows the centroid has absorbed; its learning rate is 1 / seen.
+    seen = Column(Integer, nullable=False, default=0)
+    embedder = Column(String(64), nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+
+class PatternItem(Base):
+    """A hook (template body or brief heading/text block) and the cluster it was assigned to.
+
+    ``weight`` is copied from the source (template rating and favourite, idea completion)
+    and refreshed by the same incremental jobs, so recipes never join back to the sources.
+    """
+
+    __tablename__ = "pattern_items"
+    __table_args__ = (
+        Index("ux_pattern_items_source", "kind", "source_id", "block_id", unique=True),
+        # Covers the per-cluster totals and the heaviest-members-first scans of recipes.
+        Index("ix_pattern_items_cluster_weight", "cluster", "weight", "kind"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)  # "template" | "brief"
+    source_id = Column(Integer, nullable=False)
+    block_id = Column(String(64), nullable=False, default="")
+    cluster = Column(Integer, nullable=False)
+    weight = Column(Float, nullable=False, default=1.0)
+    # 64-bit digest of the embedded text; unchanged hooks are not re-embedded.
+    digest = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+
+class Attachment(Base):
+    """One ``AttachmentItem`` of a brief, mirrored out of the brief JSON by app.attachments.
+
+    Rows are rewritten per idea whenever its brief content changes; ``created_at`` is when
+    the key first appeared in that brief and survives the rewrites.
+    """
+
+    __tablename__ = "attachments"
+    __table_args__ = (
+        Index("ix_attachments_idea", "idea_id", "position"),
+        Index("ix_attachments_key", "key"),
+        # Covering for per-type and per-month storage totals.
+        Index("ix_attachments_content_type", "content_type", "size"),
+        Index("ix_attachments_created", "created_at", "size"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    item_id = Column(String(64), nullable=False)
+    key = Column(String(1024), nullable=False)
+    filename = Column(Text, nullable=False)
+    url = Column(Text, nullable=False)
+    content_type = Column(String(255), nullable=True)
+    size = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+
+# FTS5 index over idea titles/descriptions, brief text and templates (maintained by app.search).
+# rowid encodes the source: 2 * idea.id for ideas, 2 * template.id + 1 for templates.
+SEARCH_INDEX_DDL = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+event.listen(Base.metadata, "after_create", SEARCH_INDEX_DDL.execute_if(dialect="sqlite"))
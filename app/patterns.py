@@ -0,0 +1,503 @@
+"""Hook pattern mining: cluster template bodies and brief heading/text blocks into recipes.
+
+Every hook is embedded with the hashing embedder and assigned to one centroid of a
+mini-batch k-means model stored in ``pattern_clusters``; ``pattern_items`` remembers the
+assignment and a digest of the text. The model is fitted from scratch only once (or on
+an explicit rebuild). After that, brief and template writes queue a ``mine_patterns``
+job (from a session ``after_flush`` hook, inside the writer's transaction; later writes
+merge into it until it runs) and the job re-reads just those sources: unchanged hooks
+are skipped by digest, new or edited ones are embedded and fed through one
+:func:`app.rag.kmeans.minibatch_update` step, and hooks that disappeared are dropped.
+Core writes bypass the hook and call :func:`queue_mining` themselves.
+
+Recipes rank clusters by the summed weight of their hooks: a template counts
+``1 + RATING_WEIGHT * rating_score`` plus ``FAVORITE_WEIGHT`` if it is a favourite, a
+brief block ``1 + COMPLETED_WEIGHT`` once its idea is completed. Ratings, favourites and
+completion queue the same job, which only rewrites the stored weights.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import bindparam, delete, event, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import JOB_MAX_ATTEMPTS, PATTERN_BATCH, PATTERN_CLUSTERS, PATTERN_MINING
+from app.models import Idea, IdeaBrief, IdeaTemplate, Job, PatternCluster, PatternItem, utc_now
+from app.rag.embedders import Embedder, HashingEmbedder
+from app.rag.kmeans import assign, kmeans, minibatch_update
+from app.schemas import HookRecipe, RecipeExample
+from app.search import source_changes
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND = "mine_patterns"
+# Mining is analytics: queued behind imports and other user-facing work.
+JOB_PRIORITY = -1
+HOOK_BLOCKS = ("heading", "text")
+MIN_WORDS = 3
+MAX_TEXT = 500
+LOAD_BATCH = 500
+# Full fits: k-means++ and Lloyd's on a sample seed the centroids, then mini-batch epochs.
+INIT_SAMPLE = 4096
+EPOCHS = 2
+RATING_WEIGHT = 0.4
+FAVORITE_WEIGHT = 1.0
+COMPLETED_WEIGHT = 2.0
+# Top-weighted members per recipe that feed its label terms.
+TERM_SAMPLE = 50
+_TERM = re.compile(r"[a-z][a-z'-]{2,}")
+_STOPWORDS = frozenset(
+    "the and for that this with you your are was were have has had not but all can our out "
+    "its it's from they them their what when who how why will would about into just than "
+    "then there these those more most some any one get got use using via per".split()
+)
+
+Key = tuple[str, int, str]
+
+
+@dataclass(frozen=True)
+class Hook:
+    kind: str  # "template" | "brief"
+    source_id: int
+    block_id: str
+    text: str
+    weight: float = 1.0
+
+    @property
+    def key(self) -> Key:
+        return (self.kind, self.source_id, self.block_id)
+
+    @property
+    def digest(self) -> int:
+        raw = hashlib.blake2b(self.text.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(raw, "big", signed=True)
+
+
+@dataclass
+class MiningStats:
+    embedded: int = 0
+    reweighed: int = 0
+    removed: int = 0
+    rebuilt: bool = False
+    seconds: float = 0.0
+
+
+def _clip(raw: str) -> str:
+    return " ".join(raw.split())[:MAX_TEXT]
+
+
+def brief_hooks(idea_id: int, content: str | None, completed: bool = False) -> list[Hook]:
+    """Heading and text blocks of stored brief JSON with at least ``MIN_WORDS`` words."""
+    weight = 1 + COMPLETED_WEIGHT * bool(completed)
+    try:
+        data = json.loads(content or "{}")
+    except ValueError:
+        return []
+    hooks: dict[str, Hook] = {}
+    for position, block in enumerate(data.get("blocks") or ()):
+        words = (block.get("text") or "").split()
+        if block.get("type") in HOOK_BLOCKS and len(words) >= MIN_WORDS:
+            block_id = str(block.get("id") or position)[:64]
+            hook = Hook("brief", idea_id, block_id, _clip(" ".join(words)), weight)
+            hooks.setdefault(block_id, hook)
+    return list(hooks.values())
+
+
+def template_hook(
+    template_id: int, name: str, body: str, rating_score: float = 0.0, favorite: bool = False
+) -> Hook:
+    weight = 1 + RATING_WEIGHT * (rating_score or 0.0) + FAVORITE_WEIGHT * bool(favorite)
+    return Hook("template", template_id, "", _clip(f"{name}: {body}"), weight)
+
+
+def _batches(ids: list[int] | None) -> list[list[int] | None]:
+    if ids is None:
+        return [None]
+    return [ids[i : i + LOAD_BATCH] for i in range(0, len(ids), LOAD_BATCH)]
+
+
+def load_hooks(
+    conn: Connection, ideas: list[int] | None, templates: list[int] | None
+) -> Iterator[Hook]:
+    """Current hooks of the given sources (``None`` means every idea or template)."""
+    for batch in _batches(ideas):
+        query = select(IdeaBrief.idea_id, IdeaBrief.content, Idea.completed).join(
+            Idea, Idea.id == IdeaBrief.idea_id
+        )
+        if batch is not None:
+            query = query.where(IdeaBrief.idea_id.in_(batch))
+        for row in conn.execution_options(yield_per=LOAD_BATCH).execute(query):
+            yield from brief_hooks(row.idea_id, row.content, row.completed)
+    for batch in _batches(templates):
+        query = select(
+            IdeaTemplate.id,
+            IdeaTemplate.name,
+            IdeaTemplate.body,
+            IdeaTemplate.rating_score,
+            IdeaTemplate.favorite,
+        )
+        if batch is not None:
+            query = query.where(IdeaTemplate.id.in_(batch))
+        for row in conn.execute(query):
+            yield template_hook(row.id, row.name, row.body, row.rating_score, row.favorite)
+
+
+def _stored(
+    conn: Connection, ideas: list[int] | None, templates: list[int] | None
+) -> dict[Key, tuple[int, int, float]]:
+    """``{key: (item id, digest, weight)}`` of the items mined for the given sources."""
+    stored = {}
+    for kind, ids in (("brief", ideas), ("template", templates)):
+        for batch in _batches(ids):
+            query = select(
+                PatternItem.id,
+                PatternItem.source_id,
+                PatternItem.block_id,
+                PatternItem.digest,
+                PatternItem.weight,
+            ).where(PatternItem.kind == kind)
+            if batch is not None:
+                query = query.where(PatternItem.source_id.in_(batch))
+            for row in conn.execute(query):
+                stored[(kind, row.source_id, row.block_id)] = (row.id, row.digest, row.weight)
+    return stored
+
+
+_REWEIGH = (
+    update(PatternItem)
+    .where(PatternItem.id == bindparam("item_id"))
+    .values(weight=bindparam("new_weight"))
+)
+
+
+def _lock(conn: Connection) -> None:
+    # Take SQLite's write lock before reading the model, so two workers mining at once
+    # apply their updates one after the other instead of overwriting each other.
+    conn.execute(update(PatternCluster).values(updated_at=utc_now()))
+
+
+def _load_model(conn: Connection, signature: str) -> tuple[np.ndarray, np.ndarray] | None:
+    rows = conn.execute(
+        select(PatternCluster.centroid, PatternCluster.seen, PatternCluster.embedder).order_by(
+            PatternCluster.id
+        )
+    ).all()
+    if not rows or any(row.embedder != signature for row in rows):
+        return None
+    centroids = np.stack([np.frombuffer(row.centroid, dtype=np.float32) for row in rows])
+    return centroids.copy(), np.array([row.seen for row in rows], dtype=np.int64)
+
+
+def _save_model(conn: Connection, centroids: np.ndarray, seen: np.ndarray, signature: str) -> None:
+    now = utc_now()
+    conn.execute(delete(PatternCluster))
+    conn.execute(
+        insert(PatternCluster),
+        [
+            {
+                "id": cluster,
+                "centroid": centroid.astype(np.float32).tobytes(),
+                "seen": int(count),
+                "embedder": signature,
+                "updated_at": now,
+            }
+            for cluster, (centroid, count) in enumerate(zip(centroids, seen, strict=True))
+        ],
+    )
+
+
+def _insert_items(conn: Connection, hooks: list[Hook], labels: Iterable[int]) -> None:
+    if hooks:
+        conn.execute(
+            insert(PatternItem),
+            [
+                {
+                    "kind": hook.kind,
+                    "source_id": hook.source_id,
+                    "block_id": hook.block_id,
+                    "cluster": int(label),
+                    "weight": hook.weight,
+                    "digest": hook.digest,
+                    "text": hook.text,
+                }
+                for hook, label in zip(hooks, labels, strict=True)
+            ],
+        )
+
+
+def _sync(
+    conn: Connection,
+    model: tuple[np.ndarray, np.ndarray],
+    hooks: Iterable[Hook],
+    stored: dict[Key, tuple[int, int, float]],
+    embedder: Embedder,
+    batch_size: int,
+    stats: MiningStats,
+) -> None:
+    """Bring ``pattern_items`` for some sources up to date, learning from changed hooks."""
+    fresh, dropped, reweighed = [], [], []
+    for hook in hooks:
+        known = stored.pop(hook.key, None)
+        if known is None or known[1] != hook.digest:
+            fresh.append(hook)
+            if known is not None:
+                dropped.append(known[0])
+        elif known[2] != hook.weight:
+            reweighed.append({"item_id": known[0], "new_weight": hook.weight})
+    stats.removed += len(stored)
+    dropped += [item_id for item_id, _, _ in stored.values()]
+    if reweighed:
+        conn.execute(_REWEIGH, reweighed)
+        stats.reweighed += len(reweighed)
+    for start in range(0, len(dropped), LOAD_BATCH):
+        conn.execute(
+            delete(PatternItem).where(PatternItem.id.in_(dropped[start : start + LOAD_BATCH]))
+        )
+    centroids, seen = model
+    for start in range(0, len(fresh), batch_size):
+        batch = fresh[start : start + batch_size]
+        vectors = embedder.embed([hook.text for hook in batch])
+        _insert_items(conn, batch, minibatch_update(centroids, seen, vectors))
+    stats.embedded += len(fresh)
+
+
+def fit(
+    vectors: np.ndarray, clusters: int, batch_size: int, *, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mini-batch k-means from scratch; returns ``(centroids, seen, labels)``."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), INIT_SAMPLE), replace=False)]
+    centroids = kmeans(sample, clusters, seed=seed, plus_plus=True)
+    seen = np.bincount(assign(sample, centroids), minlength=clusters).astype(np.int64)
+    for _ in range(EPOCHS):
+        order = rng.permutation(len(vectors))
+        for start in range(0, len(order), batch_size):
+            minibatch_update(centroids, seen, vectors[np.sort(order[start : start + batch_size])])
+    return centroids, seen, assign(vectors, centroids)
+
+
+def _embed_all(hooks: list[Hook], embedder: Embedder, batch_size: int) -> np.ndarray:
+    vectors = np.empty((len(hooks), embedder.dim), dtype=np.float32)
+    for start in range(0, len(hooks), batch_size):
+        batch = hooks[start : start + batch_size]
+        vectors[start : start + len(batch)] = embedder.embed([hook.text for hook in batch])
+    return vectors
+
+
+def _rebuild(
+    engine: Engine, embedder: Embedder, clusters: int, batch_size: int, stats: MiningStats
+) -> None:
+    # Embed and fit from a snapshot without holding the write lock; the short write
+    # transaction then reconciles whatever changed in the meantime like a normal update.
+    with engine.connect() as conn:
+        hooks = list(load_hooks(conn, None, None))
+    vectors = _embed_all(hooks, embedder, batch_size)
+    if len(hooks):
+        centroids, seen, labels = fit(vectors, clusters, batch_size)
+    else:
+        centroids = np.zeros((clusters, embedder.dim), dtype=np.float32)
+        seen, labels = np.zeros(clusters, dtype=np.int64), np.empty(0, dtype=np.int32)
+    with engine.begin() as conn:
+        _lock(conn)
+        conn.execute(delete(PatternItem))
+        _insert_items(conn, hooks, labels)
+        stored = _stored(conn, None, None)
+        _sync(
+            conn,
+            (centroids, seen),
+            load_hooks(conn, None, None),
+            stored,
+            embedder,
+            batch_size,
+            stats,
+        )
+        _save_model(conn, centroids, seen, embedder.signature)
+    stats.embedded += len(hooks)
+    stats.rebuilt = True
+
+
+_embedder: HashingEmbedder | None = None
+
+
+def update_patterns(
+    engine: Engine | None = None,
+    ideas: Iterable[int] = (),
+    templates: Iterable[int] = (),
+    *,
+    rebuild: bool = False,
+    embedder: Embedder | None = None,
+    clusters: int = PATTERN_CLUSTERS,
+    batch_size: int = PATTERN_BATCH,
+) -> MiningStats:
+    """Re-mine the hooks of ``ideas`` and ``templates`` (or everything on a rebuild).
+
+    Without a stored model (first run, or the embedder changed) this fits one from scratch.
+    """
+    global _embedder
+    if embedder is None:
+        _embedder = _embedder or HashingEmbedder()
+        embedder = _embedder
+    engine = engine or database.engine
+    stats = MiningStats()
+    started = time.perf_counter()
+    if not rebuild:
+        idea_ids, template_ids = sorted(set(ideas)), sorted(set(templates))
+        with engine.begin() as conn:
+            _lock(conn)
+            model = _load_model(conn, embedder.signature)
+            if model is not None:
+                stored = _stored(conn, idea_ids, template_ids)
+                hooks = load_hooks(conn, idea_ids, template_ids)
+                _sync(conn, model, hooks, stored, embedder, batch_size, stats)
+                _save_model(conn, *model, embedder.signature)
+        rebuild = model is None
+    if rebuild:
+        _rebuild(engine, embedder, clusters, batch_size, stats)
+    stats.seconds = time.perf_counter() - started
+    if stats.rebuilt:
+        logger.info("Pattern model rebuilt from %d hooks in %.1fs", stats.embedded, stats.seconds)
+    return stats
+
+
+def queue_mining(
+    conn: Connection, ideas: Iterable[int] = (), templates: Iterable[int] = ()
+) -> None:
+    """Add these sources to a ``mine_patterns`` job in ``conn``'s transaction.
+
+    Sources merge into a job that is still waiting for its first run (a waiting rebuild
+    covers them outright), so a stream of autosaves keeps one job pending instead of
+    adding one per flush. Jobs being retried after a failure are left alone.
+    """
+    ideas, templates = set(ideas), set(templates)
+    if not PATTERN_MINING or not (ideas or templates):
+        return
+    waiting = conn.execute(
+        select(Job.id, Job.payload)
+        .where(Job.kind == JOB_KIND, Job.status == "queued", Job.attempts == 0)
+        .order_by(Job.id)
+    ).all()
+    payloads = {row.id: json.loads(row.payload) for row in waiting}
+    if any(payload.get("rebuild") for payload in payloads.values()):
+        return
+    for job_id, payload in payloads.items():
+        merged = _mining_payload(
+            ideas | set(payload.get("ideas", ())), templates | set(payload.get("templates", ()))
+        )
+        # The status check loses to a worker that leased the job since the select.
+        if conn.execute(
+            update(Job).where(Job.id == job_id, Job.status == "queued").values(payload=merged)
+        ).rowcount:
+            return
+    conn.execute(
+        insert(Job),
+        {
+            "kind": JOB_KIND,
+            "payload": _mining_payload(ideas, templates),
+            "priority": JOB_PRIORITY,
+            "max_attempts": JOB_MAX_ATTEMPTS,
+            "available_at": utc_now(),
+        },
+    )
+
+
+def _mining_payload(ideas: set[int], templates: set[int]) -> str:
+    payload = {"ideas": sorted(ideas), "templates": sorted(templates)}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+@event.listens_for(Session, "after_flush")
+def _queue_changes(session: Session, flush_context) -> None:
+    if not PATTERN_MINING:
+        return
+    # Brief content and completion feed an idea's hooks; a new idea has none until its
+    # brief is saved. Any template edit may be a text or favourite change.
+    changes = source_changes(session, ("completed",))
+    briefs = {obj.idea_id for obj in (*session.new, *session.dirty) if isinstance(obj, IdeaBrief)}
+    new_ideas = {obj.id for obj in session.new if isinstance(obj, Idea)} - briefs
+    templates = {obj.id for obj in session.dirty if isinstance(obj, IdeaTemplate)}
+    queue_mining(
+        session.connection(),
+        (changes.ideas - new_ideas) | changes.dropped_ideas,
+        changes.templates | changes.dropped_templates | templates,
+    )
+
+
+_CLUSTERS = text(
+    "SELECT cluster, COUNT(*) AS size, SUM(kind = 'template') AS templates, "
+    "SUM(weight) AS weight FROM pattern_items GROUP BY cluster HAVING COUNT(*) >= :min_size "
+    "ORDER BY weight DESC, cluster LIMIT :limit"
+)
+_MEMBERS = text(
+    "SELECT kind, source_id, block_id, text, weight FROM pattern_items "
+    "WHERE cluster = :cluster ORDER BY weight DESC LIMIT :sample"
+)
+
+
+def _terms(texts: list[str]) -> set[str]:
+    return {term for term in _TERM.findall(" ".join(texts).lower()) if term not in _STOPWORDS}
+
+
+def recipes(
+    db: Session, *, limit: int = 10, examples: int = 3, min_size: int = 2
+) -> list[HookRecipe]:
+    """The heaviest clusters as recipes: label terms, counts, weight and top examples.
+
+    Terms are the words most specific to a recipe's top ``TERM_SAMPLE`` members
+    (document frequency in the recipe times inverse frequency across all recipes shown).
+    """
+    rows = db.execute(_CLUSTERS, {"limit": limit, "min_size": min_size}).all()
+    if not rows:
+        return []
+    sample = max(TERM_SAMPLE, examples)
+    members = {
+        row.cluster: db.execute(_MEMBERS, {"cluster": row.cluster, "sample": sample}).all()
+        for row in rows
+    }
+    documents = {
+        cluster: [_terms([member.text]) for member in group] for cluster, group in members.items()
+    }
+    overall = Counter(term for docs in documents.values() for doc in docs for term in doc)
+    total = sum(len(docs) for docs in documents.values())
+    result = []
+    for row in rows:
+        local = Counter(term for doc in documents[row.cluster] for term in doc)
+        ranked = sorted(
+            local, key=lambda term: (-local[term] * math.log(1 + total / overall[term]), term)
+        )
+        terms = ranked[:5]
+        result.append(
+            HookRecipe(
+                id=row.cluster,
+                label=" / ".join(terms[:3]) or f"Recipe {row.cluster}",
+                terms=terms,
+                size=row.size,
+                templates=row.templates,
+                briefs=row.size - row.templates,
+                weight=round(row.weight, 3),
+                mean_weight=round(row.weight / row.size, 3),
+                examples=[
+                    RecipeExample(
+                        kind=member.kind,
+                        source_id=member.source_id,
+                        block_id=member.block_id or None,
+                        text=member.text,
+                        weight=round(member.weight, 3),
+                    )
+                    for member in members[row.cluster][:examples]
+                ],
+            )
+        )
+    return result
@@ -0,0 +1,16 @@
+"""Local retrieval layer: chunking, embeddings and hybrid BM25 + dense ranking."""
+
+from app.rag.embedders import Embedder, HashingEmbedder
+from app.rag.index import RetrievalIndex, retrieval_index
+from app.rag.retriever import Chunk, HybridRetriever, RetrievalFilter, RetrievalHit
+
+__all__ = [
+    "Chunk",
+    "Embedder",
+    "HashingEmbedder",
+    "HybridRetriever",
+    "RetrievalFilter",
+    "RetrievalHit",
+    "RetrievalIndex",
+    "retrieval_index",
+]
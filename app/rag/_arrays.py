@@ -0,0 +1,15 @@
+"""Append-friendly NumPy buffers shared by the retriever's indexes."""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def grow(array: np.ndarray, size: int, fill: object = 0) -> np.ndarray:
+    """Return ``array`` (or a copy with doubled capacity) holding at least ``size`` rows."""
+    if len(array) >= size:
+        return array
+    capacity = max(size, 2 * len(array), 1024)
+    grown = np.full((capacity, *array.shape[1:]), fill, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
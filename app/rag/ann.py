@@ -0,0 +1,452 @@
+"""Memory-mapped IVF-PQ approximate nearest-neighbour index for chunk embeddings.
+
+The index lives in a directory next to the SQLite file (``contenthub.ann/``):
+
+* ``meta.json`` -- shape, row counts, the embedder signature and the file generation.
+  It is replaced atomically after every change and is the commit point: rows past
+  ``count`` in the data files are leftovers of an interrupted write and are truncated
+  when the index is opened.
+* ``{vectors,codes,lists,keys,hashes,alive}-<generation>.bin`` -- one fixed-size record
+  per row, appended in place and memory-mapped.
+* ``{centroids,codebooks,offsets}-<generation>.bin`` -- the trained quantisers and the
+  CSR offsets of the base region.
+
+Rows ``[0, base)`` were written by the last compaction sorted by inverted list, so
+probing a list reads one contiguous slice. Rows appended since form the tail: they are
+assigned to their nearest centroid and PQ-encoded on insert, and probes pick them up with
+a vectorised ``isin`` over the tail's list ids. Deletes only clear ``alive``.
+:meth:`IVFPQIndex.compact` writes a new generation (dropping dead rows, retraining the
+quantisers once the index has grown 4x) and swaps ``meta.json``. Opening an index only
+maps files, so a restart neither re-embeds nor retrains.
+
+A query ranks the ``nprobe`` closest lists, scores their rows by asymmetric distance on
+residual PQ codes (for inner product the lookup table does not depend on the list), and
+re-ranks the best ``rerank`` candidates with the exact float32 vectors.
+
+Only one process writes: the first to take ``lock`` (``flock``) owns the index, others
+open it read-only. Callers serialise access (see :class:`app.rag.index.RetrievalIndex`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from app.config import ANN_MIN_ROWS, ANN_NPROBE
+from app.rag.kmeans import assign, kmeans
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms run single-process
+    fcntl = None
+
+FORMAT_VERSION = 1
+CODEBOOK_SIZE = 256
+TRAIN_SAMPLE = 32_768
+_WRITE_CHUNK = 65_536
+_ROW_COLUMNS = ("vectors", "codes", "lists", "keys", "hashes", "alive")
+_DTYPES = {
+    "vectors": np.float32,
+    "codes": np.uint8,
+    "lists": np.int32,
+    "keys": np.int64,
+    "hashes": np.int64,
+    "alive": np.uint8,
+    "centroids": np.float32,
+    "codebooks": np.float32,
+    "offsets": np.int64,
+}
+
+
+def text_hash(text: str) -> int:
+    """Stable signed 64-bit fingerprint of a chunk's text."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class IVFPQIndex:
+    def __init__(
+        self,
+        path: str | Path,
+        dim: int,
+        *,
+        m: int = 32,
+        signature: str = "",
+        nprobe: int = ANN_NPROBE,
+        rerank: int = 256,
+        min_rows: int = ANN_MIN_ROWS,
+    ) -> None:
+        if dim % m:
+            raise ValueError("dim must be a multiple of the number of PQ subspaces")
+        self.path = Path(path)
+        self.dim = dim
+        self.m = m
+        self.signature = signature
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.min_rows = min_rows
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Held open (and flock'ed) until close().
+        self._lock_file = open(self.path / "lock", "a+b")
+        self.writable = self._try_lock()
+        self._rows_by_key: dict[int, int] | None = None
+        self._load_meta()
+        self._map()
+
+    # -- files -------------------------------------------------------------------------
+
+    def _try_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def close(self) -> None:
+        self._lock_file.close()
+
+    def _file(self, column: str, generation: int | None = None) -> Path:
+        generation = self._meta["generation"] if generation is None else generation
+        return self.path / f"{column}-{generation}.bin"
+
+    def _width(self, column: str) -> int:
+        return {"vectors": self.dim, "codes": self.m}.get(column, 1)
+
+    def _row_bytes(self, column: str) -> int:
+        return self._width(column) * np.dtype(_DTYPES[column]).itemsize
+
+    def _fresh_meta(self, generation: int = 0) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "dim": self.dim,
+            "m": self.m,
+            "signature": self.signature,
+            "generation": generation,
+            "count": 0,
+            "live": 0,
+            "base": 0,
+            "nlist": 0,
+            "trained_rows": 0,
+        }
+
+    def _load_meta(self) -> None:
+        try:
+            meta = json.loads((self.path / "meta.json").read_text())
+        except (OSError, ValueError):
+            meta = None
+        compatible = meta is not None and all(
+            meta.get(key) == value
+            for key, value in (
+                ("version", FORMAT_VERSION),
+                ("dim", self.dim),
+                ("m", self.m),
+                ("signature", self.signature),
+            )
+        )
+        if not compatible:
+            meta = self._fresh_meta((meta or {}).get("generation", 0) + 1)
+        self._meta = meta
+        if self.writable:
+            if not compatible:
+                self._write_meta()
+            self._recover()
+
+    def _recover(self) -> None:
+        """Drop stale generations and truncate rows an interrupted append left behind."""
+        current = {self._file(column).name for column in _DTYPES}
+        for stray in self.path.glob("*-*.bin"):
+            if stray.name not in current:
+                stray.unlink()
+        count = self._meta["count"]
+        sizes = {}
+        for column in _ROW_COLUMNS:
+            path = self._file(column)
+            sizes[column] = path.stat().st_size if path.exists() else 0
+            if sizes[column] < count * self._row_bytes(column):
+                # Files lost or damaged outside our control: the index is only a cache.
+                self._meta = self._fresh_meta(self._meta["generation"] + 1)
+                self._write_meta()
+                return self._recover()
+        for column in _ROW_COLUMNS:
+            expected = count * self._row_bytes(column)
+            if sizes[column] > expected or not self._file(column).exists():
+                with open(self._file(column), "ab") as handle:
+                    handle.truncate(expected)
+
+    def _write_meta(self) -> None:
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(self._meta))
+        os.replace(tmp, self.path / "meta.json")
+
+    def _map(self) -> None:
+        count = self._meta["count"]
+        self._columns: dict[str, np.ndarray] = {}
+        for column in _ROW_COLUMNS:
+            width = self._width(column)
+            shape = (count, width) if width > 1 else (count,)
+            if count == 0:
+                self._columns[column] = np.zeros(shape, dtype=_DTYPES[column])
+                continue
+            mode = "r+" if column == "alive" and self.writable else "r"
+            self._columns[column] = np.memmap(
+                self._file(column), dtype=_DTYPES[column], mode=mode, shape=shape
+            )
+        nlist = self._meta["nlist"]
+        if nlist:
+            dsub = self.dim // self.m
+            self._centroids = np.fromfile(self._file("centroids"), dtype=np.float32).reshape(
+                nlist, self.dim
+            )
+            self._codebooks = np.fromfile(self._file("codebooks"), dtype=np.float32).reshape(
+                self.m, CODEBOOK_SIZE, dsub
+            )
+            self._offsets = np.fromfile(self._file("offsets"), dtype=np.int64)
+
+    def _append(self, rows: dict[str, np.ndarray]) -> None:
+        for column in _ROW_COLUMNS:
+            with open(self._file(column), "ab") as handle:
+                handle.write(np.ascontiguousarray(rows[column], dtype=_DTYPES[column]).tobytes())
+        self._meta["count"] += len(rows["keys"])
+
+    def _commit(self) -> None:
+        alive = self._columns["alive"]
+        if isinstance(alive, np.memmap):
+            alive.flush()
+        self._write_meta()
+        self._map()
+
+    # -- state -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._meta["live"]
+
+    @property
+    def trained(self) -> bool:
+        return self._meta["nlist"] > 0
+
+    @property
+    def stats(self) -> dict:
+        return {key: self._meta[key] for key in ("count", "live", "base", "nlist", "trained_rows")}
+
+    def _key_rows(self) -> dict[int, int]:
+        if self._rows_by_key is None:
+            rows = np.flatnonzero(self._columns["alive"])
+            keys = self._columns["keys"][rows]
+            self._rows_by_key = dict(zip(keys.tolist(), rows.tolist(), strict=True))
+        return self._rows_by_key
+
+    def needs_compaction(self) -> bool:
+        meta = self._meta
+        if meta["live"] >= self.min_rows and (
+            not meta["nlist"] or meta["live"] >= 4 * meta["trained_rows"]
+        ):
+            return True
+        return meta["count"] - meta["live"] > max(1024, meta["count"] // 5)
+
+    # -- writes ------------------------------------------------------------------------
+
+    def lookup(self, keys: np.ndarray, hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Stored vectors for ``keys`` whose text hash still matches: ``(found, vectors)``."""
+        rows_by_key = self._key_rows()
+        rows = np.fromiter((rows_by_key.get(key, -1) for key in keys.tolist()), dtype=np.int64)
+        found = rows >= 0
+        found[found] = self._columns["hashes"][rows[found]] == hashes[found]
+        return found, np.asarray(self._columns["vectors"][rows[found]])
+
+    def _tombstone(self, rows: list[int]) -> None:
+        if rows:
+            self._columns["alive"][sorted(rows)] = 0
+            self._meta["live"] -= len(rows)
+
+    def upsert(self, keys: np.ndarray, hashes: np.ndarray, vectors: np.ndarray) -> int:
+        """Insert or replace rows; a key whose hash is unchanged is left alone."""
+        if not self.writable or not len(keys):
+            return 0
+        found, _ = self.lookup(keys, hashes)
+        fresh = np.flatnonzero(~found)
+        if not len(fresh):
+            return 0
+        rows_by_key = self._key_rows()
+        replaced = [rows_by_key.pop(key) for key in keys[fresh].tolist() if key in rows_by_key]
+        self._tombstone(replaced)
+        vectors = np.asarray(vectors[fresh], dtype=np.float32)
+        lists, codes = self._encode(vectors)
+        start = self._meta["count"]
+        self._append(
+            {
+                "vectors": vectors,
+                "codes": codes,
+                "lists": lists,
+                "keys": keys[fresh],
+                "hashes": hashes[fresh],
+                "alive": np.ones(len(fresh), dtype=np.uint8),
+            }
+        )
+        rows_by_key.update(zip(keys[fresh].tolist(), range(start, start + len(fresh)), strict=True))
+        self._meta["live"] += len(fresh)
+        self._commit()
+        return len(fresh)
+
+    def remove(self, keys: Iterable[int]) -> int:
+        if not self.writable:
+            return 0
+        rows_by_key = self._key_rows()
+        rows = [rows_by_key.pop(key) for key in keys if key in rows_by_key]
+        if rows:
+            self._tombstone(rows)
+            self._commit()
+        return len(rows)
+
+    def retain(self, keys: np.ndarray) -> int:
+        """Remove every live row whose key is not in ``keys``."""
+        rows_by_key = self._key_rows()
+        live = np.fromiter(rows_by_key, dtype=np.int64, count=len(rows_by_key))
+        return self.remove(live[~np.isin(live, keys)].tolist())
+
+    # -- quantisers --------------------------------------------------------------------
+
+    def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if not self.trained:
+            return (
+                np.full(len(vectors), -1, dtype=np.int32),
+                np.zeros((len(vectors), self.m), dtype=np.uint8),
+            )
+        lists = assign(vectors, self._centroids)
+        return lists, self._pq_encode(vectors - self._centroids[lists], self._codebooks)
+
+    def _pq_encode(self, residuals: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+        dsub = self.dim // self.m
+        codes = np.empty((len(residuals), self.m), dtype=np.uint8)
+        for sub in range(self.m):
+            part = residuals[:, sub * dsub : (sub + 1) * dsub]
+            codes[:, sub] = assign(part, codebooks[sub])
+        return codes
+
+    def _train(self, rows: np.ndarray, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(rows, size=min(len(rows), TRAIN_SAMPLE), replace=False))
+        data = np.asarray(self._columns["vectors"][sample])
+        nlist = 2 ** max(4, round(math.log2(math.sqrt(len(rows)))))
+        centroids = kmeans(data, nlist, iterations=8, seed=seed)
+        residuals = data - centroids[assign(data, centroids)]
+        dsub = self.dim // self.m
+        codebooks = np.stack(
+            [
+                kmeans(residuals[:, sub * dsub : (sub + 1) * dsub], CODEBOOK_SIZE, seed=seed)
+                for sub in range(self.m)
+            ]
+        )
+        return centroids, codebooks
+
+    def compact(self) -> None:
+        """Rewrite live rows sorted by list as a new generation, retraining if due."""
+        if not self.writable:
+            return
+        meta = self._meta
+        rows = np.flatnonzero(self._columns["alive"])
+        live = len(rows)
+        retrain = live >= self.min_rows and (not meta["nlist"] or live >= 4 * meta["trained_rows"])
+        if retrain:
+            self._centroids, self._codebooks = self._train(rows)
+            lists = np.empty(live, dtype=np.int32)
+            codes = np.empty((live, self.m), dtype=np.uint8)
+            for start in range(0, live, _WRITE_CHUNK):
+                chunk = np.asarray(self._columns["vectors"][rows[start : start + _WRITE_CHUNK]])
+                lists[start : start + len(chunk)] = assign(chunk, self._centroids)
+                residuals = chunk - self._centroids[lists[start : start + len(chunk)]]
+                codes[start : start + len(chunk)] = self._pq_encode(residuals, self._codebooks)
+        else:
+            lists = np.asarray(self._columns["lists"][rows])
+            codes = np.asarray(self._columns["codes"][rows])
+        order = np.argsort(lists, kind="stable")
+        rows, lists, codes = rows[order], lists[order], codes[order]
+
+        generation = meta["generation"] + 1
+        for column in _ROW_COLUMNS:
+            with open(self._file(column, generation), "wb") as handle:
+                for start in range(0, live, _WRITE_CHUNK):
+                    chunk_rows = rows[start : start + _WRITE_CHUNK]
+                    if column == "lists":
+                        values = lists[start : start + _WRITE_CHUNK]
+                    elif column == "codes":
+                        values = codes[start : start + _WRITE_CHUNK]
+                    elif column == "alive":
+                        values = np.ones(len(chunk_rows), dtype=np.uint8)
+                    else:
+                        values = self._columns[column][chunk_rows]
+                    handle.write(np.ascontiguousarray(values, dtype=_DTYPES[column]).tobytes())
+        nlist = len(self._centroids) if (retrain or meta["nlist"]) else 0
+        if nlist:
+            offsets = np.zeros(nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(lists, minlength=nlist), out=offsets[1:])
+            self._centroids.astype(np.float32).tofile(self._file("centroids", generation))
+            self._codebooks.astype(np.float32).tofile(self._file("codebooks", generation))
+            offsets.tofile(self._file("offsets", generation))
+        self._meta = {
+            **meta,
+            "generation": generation,
+            "count": live,
+            "live": live,
+            "base": live if nlist else 0,
+            "nlist": nlist,
+            "trained_rows": live if retrain else meta["trained_rows"],
+        }
+        self._rows_by_key = None
+        self._write_meta()
+        self._recover()
+        self._map()
+
+    # -- reads -------------------------------------------------------------------------
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Keys and inner-product scores of (approximately) the ``k`` nearest live rows."""
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        if not self._meta["live"] or k <= 0:
+            return empty
+        query = np.asarray(query, dtype=np.float32)
+        alive = self._columns["alive"]
+        if not self.trained:
+            rows = np.flatnonzero(alive)
+        else:
+            rows = self._shortlist(query, alive)
+        if not len(rows):
+            return empty
+        scores = np.asarray(self._columns["vectors"][rows]) @ query
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return np.asarray(self._columns["keys"][rows[order]]), scores[order]
+
+    def _shortlist(self, query: np.ndarray, alive: np.ndarray) -> np.ndarray:
+        """Probe the closest lists, rank by PQ distance and keep ``rerank`` rows."""
+        nlist, base, count = self._meta["nlist"], self._meta["base"], self._meta["count"]
+        coarse = self._centroids @ query
+        nprobe = min(self.nprobe, nlist)
+        probes = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        starts, ends = self._offsets[probes], self._offsets[probes + 1]
+        base_rows = np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts, ends, strict=True)]
+        )
+        tail_lists = self._columns["lists"][base:count]
+        rows = np.concatenate([base_rows, np.flatnonzero(np.isin(tail_lists, probes)) + base])
+        rows = rows[alive[rows].astype(bool)]
+        if len(rows) <= self.rerank:
+            return rows
+        dsub = self.dim // self.m
+        table = np.einsum("sd,scd->sc", query.reshape(self.m, dsub), self._codebooks)
+        codes = np.asarray(self._columns["codes"][rows])
+        approx = coarse[self._columns["lists"][rows]]
+        # One gather per subspace beats a single 2-D take_along_axis by about 2x.
+        for sub in range(self.m):
+            approx += table[sub].take(codes[:, sub])
+        best = np.argpartition(-approx, self.rerank - 1)[: self.rerank]
+        return np.sort(rows[best])
@@ -0,0 +1,197 @@
+"""Incremental BM25 inverted index with vectorised scoring.
+
+Documents are added in batches; each batch becomes an immutable segment holding its
+postings twice: document-major (to undo document frequencies on removal) and term-major
+(CSR offsets per term id, for scoring). Collection statistics -- document frequencies,
+live document count and total length -- are kept globally, so scores are identical no
+matter how documents are spread over segments. A new segment is folded into its
+neighbour while the two are of similar size (and the count is capped at
+``max_segments``), which keeps single-brief updates cheap without letting the per-query
+segment loop grow.
+
+Rows are the caller's: the retriever hands out consecutive row numbers and the index
+only trusts them to grow. Removed rows keep their postings (the caller masks them) until
+:meth:`BM25Index.compact` drops them and renumbers the survivors.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.rag._arrays import grow
+
+_COUNT_MAX = np.iinfo(np.uint16).max
+
+
+@dataclass
+class _Segment:
+    # Document-major postings, sorted by (row, term).
+    rows: np.ndarray
+    terms: np.ndarray
+    counts: np.ndarray
+    # Term-major view: postings of term t are post_rows/post_counts[term_ptr[t]:term_ptr[t + 1]].
+    term_ptr: np.ndarray
+    post_rows: np.ndarray
+    post_counts: np.ndarray
+
+    @classmethod
+    def build(cls, rows: np.ndarray, terms: np.ndarray, counts: np.ndarray) -> _Segment:
+        order = np.argsort(terms, kind="stable")
+        vocab = int(terms.max()) + 1 if len(terms) else 0
+        term_ptr = np.zeros(vocab + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=vocab), out=term_ptr[1:])
+        return cls(rows, terms, counts, term_ptr, rows[order], counts[order])
+
+    def postings(self, term: int) -> tuple[np.ndarray, np.ndarray] | None:
+        if term + 1 >= len(self.term_ptr):
+            return None
+        start, end = self.term_ptr[term], self.term_ptr[term + 1]
+        if start == end:
+            return None
+        return self.post_rows[start:end], self.post_counts[start:end]
+
+
+class BM25Index:
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75, max_segments: int = 8) -> None:
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self._vocab: dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._segments: list[_Segment] = []
+        self._rows = 0
+        self._live = 0
+        self._total_len = 0.0
+
+    @property
+    def live_documents(self) -> int:
+        return self._live
+
+    def _term_ids(self, tokens: Iterable[str]) -> list[int]:
+        vocab = self._vocab
+        return [vocab.setdefault(token, len(vocab)) for token in tokens]
+
+    def add(self, documents: Sequence[Sequence[str]], first_row: int) -> None:
+        """Index tokenised ``documents`` as rows ``first_row, first_row + 1, ...``."""
+        if first_row < self._rows:
+            raise ValueError("BM25 rows must be appended in increasing order")
+        if not documents:
+            return
+        lengths = np.fromiter((len(doc) for doc in documents), dtype=np.int64, count=len(documents))
+        ids = np.fromiter(
+            (term for doc in documents for term in self._term_ids(doc)),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        local = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+        vocab = max(len(self._vocab), 1)
+        # One sort groups (row, term) pairs for the whole batch: no per-document Counter.
+        keys, counts = np.unique(local * vocab + ids, return_counts=True)
+        rows = (keys // vocab + first_row).astype(np.int32)
+        terms = (keys % vocab).astype(np.int32)
+
+        self._df = grow(self._df, vocab)
+        self._df += np.bincount(terms, minlength=len(self._df))
+        end = first_row + len(documents)
+        self._doc_len = grow(self._doc_len, end)
+        self._doc_len[first_row:end] = lengths
+        self._rows = end
+        self._live += len(documents)
+        self._total_len += float(lengths.sum())
+        self._segments.append(
+            _Segment.build(rows, terms, np.minimum(counts, _COUNT_MAX).astype(np.uint16))
+        )
+        self._merge_tail()
+
+    def _merge_tail(self) -> None:
+        """Fold the newest segment into its neighbour while they are of similar size.
+
+        Like a binary counter, each posting is re-sorted O(log n) times over its lifetime;
+        the segment cap only kicks in for long runs of equally small batches.
+        """
+        segments = self._segments
+        while len(segments) > 1 and (
+            len(segments) > self.max_segments
+            or 2 * len(segments[-1].rows) >= len(segments[-2].rows)
+        ):
+            older, newer = segments[-2], segments[-1]
+            segments[-2:] = [
+                _Segment.build(
+                    np.concatenate([older.rows, newer.rows]),
+                    np.concatenate([older.terms, newer.terms]),
+                    np.concatenate([older.counts, newer.counts]),
+                )
+            ]
+
+    def remove(self, rows: Iterable[int]) -> None:
+        """Drop ``rows`` from the collection statistics; their postings linger until compact.
+
+        Each row may be removed once; the retriever's source map guarantees that.
+        """
+        doomed = np.unique(np.fromiter(rows, dtype=np.int32))
+        if not len(doomed):
+            return
+        slices = []
+        for segment in self._segments:
+            # Document-major postings are sorted by row: each doomed row is one slice.
+            starts = np.searchsorted(segment.rows, doomed, side="left")
+            ends = np.searchsorted(segment.rows, doomed, side="right")
+            present = starts < ends
+            slices += [
+                segment.terms[start:end]
+                for start, end in zip(starts[present], ends[present], strict=True)
+            ]
+        if slices:
+            np.subtract.at(self._df, np.concatenate(slices), 1)
+        self._live -= len(doomed)
+        self._total_len -= float(self._doc_len[doomed].sum())
+        self._doc_len[doomed] = 0
+
+    def compact(self, keep: np.ndarray) -> None:
+        """Keep only rows where ``keep`` is True and renumber them ``0..keep.sum() - 1``."""
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+        parts = []
+        for segment in self._segments:
+            alive = keep[segment.rows]
+            parts.append((remap[segment.rows[alive]], segment.terms[alive], segment.counts[alive]))
+        self._segments = []
+        if parts:
+            rows, terms, counts = (np.concatenate(column) for column in zip(*parts, strict=True))
+            if len(rows):
+                self._segments = [_Segment.build(rows.astype(np.int32), terms, counts)]
+        kept = int(keep.sum())
+        doc_len = np.zeros(max(kept, 1024), dtype=np.float32)
+        doc_len[:kept] = self._doc_len[: len(keep)][keep]
+        self._doc_len = doc_len
+        self._rows = kept
+
+    def scores(self, tokens: Iterable[str], size: int) -> np.ndarray:
+        """BM25 score of every row below ``size`` for the query ``tokens`` (0 = no match)."""
+        out = np.zeros(size, dtype=np.float32)
+        if not self._live:
+            return out
+        terms = {self._vocab[token] for token in tokens if token in self._vocab}
+        avgdl = self._total_len / self._live
+        k1, b = self.k1, self.b
+        for term in terms:
+            df = int(self._df[term])
+            if df <= 0:
+                continue
+            idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+            for segment in self._segments:
+                postings = segment.postings(term)
+                if postings is None:
+                    continue
+                rows, counts = postings
+                if rows[-1] >= size:
+                    keep = rows < size
+                    rows, counts = rows[keep], counts[keep]
+                tf = counts.astype(np.float32)
+                norm = k1 * (1 - b + b * self._doc_len[rows] / avgdl)
+                out[rows] += idf * tf * (k1 + 1) / (tf + norm)
+        return out
@@ -0,0 +1,104 @@
+"""Split ideas (title, description, brief) and templates into retrievable chunks.
+
+A brief is walked in reading order -- description, blocks, shot cues, CTAs, hashtags,
+thumbnail notes -- and packed into chunks of at most ``max_words`` words. A heading block
+always starts a new chunk so sections stay together, and every chunk is prefixed with the
+idea title so a chunk deep inside a long brief still matches on what the idea is about.
+Templates are short and become a single chunk. Archive documents (see :mod:`app.ingest`)
+are packed paragraph by paragraph, with Markdown headings starting new chunks.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from datetime import date
+
+from app.config import RAG_CHUNK_WORDS
+from app.rag.retriever import Chunk
+
+
+def _brief_units(description: str | None, content: str | None) -> Iterator[tuple[str, bool]]:
+    """Yield ``(text, starts_section)`` pairs in reading order."""
+    if description:
+        yield description, False
+    if not content:
+        return
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return
+    for block in data.get("blocks") or ():
+        if block.get("text"):
+            yield block["text"], block.get("type") == "heading"
+    cues = [shot.get("cue") for shot in data.get("shots") or () if shot.get("cue")]
+    if cues:
+        yield "Shots: " + "; ".join(cues), True
+    ctas = [cta.get("text") for cta in data.get("ctas") or () if cta.get("text")]
+    if ctas:
+        yield "CTA: " + "; ".join(ctas), False
+    if data.get("hashtags"):
+        yield " ".join(data["hashtags"]), False
+    if data.get("thumbnail_notes"):
+        yield "Thumbnail: " + data["thumbnail_notes"], False
+
+
+def _pack(units: Iterator[tuple[str, bool]], max_words: int) -> list[str]:
+    bodies: list[str] = []
+    current: list[str] = []
+    words = 0
+    for text, starts_section in units:
+        size = len(text.split())
+        if current and (starts_section or words + size > max_words):
+            bodies.append("\n".join(current))
+            current, words = [], 0
+        if size > max_words:
+            tokens = text.split()
+            for offset in range(0, len(tokens) - max_words, max_words):
+                bodies.append(" ".join(tokens[offset : offset + max_words]))
+            text = " ".join(tokens[(len(tokens) - 1) // max_words * max_words :])
+            size = len(text.split())
+        current.append(text)
+        words += size
+    if current:
+        bodies.append("\n".join(current))
+    return bodies
+
+
+def chunk_idea(
+    idea_id: int,
+    title: str,
+    description: str | None,
+    content: str | None,
+    *,
+    target_date: date | None,
+    completed: bool,
+    max_words: int = RAG_CHUNK_WORDS,
+) -> list[Chunk]:
+    """Chunks for one idea from its row values and stored brief JSON."""
+    bodies = _pack(_brief_units(description, content), max_words) or [""]
+    return [
+        Chunk(
+            kind="idea",
+            source_id=idea_id,
+            text=f"{title}\n{body}" if body else title,
+            target_date=target_date,
+            completed=completed,
+        )
+        for body in bodies
+    ]
+
+
+def chunk_template(template_id: int, name: str, body: str, category: str | None) -> list[Chunk]:
+    text = f"{name}\n{body}"
+    return [Chunk(kind="template", source_id=template_id, text=text, category=category)]
+
+
+def chunk_document(title: str, text: str, max_words: int = RAG_CHUNK_WORDS) -> list[str]:
+    """Chunk texts for a normalised archive document (paragraphs separated by blank lines)."""
+    units = (
+        (paragraph, paragraph.startswith("#"))
+        for paragraph in text.split("\n\n")
+        if paragraph.strip()
+    )
+    return [f"{title}\n{body}" for body in _pack(units, max_words)] or [title]
@@ -0,0 +1,82 @@
+"""Text embedders for the hybrid retriever.
+
+Any object with a ``dim`` and an ``embed(texts)`` returning L2-normalised float32 rows can
+back :class:`app.rag.retriever.HybridRetriever`, so a hosted embedding model plugs in the
+same way. :class:`HashingEmbedder` is the offline default: signed feature hashing of word
+unigrams and bigrams. It needs no model download and is deterministic across processes
+and machines (blake2b, not ``hash()``), so vectors can be persisted and compared later.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Sequence
+from typing import Protocol
+
+import numpy as np
+
+from app.config import RAG_EMBED_DIM
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Feature -> signed slot memo; bounded so an endless stream of novel tokens cannot grow it.
+_MAX_CACHED_FEATURES = 1 << 20
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; shared by the embedder and the BM25 index."""
+    return _TOKEN.findall(text.lower())
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length in place (all-zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class Embedder(Protocol):
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dim)`` float32 array of unit-length rows."""
+        ...
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = RAG_EMBED_DIM, *, bigrams: bool = True) -> None:
+        self.dim = dim
+        self.bigrams = bigrams
+        self._slots: dict[str, int] = {}
+
+    @property
+    def signature(self) -> str:
+        """Identifies the vector space; stored vectors from another signature are discarded."""
+        return f"hashing-v1:{self.dim}:{int(self.bigrams)}"
+
+    def _slot(self, feature: str) -> int:
+        """Signed, 1-based column for ``feature``: the sign halves collision bias."""
+        slot = self._slots.get(feature)
+        if slot is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            slot = (value % self.dim + 1) * (1 if value >> 63 else -1)
+            if len(self._slots) < _MAX_CACHED_FEATURES:
+                self._slots[feature] = slot
+        return slot
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows: list[int] = []
+        slots: list[int] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens
+            if self.bigrams:
+                features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:], strict=False)]
+            slots.extend(map(self._slot, features))
+            rows.extend([row] * len(features))
+        signed = np.asarray(slots, dtype=np.int64)
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.abs(signed) - 1
+        counts = np.bincount(flat, weights=np.sign(signed), minlength=len(texts) * self.dim)
+        matrix = counts.reshape(len(texts), self.dim).astype(np.float32)
+        return normalize_rows(matrix)
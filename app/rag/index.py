@@ -0,0 +1,202 @@
+"""Process-wide retrieval index over the database's ideas, briefs and templates.
+
+:class:`RetrievalIndex` builds a :class:`HybridRetriever` from the database on first use
+and afterwards only re-chunks sources that changed. Changes are picked up the same way
+as the FTS index (:func:`app.search.source_changes` in an ``after_flush`` hook) but are
+applied lazily: ids are collected per session and handed over on ``after_commit`` (and
+dropped on rollback), and the next query re-reads just those rows. The same commit drops
+cached generation answers that cited those sources. Core bulk inserts bypass the flush
+hook and call :func:`note_changes` themselves.
+
+For a file-backed SQLite database the embeddings are also persisted in an
+:class:`app.rag.ann.IVFPQIndex` next to the database file (``contenthub.ann/``). A
+rebuild after a restart then only re-embeds chunks whose text changed while the process
+was down, and the ANN index is compacted (and trained once it reaches
+``ANN_MIN_ROWS``) after the build or a refresh leaves it due.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import ANN_INDEX
+from app.models import Idea, IdeaBrief, IdeaTemplate
+from app.rag.ann import IVFPQIndex
+from app.rag.chunking import chunk_idea, chunk_template
+from app.rag.embedders import Embedder, HashingEmbedder
+from app.rag.response_cache import response_cache
+from app.rag.retriever import Chunk, HybridRetriever, Mode, RetrievalFilter, RetrievalHit
+from app.search import source_changes
+
+LOAD_BATCH = 500
+# Idea columns that end up in chunk text or filter metadata.
+_IDEA_FIELDS = ("title", "description", "target_date", "completed")
+_PENDING_KEY = "rag_pending"
+
+
+def _idea_chunks(conn: Connection, idea_ids: list[int] | None) -> Iterator[Chunk]:
+    query = select(
+        Idea.id,
+        Idea.title,
+        Idea.description,
+        Idea.target_date,
+        Idea.completed,
+        IdeaBrief.content,
+    ).outerjoin(IdeaBrief, IdeaBrief.idea_id == Idea.id)
+    batches = (
+        [None]
+        if idea_ids is None
+        else [idea_ids[i : i + LOAD_BATCH] for i in range(0, len(idea_ids), LOAD_BATCH)]
+    )
+    for batch in batches:
+        statement = query if batch is None else query.where(Idea.id.in_(batch))
+        result = conn.execution_options(yield_per=LOAD_BATCH).execute(statement)
+        for row in result:
+            yield from chunk_idea(
+                row.id,
+                row.title,
+                row.description,
+                row.content,
+                target_date=row.target_date,
+                completed=row.completed,
+            )
+
+
+def _template_chunks(conn: Connection, template_ids: list[int] | None) -> Iterator[Chunk]:
+    query = select(IdeaTemplate.id, IdeaTemplate.name, IdeaTemplate.body, IdeaTemplate.category)
+    if template_ids is not None:
+        query = query.where(IdeaTemplate.id.in_(template_ids))
+    for row in conn.execute(query):
+        yield from chunk_template(row.id, row.name, row.body, row.category)
+
+
+def ann_path(url: str) -> Path | None:
+    """Directory of the ANN index for a database URL; ``None`` unless a SQLite file."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return Path(parsed.database).with_suffix(".ann")
+
+
+class RetrievalIndex:
+    def __init__(
+        self,
+        embedder_factory: Callable[[], Embedder] | None = None,
+        *,
+        ann_enabled: bool = ANN_INDEX,
+    ) -> None:
+        self._embedder_factory = embedder_factory
+        self.ann_enabled = ann_enabled
+        self._ann: IVFPQIndex | None = None
+        self._retriever: HybridRetriever | None = None
+        self._stale_ideas: set[int] = set()
+        self._stale_templates: set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._retriever is not None
+
+    def invalidate(self) -> None:
+        """Forget everything; the next query rebuilds from the database."""
+        with self._lock:
+            self._retriever = None
+            if self._ann is not None:
+                self._ann.close()
+                self._ann = None
+            self._stale_ideas.clear()
+            self._stale_templates.clear()
+
+    def mark_stale(self, ideas: Iterable[int] = (), templates: Iterable[int] = ()) -> None:
+        with self._lock:
+            if self._retriever is None:
+                return
+            self._stale_ideas.update(ideas)
+            self._stale_templates.update(templates)
+
+    def _refresh(self, conn: Connection) -> HybridRetriever:
+        if self._retriever is None:
+            embedder = self._embedder_factory() if self._embedder_factory else HashingEmbedder()
+            self._ann = self._open_ann(embedder)
+            retriever = HybridRetriever(embedder, ann=self._ann)
+            retriever.add(list(_idea_chunks(conn, None)))
+            retriever.add(list(_template_chunks(conn, None)))
+            if self._ann is not None:
+                # Drop rows of sources deleted while the process was down.
+                self._ann.retain(retriever.keys)
+            self._retriever = retriever
+            self._stale_ideas.clear()
+            self._stale_templates.clear()
+        if self._stale_ideas:
+            ids = sorted(self._stale_ideas)
+            self._retriever.replace("idea", ids, list(_idea_chunks(conn, ids)))
+            self._stale_ideas.clear()
+        if self._stale_templates:
+            ids = sorted(self._stale_templates)
+            self._retriever.replace("template", ids, list(_template_chunks(conn, ids)))
+            self._stale_templates.clear()
+        if self._ann is not None and self._ann.needs_compaction():
+            self._ann.compact()
+        return self._retriever
+
+    def _open_ann(self, embedder: Embedder) -> IVFPQIndex | None:
+        path = ann_path(database.database_url) if self.ann_enabled else None
+        if path is None:
+            return None
+        signature = getattr(embedder, "signature", type(embedder).__name__)
+        return IVFPQIndex(path, embedder.dim, signature=signature)
+
+    def search(
+        self,
+        conn: Connection,
+        query: str,
+        k: int = 10,
+        *,
+        where: RetrievalFilter | None = None,
+        mode: Mode = "hybrid",
+    ) -> list[RetrievalHit]:
+        with self._lock:
+            return self._refresh(conn).search(query, k, where=where, mode=mode)
+
+
+retrieval_index = RetrievalIndex()
+
+
+def note_changes(
+    session: Session, ideas: Iterable[int] = (), templates: Iterable[int] = ()
+) -> None:
+    """Queue sources for re-chunking once ``session`` commits."""
+    pending = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    pending[0].update(ideas)
+    pending[1].update(templates)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    changes = source_changes(session, _IDEA_FIELDS)
+    if changes:
+        note_changes(
+            session,
+            changes.ideas | changes.dropped_ideas,
+            changes.templates | changes.dropped_templates,
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is not None:
+        retrieval_index.mark_stale(*pending)
+        response_cache.invalidate_sources(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
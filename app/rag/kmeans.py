@@ -0,0 +1,98 @@
+"""Vectorised k-means: Lloyd's algorithm for the ANN index's coarse centroids and PQ
+codebooks, and a mini-batch variant that hook pattern mining updates incrementally."""
+
+from __future__ import annotations
+
+import numpy as np
+
+_ASSIGN_CHUNK = 8192
+
+
+def assign(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid (Euclidean) for every row of ``data``."""
+    # argmin |x - c|^2 == argmax x.c - |c|^2 / 2; chunked to bound the distance matrix.
+    half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), _ASSIGN_CHUNK):
+        block = np.asarray(data[start : start + _ASSIGN_CHUNK], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return labels
+
+
+def _cluster_sums(data: np.ndarray, labels: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Per-cluster sums of ``data`` rows (zero rows for empty clusters)."""
+    sums = np.zeros((len(counts), data.shape[1]), dtype=np.float32)
+    filled = np.flatnonzero(counts)
+    if len(filled):
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums[filled] = np.add.reduceat(data[order], starts, axis=0)
+    return sums
+
+
+def _plus_plus(data: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: each next centroid is a row drawn with probability ~ distance^2."""
+    centroids = np.empty((k, data.shape[1]), dtype=np.float32)
+    centroids[0] = data[rng.integers(len(data))]
+    distances = np.einsum("ij,ij->i", data - centroids[0], data - centroids[0])
+    for n in range(1, k):
+        total = distances.sum()
+        pick = rng.choice(len(data), p=distances / total) if total > 0 else rng.integers(len(data))
+        centroids[n] = data[pick]
+        np.minimum(
+            distances, np.einsum("ij,ij->i", data - data[pick], data - data[pick]), out=distances
+        )
+    return centroids
+
+
+def kmeans(
+    data: np.ndarray,
+    k: int,
+    *,
+    iterations: int = 10,
+    seed: int = 0,
+    plus_plus: bool = False,
+) -> np.ndarray:
+    """Lloyd's k-means; returns ``(k, dim)`` centroids.
+
+    Starts from random rows, or from k-means++ seeding with ``plus_plus`` (slower to seed,
+    but far less likely to split one tight group while merging two others). Empty clusters
+    are re-seeded from random rows, so every centroid stays in use.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    if len(data) <= k:
+        centroids = np.zeros((k, data.shape[1]), dtype=np.float32)
+        centroids[: len(data)] = data
+        return centroids
+    if plus_plus:
+        centroids = _plus_plus(data, k, rng)
+    else:
+        centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(data, centroids)
+        counts = np.bincount(labels, minlength=k)
+        filled = np.flatnonzero(counts)
+        centroids[filled] = _cluster_sums(data, labels, counts)[filled] / counts[filled, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+    return centroids
+
+
+def minibatch_update(centroids: np.ndarray, seen: np.ndarray, batch: np.ndarray) -> np.ndarray:
+    """One mini-batch k-means step (Sculley, 2010) in place; returns the batch's labels.
+
+    Each centroid moves towards the mean of the rows assigned to it with a per-centroid
+    learning rate of ``1 / seen``, so the result equals feeding the rows one at a time
+    with the centroids held fixed for the batch. ``seen`` counts every row a centroid has
+    absorbed, which makes established clusters stable while fresh ones still move.
+    """
+    batch = np.asarray(batch, dtype=np.float32)
+    labels = assign(batch, centroids)
+    counts = np.bincount(labels, minlength=len(centroids))
+    filled = np.flatnonzero(counts)
+    seen[filled] += counts[filled]
+    sums = _cluster_sums(batch, labels, counts)[filled]
+    centroids[filled] += (sums - counts[filled, None] * centroids[filled]) / seen[filled, None]
+    return labels
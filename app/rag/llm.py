@@ -0,0 +1,115 @@
+"""LLM clients for the generation endpoints.
+
+Anything with a ``name`` and a ``complete(prompt)`` returning the model's text can back
+:mod:`app.generation`; backends register a factory in :data:`llm_backends` and
+``CONTENTHUB_LLM`` picks one. Clients may also define ``async acomplete(prompt)`` for the
+streaming endpoints; :func:`acomplete` falls back to running ``complete`` on a worker
+thread for clients that do not. The only built-in backend is :class:`StubLLM`, a
+deterministic local model: it echoes the task's numbered-list format with lines built
+from the prompt's own words, so tests and benchmarks run offline and repeat exactly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+from app.config import LLM_BACKEND, LLM_STUB_LATENCY
+from app.rag.embedders import tokenize
+
+
+class LLMClient(Protocol):
+    name: str
+
+    def complete(self, prompt: str) -> str:
+        """Return the model's completion for ``prompt``."""
+        ...
+
+
+_COUNT = re.compile(r"exactly (\d+)")
+_SECTION = re.compile(r"^(Task|Context):\s*(.*)$", re.MULTILINE)
+_OPENERS = (
+    "Nobody tells you this about",
+    "I tried",
+    "Stop scrolling if you care about",
+    "The 3-step way to fix",
+    "What I wish I knew about",
+    "Here is the honest truth about",
+    "Steal my system for",
+    "You are doing",
+)
+_CLOSERS = (
+    "in 30 days",
+    "before finals",
+    "as a student founder",
+    "without burning out",
+    "(with receipts)",
+    "and it changed everything",
+    "the hard way",
+    "for under $20",
+)
+
+
+class StubLLM:
+    """Deterministic offline model; ``latency`` seconds of simulated generation time."""
+
+    name = "stub"
+
+    def __init__(self, latency: float = LLM_STUB_LATENCY) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    def complete(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._generate(prompt)
+
+    async def acomplete(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._generate(prompt)
+
+    def _generate(self, prompt: str) -> str:
+        rng = random.Random(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest())
+        sections = dict(_SECTION.findall(prompt))
+        topic = " ".join(tokenize(sections.get("Task", ""))[-4:]) or "your next video"
+        context = [word for word in tokenize(sections.get("Context", "")) if len(word) > 3]
+        match = _COUNT.search(prompt)
+        count = int(match.group(1)) if match else 1
+        lines = []
+        for number in range(1, count + 1):
+            detail = f" ({rng.choice(context)})" if context else ""
+            lines.append(f"{number}. {rng.choice(_OPENERS)} {topic} {rng.choice(_CLOSERS)}{detail}")
+        return "\n".join(lines)
+
+
+async def acomplete(client: LLMClient, prompt: str) -> str:
+    """``client.acomplete(prompt)`` when the client is async, else ``complete`` on a thread.
+
+    A threaded call cannot be interrupted: cancelling the awaiting task abandons it.
+    """
+    native = getattr(client, "acomplete", None)
+    if native is not None:
+        return await native(prompt)
+    return await asyncio.to_thread(client.complete, prompt)
+
+
+llm_backends: dict[str, Callable[[], LLMClient]] = {"stub": StubLLM}
+
+
+def get_llm(backend: str = LLM_BACKEND) -> LLMClient:
+    """Build the configured client; unknown backend names are a configuration error."""
+    try:
+        factory = llm_backends[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown LLM backend {backend!r}; known: {sorted(llm_backends)}"
+        ) from None
+    return factory()
@@ -0,0 +1,255 @@
+"""Semantic cache of LLM responses for repeated generation intents.
+
+An entry is keyed by the task (e.g. ``"hooks:5"``), the normalised intent and a
+fingerprint of the retrieved context (source, position and text digest of every chunk
+that went into the prompt). Lookups first try the exact key; failing that, they compare
+the intent's embedding with the other entries cached for the same task and context and
+accept the closest one above ``similarity``, so "study hooks for exam season" and
+"exam season study hooks" share an answer as long as retrieval picked the same context.
+Normalisation alone already folds case, punctuation, number words and filler ("please
+give me five study hooks" is "5 study hooks").
+
+Because the fingerprint covers chunk text, an edited brief can never serve a stale
+answer. Entries are also dropped eagerly when a source they cite changes (see
+:func:`app.rag.index._apply_changes`), so memory is not spent on dead answers. Eviction
+is LRU under both an entry cap and a byte cap, and entries expire after ``ttl`` seconds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.config import (
+    RESPONSE_CACHE_BYTES,
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL,
+)
+from app.rag.embedders import Embedder, HashingEmbedder
+from app.rag.retriever import RetrievalHit
+
+_WORD = re.compile(r"\w+")
+# Request phrasing that does not change what is being asked for.
+_FILLER = frozenset(
+    "a an the me us my our i we you please can could would will some give write generate "
+    "make create show list need want like just for about on of to with".split()
+)
+_NUMBERS = {
+    word: str(value)
+    for value, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve".split()
+    )
+}
+# Rough per-entry bookkeeping (key tuple, dataclass, dict slots) on top of the payload.
+_ENTRY_OVERHEAD = 256
+
+Key = tuple[str, str, str]
+Source = tuple[str, int]
+
+
+def normalize_intent(intent: str) -> str:
+    """Case-, width- and punctuation-insensitive form of a prompt without filler words.
+
+    "Could you give me five study hooks?" becomes "5 study hooks".
+    """
+    words = _WORD.findall(unicodedata.normalize("NFKC", intent).casefold())
+    return " ".join(_NUMBERS.get(word, word) for word in words if word not in _FILLER)
+
+
+def context_fingerprint(hits: Sequence[RetrievalHit]) -> str:
+    """Digest of the retrieved chunks, in prompt order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for hit in hits:
+        digest.update(f"{hit.kind}:{hit.source_id}:{len(hit.text)}\0".encode())
+        digest.update(hit.text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    intent: str
+    response: str
+    sources: frozenset[Source]
+    vector: np.ndarray
+    # Generation time of the original call: what every hit on this entry saves.
+    cost_seconds: float
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int = RESPONSE_CACHE_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+        embedder: Embedder | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity = similarity
+        # Unigrams only: near-duplicates are mostly the same words in another order.
+        self.embedder = embedder or HashingEmbedder(bigrams=False)
+        self.clock = clock
+        self._entries: OrderedDict[Key, CachedResponse] = OrderedDict()
+        # (task, fingerprint) -> keys of the entries that share that context.
+        self._buckets: dict[tuple[str, str], set[Key]] = {}
+        self._by_source: dict[Source, set[Key]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    def _embed(self, intent: str) -> np.ndarray:
+        return self.embedder.embed([intent])[0]
+
+    def lookup(self, task: str, intent: str, fingerprint: str) -> CachedResponse | None:
+        """The cached answer for this task/intent/context, or a near-duplicate's."""
+        intent = normalize_intent(intent)
+        key = (task, intent, fingerprint)
+        with self._lock:
+            entry = self._live(key)
+            near = False
+            if entry is None:
+                candidates = [
+                    candidate
+                    for candidate in list(self._buckets.get((task, fingerprint), ()))
+                    if self._live(candidate) is not None
+                ]
+                if candidates:
+                    vector = self._embed(intent)
+                    matrix = np.stack([self._entries[candidate].vector for candidate in candidates])
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        key, entry, near = candidates[best], self._entries[candidates[best]], True
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.near_hits += near
+            self.saved_seconds += entry.cost_seconds
+            return entry
+
+    def store(
+        self,
+        task: str,
+        intent: str,
+        fingerprint: str,
+        response: str,
+        *,
+        sources: Iterable[Source] = (),
+        cost_seconds: float = 0.0,
+    ) -> bool:
+        """Cache ``response``; returns False when it is larger than the whole byte cap."""
+        intent = normalize_intent(intent)
+        vector = self._embed(intent)
+        size = _ENTRY_OVERHEAD + len(response.encode("utf-8")) + len(intent) + vector.nbytes
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return False
+        key = (task, intent, fingerprint)
+        entry = CachedResponse(
+            intent=intent,
+            response=response,
+            sources=frozenset(sources),
+            vector=vector,
+            cost_seconds=cost_seconds,
+            expires_at=self.clock() + self.ttl,
+            size=size,
+        )
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._bytes += size
+            self._buckets.setdefault((task, fingerprint), set()).add(key)
+            for source in entry.sources:
+                self._by_source.setdefault(source, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _live(self, key: Key) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self.clock():
+            self._discard(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _discard(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        bucket = (key[0], key[2])
+        self._buckets[bucket].discard(key)
+        if not self._buckets[bucket]:
+            del self._buckets[bucket]
+        for source in entry.sources:
+            keys = self._by_source[source]
+            keys.discard(key)
+            if not keys:
+                del self._by_source[source]
+
+    def invalidate_sources(self, ideas: Iterable[int] = (), templates: Iterable[int] = ()) -> int:
+        """Drop every entry whose context cited one of these ideas or templates."""
+        sources = [("idea", idea_id) for idea_id in ideas]
+        sources += [("template", template_id) for template_id in templates]
+        with self._lock:
+            keys = {key for source in sources for key in self._by_source.get(source, ())}
+            for key in keys:
+                self._discard(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._by_source.clear()
+            self._bytes = 0
+            self._reset_counters()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,356 @@
+"""In-process hybrid retriever: BM25 + dense similarity over NumPy arrays.
+
+Every chunk is a row. Its metadata lives in parallel NumPy columns (kind, source id,
+target date as an ordinal, completion, template category code), so a
+:class:`RetrievalFilter` becomes one vectorised boolean mask *before* anything is
+scored. Both rankers then work on whole arrays: BM25 accumulates postings into a score
+vector (:mod:`app.rag.bm25`), the dense side is one matrix-vector product over the
+unit-length embedding matrix (or over just the candidate rows when the filter is
+selective). The two top lists are fused with reciprocal rank fusion, which needs no
+score calibration between the rankers.
+
+Rows of a replaced or deleted source are only masked out; once a quarter of the rows
+are dead the arrays are compacted in one pass.
+
+With an :class:`app.rag.ann.IVFPQIndex` attached, every chunk is also stored there under
+a stable key (kind, source id, position) with a hash of its text. Rebuilding the
+retriever then reuses stored vectors instead of re-embedding unchanged chunks, and broad
+dense queries probe the ANN index instead of scanning the whole matrix; selective
+filters keep the exact subset product, which is cheaper than oversampling the ANN.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Literal
+
+import numpy as np
+
+from app.rag._arrays import grow
+from app.rag.ann import IVFPQIndex, text_hash
+from app.rag.bm25 import BM25Index
+from app.rag.embedders import Embedder, HashingEmbedder, tokenize
+
+Kind = Literal["idea", "template"]
+Mode = Literal["hybrid", "bm25", "dense"]
+
+_KINDS: dict[str, int] = {"idea": 0, "template": 1}
+_KIND_NAMES = {code: name for name, code in _KINDS.items()}
+_EMBED_BATCH = 2048
+# Below this share of live rows the dense side scores only the filtered rows.
+_SUBSET_FRACTION = 0.25
+_POSITION_BITS = 13
+
+
+def chunk_key(kind: str, source_id: int, position: int) -> int:
+    """Stable id of a source's ``position``-th chunk, shared with the ANN index."""
+    return ((source_id << _POSITION_BITS | position) << 1) | _KINDS[kind]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A retrievable slice of an idea's brief or of a template, plus filterable metadata."""
+
+    kind: Kind
+    source_id: int
+    text: str
+    target_date: date | None = None
+    completed: bool | None = None
+    category: str | None = None
+
+
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """Metadata pre-filter. Every field that is set must match.
+
+    Date and completion filters therefore keep only idea chunks and a category filter
+    only template chunks; leave them unset to search across both kinds.
+    """
+
+    kinds: frozenset[str] | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    completed: bool | None = None
+    categories: frozenset[str] | None = None
+
+
+@dataclass(frozen=True)
+class RetrievalHit:
+    row: int
+    kind: Kind
+    source_id: int
+    text: str
+    score: float
+    bm25_rank: int | None
+    dense_rank: int | None
+
+
+class HybridRetriever:
+    def __init__(
+        self,
+        embedder: Embedder | None = None,
+        *,
+        candidates: int = 100,
+        rrf_k: int = 60,
+        bm25_weight: float = 1.0,
+        dense_weight: float = 1.0,
+        min_similarity: float = 0.0,
+        ann: IVFPQIndex | None = None,
+    ) -> None:
+        self.embedder = embedder or HashingEmbedder()
+        self.ann = ann
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.bm25_weight = bm25_weight
+        self.dense_weight = dense_weight
+        self.min_similarity = min_similarity
+        self._bm25 = BM25Index()
+        self._size = 0
+        self._live = 0
+        self._texts: list[str] = []
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._kind = np.zeros(0, dtype=np.int8)
+        self._source = np.zeros(0, dtype=np.int64)
+        self._day = np.zeros(0, dtype=np.int32)  # date.toordinal(); 0 = no date
+        self._completed = np.zeros(0, dtype=np.int8)  # -1 = not applicable
+        self._category = np.zeros(0, dtype=np.int32)  # -1 = none
+        self._key = np.zeros(0, dtype=np.int64)
+        self._categories: dict[str, int] = {}
+        self._rows_by_source: dict[tuple[str, int], list[int]] = {}
+        self._row_by_key: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, chunks: Sequence[Chunk]) -> None:
+        for offset in range(0, len(chunks), _EMBED_BATCH):
+            self._add_batch(chunks[offset : offset + _EMBED_BATCH])
+
+    def _add_batch(self, chunks: Sequence[Chunk]) -> None:
+        if not chunks:
+            return
+        start, end = self._size, self._size + len(chunks)
+        positions: dict[tuple[str, int], int] = {}
+        keys = np.empty(len(chunks), dtype=np.int64)
+        for index, chunk in enumerate(chunks):
+            source = (chunk.kind, chunk.source_id)
+            position = positions.get(source, len(self._rows_by_source.get(source, ())))
+            positions[source] = position + 1
+            keys[index] = chunk_key(chunk.kind, chunk.source_id, position)
+        vectors = self._embed(chunks, keys)
+        self._bm25.add([tokenize(chunk.text) for chunk in chunks], first_row=start)
+        self._vectors = grow(self._vectors, end)
+        self._vectors[start:end] = vectors
+        self._alive = grow(self._alive, end)
+        self._alive[start:end] = True
+        self._kind = grow(self._kind, end)
+        self._kind[start:end] = [_KINDS[chunk.kind] for chunk in chunks]
+        self._source = grow(self._source, end)
+        self._source[start:end] = [chunk.source_id for chunk in chunks]
+        self._day = grow(self._day, end)
+        self._day[start:end] = [
+            chunk.target_date.toordinal() if chunk.target_date else 0 for chunk in chunks
+        ]
+        self._completed = grow(self._completed, end)
+        self._completed[start:end] = [
+            -1 if chunk.completed is None else int(chunk.completed) for chunk in chunks
+        ]
+        self._category = grow(self._category, end)
+        self._category[start:end] = [self._category_code(chunk.category) for chunk in chunks]
+        self._key = grow(self._key, end)
+        self._key[start:end] = keys
+        self._texts.extend(chunk.text for chunk in chunks)
+        for row, chunk in enumerate(chunks, start):
+            self._rows_by_source.setdefault((chunk.kind, chunk.source_id), []).append(row)
+        self._row_by_key.update(zip(keys.tolist(), range(start, end), strict=True))
+        self._size = end
+        self._live += len(chunks)
+
+    def _embed(self, chunks: Sequence[Chunk], keys: np.ndarray) -> np.ndarray:
+        """Embed ``chunks``, reusing vectors the ANN index holds for unchanged text."""
+        if self.ann is None:
+            return self.embedder.embed([chunk.text for chunk in chunks])
+        hashes = np.fromiter((text_hash(chunk.text) for chunk in chunks), dtype=np.int64)
+        found, stored = self.ann.lookup(keys, hashes)
+        vectors = np.empty((len(chunks), self.embedder.dim), dtype=np.float32)
+        vectors[found] = stored
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            vectors[missing] = self.embedder.embed([chunks[i].text for i in missing])
+            self.ann.upsert(keys[missing], hashes[missing], vectors[missing])
+        return vectors
+
+    def _category_code(self, category: str | None) -> int:
+        if category is None:
+            return -1
+        return self._categories.setdefault(category.strip().lower(), len(self._categories))
+
+    def _drop(self, kind: Kind, source_ids: Iterable[int]) -> list[int]:
+        """Mask out every chunk of the given sources; returns their keys."""
+        rows = [
+            row
+            for source_id in source_ids
+            for row in self._rows_by_source.pop((kind, source_id), ())
+        ]
+        if not rows:
+            return []
+        keys = self._key[rows].tolist()
+        for key in keys:
+            del self._row_by_key[key]
+        self._alive[rows] = False
+        self._bm25.remove(rows)
+        self._live -= len(rows)
+        if self._size - self._live > max(1024, self._size // 4):
+            self.compact()
+        return keys
+
+    def remove(self, kind: Kind, source_ids: Iterable[int]) -> int:
+        """Drop every chunk of the given sources; returns the number of rows removed."""
+        keys = self._drop(kind, source_ids)
+        if self.ann is not None:
+            self.ann.remove(keys)
+        return len(keys)
+
+    def replace(self, kind: Kind, source_ids: Iterable[int], chunks: Sequence[Chunk]) -> None:
+        """Swap the chunks of ``source_ids`` for ``chunks`` (an empty list deletes them)."""
+        keys = self._drop(kind, source_ids)
+        self.add(chunks)
+        if self.ann is not None:
+            # Chunks whose text survived the edit kept their ANN rows through add().
+            self.ann.remove(key for key in keys if key not in self._row_by_key)
+
+    def compact(self) -> None:
+        """Physically drop dead rows and renumber the survivors."""
+        keep = self._alive[: self._size].copy()
+        self._bm25.compact(keep)
+        self._vectors = self._vectors[: self._size][keep]
+        self._kind = self._kind[: self._size][keep]
+        self._source = self._source[: self._size][keep]
+        self._day = self._day[: self._size][keep]
+        self._completed = self._completed[: self._size][keep]
+        self._category = self._category[: self._size][keep]
+        self._key = self._key[: self._size][keep]
+        self._texts = [text for text, alive in zip(self._texts, keep, strict=True) if alive]
+        self._size = self._live = int(keep.sum())
+        self._alive = np.ones(self._size, dtype=bool)
+        self._rows_by_source = {}
+        sources = zip(self._kind.tolist(), self._source.tolist(), strict=True)
+        for row, (kind, source_id) in enumerate(sources):
+            self._rows_by_source.setdefault((_KIND_NAMES[kind], source_id), []).append(row)
+        self._row_by_key = dict(zip(self._key.tolist(), range(self._size), strict=True))
+
+    @property
+    def _ann_ready(self) -> bool:
+        # A read-only ANN index does not see this process's writes, so it is not used.
+        return self.ann is not None and self.ann.writable and self.ann.trained
+
+    @property
+    def keys(self) -> np.ndarray:
+        """ANN keys of the live chunks."""
+        return self._key[: self._size][self._alive[: self._size]]
+
+    def _mask(self, where: RetrievalFilter | None) -> np.ndarray:
+        n = self._size
+        mask = self._alive[:n].copy()
+        if where is None:
+            return mask
+        if where.kinds is not None:
+            mask &= np.isin(self._kind[:n], [_KINDS[kind] for kind in where.kinds])
+        if where.date_from is not None or where.date_to is not None:
+            days = self._day[:n]
+            mask &= days > 0
+            if where.date_from is not None:
+                mask &= days >= where.date_from.toordinal()
+            if where.date_to is not None:
+                mask &= days <= where.date_to.toordinal()
+        if where.completed is not None:
+            mask &= self._completed[:n] == int(where.completed)
+        if where.categories is not None:
+            codes = [
+                self._categories[name]
+                for name in (category.strip().lower() for category in where.categories)
+                if name in self._categories
+            ]
+            mask &= np.isin(self._category[:n], codes)
+        return mask
+
+    @staticmethod
+    def _top(scores: np.ndarray, rows: np.ndarray, count: int) -> np.ndarray:
+        """Rows with the ``count`` highest ``scores`` (parallel arrays), best first."""
+        if len(scores) > count:
+            part = np.argpartition(-scores, count - 1)[:count]
+            scores, rows = scores[part], rows[part]
+        return rows[np.argsort(-scores, kind="stable")]
+
+    def _bm25_ranking(self, query: str, mask: np.ndarray, count: int) -> np.ndarray:
+        scores = self._bm25.scores(tokenize(query), self._size)
+        rows = np.flatnonzero(mask & (scores > 0))
+        return self._top(scores[rows], rows, count)
+
+    def _dense_ranking(self, query: str, mask: np.ndarray, count: int) -> np.ndarray:
+        vector = self.embedder.embed([query])[0]
+        if not vector.any():
+            return np.zeros(0, dtype=np.int64)
+        rows = np.flatnonzero(mask)
+        share = len(rows) / self._live
+        if share >= _SUBSET_FRACTION and self._ann_ready:
+            return self._ann_ranking(vector, mask, count, share)
+        if len(rows) < _SUBSET_FRACTION * self._size:
+            scores = self._vectors[rows] @ vector
+        else:
+            scores = (self._vectors[: self._size] @ vector)[rows]
+        # Unrelated text still has a (near-)zero cosine; it is noise, not a weak match.
+        close = scores > self.min_similarity
+        return self._top(scores[close], rows[close], count)
+
+    def _ann_ranking(
+        self, vector: np.ndarray, mask: np.ndarray, count: int, share: float
+    ) -> np.ndarray:
+        # Oversample so that roughly ``count`` candidates survive the metadata mask.
+        keys, scores = self.ann.search(vector, int(count / share) + count)
+        rows = np.fromiter((self._row_by_key.get(key, -1) for key in keys.tolist()), dtype=np.int64)
+        keep = rows >= 0
+        keep[keep] = mask[rows[keep]] & (scores[keep] > self.min_similarity)
+        return rows[keep][:count]
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        *,
+        where: RetrievalFilter | None = None,
+        mode: Mode = "hybrid",
+    ) -> list[RetrievalHit]:
+        if not self._live or k <= 0:
+            return []
+        mask = self._mask(where)
+        if not mask.any():
+            return []
+        depth = max(k, self.candidates)
+        bm25 = self._bm25_ranking(query, mask, depth) if mode != "dense" else None
+        dense = self._dense_ranking(query, mask, depth) if mode != "bm25" else None
+
+        fused: dict[int, float] = {}
+        ranks: dict[int, list[int | None]] = {}
+        for slot, ranking, weight in ((0, bm25, self.bm25_weight), (1, dense, self.dense_weight)):
+            if ranking is None:
+                continue
+            for rank, row in enumerate(ranking.tolist()):
+                fused[row] = fused.get(row, 0.0) + weight / (self.rrf_k + rank + 1)
+                ranks.setdefault(row, [None, None])[slot] = rank + 1
+        best = sorted(fused, key=lambda row: (-fused[row], row))[:k]
+        return [
+            RetrievalHit(
+                row=row,
+                kind=_KIND_NAMES[int(self._kind[row])],
+                source_id=int(self._source[row]),
+                text=self._texts[row],
+                score=fused[row],
+                bm25_rank=ranks[row][0],
+                dense_rank=ranks[row][1],
+            )
+            for row in best
+        ]
@@ -0,0 +1,173 @@
+"""In-memory aggregation of template ratings, applied to the database in batches.
+
+``POST /api/templates/{id}/ratings`` only adds the rating to a per-template
+``(sum, count)`` total here. A background thread flushes all totals every
+``RATING_FLUSH_INTERVAL`` seconds (or sooner once ``RATING_MAX_PENDING`` templates are
+waiting) with a single executemany UPDATE that increments the counters in SQL, so a burst
+of ratings costs one short transaction. Like :mod:`app.autosave`, pending totals live in
+process memory: ``main.lifespan`` flushes them on shutdown.
+
+A batch being flushed stays in the queued totals until its commit lands, and
+:meth:`RatingQueue.with_pending` pairs a read of the row with those totals so every
+rating is counted exactly once in the POST response, even while a flush commits.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import RATING_FLUSH_INTERVAL, RATING_MAX_PENDING
+from app.lib.cache import template_cache
+from app.services import apply_template_ratings
+
+logger = logging.getLogger(__name__)
+
+
+class RatingQueue:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        flush_interval: float = RATING_FLUSH_INTERVAL,
+        max_pending: int = RATING_MAX_PENDING,
+    ) -> None:
+        self._session_factory = session_factory or (lambda: database.SessionLocal())
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[int, tuple[int, int]] = {}
+        # The batch of the flush in progress, counted as pending until it commits.
+        self._inflight: dict[int, tuple[int, int]] = {}
+        # Odd while a flush is committing (see ``with_pending``).
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.submitted = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    def submit(self, template_id: int, rating: int) -> tuple[int, int]:
+        """Queue one rating; returns the template's queued ``(sum, count)``."""
+        with self._lock:
+            rating_sum, rating_count = self._pending.get(template_id, (0, 0))
+            self._pending[template_id] = (rating_sum + rating, rating_count + 1)
+            totals = self._queued(template_id)
+            self.submitted += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            if self.running:
+                self._wake.set()
+            else:
+                self.flush()
+        return totals
+
+    def _queued(self, template_id: int) -> tuple[int, int]:
+        pending_sum, pending_count = self._pending.get(template_id, (0, 0))
+        inflight_sum, inflight_count = self._inflight.get(template_id, (0, 0))
+        return pending_sum + inflight_sum, pending_count + inflight_count
+
+    def with_pending(
+        self, template_id: int, read_stored: Callable[[], tuple[int, int]]
+    ) -> tuple[int, int]:
+        """``read_stored()``'s ``(sum, count)`` plus the ratings no commit has applied yet.
+
+        Both reads are retried if a flush commits between them, so a batch is counted
+        either in the row or in the queue, never in both or neither. ``read_stored`` must
+        query the database afresh (not return a cached ORM attribute).
+        """
+        while True:
+            with self._lock:
+                generation = self._generation
+            if generation % 2 == 0:
+                stored_sum, stored_count = read_stored()
+                with self._lock:
+                    if self._generation == generation:
+                        queued_sum, queued_count = self._queued(template_id)
+                        return stored_sum + queued_sum, stored_count + queued_count
+            time.sleep(0.001)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self) -> int:
+        """Apply every pending total in one transaction; returns the ratings written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            db = self._session_factory()
+            committing = False
+            try:
+                apply_template_ratings(db, batch)
+                with self._lock:
+                    self._generation += 1
+                committing = True
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._requeue(batch)
+                raise
+            finally:
+                db.close()
+                with self._lock:
+                    self._inflight = {}
+                    if committing:
+                        self._generation += 1
+            template_cache.invalidate()
+            written = sum(count for _, count in batch.values())
+            self.flushed += written
+            self.flushes += 1
+            return written
+
+    def _requeue(self, batch: dict[int, tuple[int, int]]) -> None:
+        with self._lock:
+            self._inflight = {}
+            for template_id, (rating_sum, rating_count) in batch.items():
+                pending_sum, pending_count = self._pending.get(template_id, (0, 0))
+                self._pending[template_id] = (
+                    pending_sum + rating_sum,
+                    pending_count + rating_count,
+                )
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rating-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and apply everything still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # keep the flusher alive; totals were requeued
+                logger.exception("Rating flush failed")
+
+
+rating_queue = RatingQueue()
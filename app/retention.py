@@ -0,0 +1,239 @@
+"""Tiered retention for autosave versions and the background task that enforces it.
+
+:class:`RetentionPolicy` decides which versions of one idea survive: everything from the
+last hour, the newest version per hour for a day, the newest per day for a month, the
+newest version overall, and every version carrying a label other than "Autosave".
+
+:class:`VersionCompactor` applies the policy idea by idea. Deletes are issued in small
+batches, each in its own short transaction, so autosaves are never stuck behind a long
+write lock. Because versions are delta-encoded (see :mod:`app.lib.brief_codec`), a
+keyframe that still has surviving deltas is never just deleted: its oldest surviving
+dependent is promoted to a keyframe and the others are re-encoded against it first.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import VERSION_COMPACTION_BATCH, VERSION_COMPACTION_INTERVAL
+from app.lib import brief_codec
+from app.models import IdeaBriefVersion
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_LABEL = "Autosave"
+
+
+@dataclass(frozen=True)
+class VersionStamp:
+    id: int
+    created_at: datetime
+    label: str | None
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for the UTC values we store.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_all: timedelta = timedelta(hours=1)
+    hourly: timedelta = timedelta(days=1)
+    daily: timedelta = timedelta(days=30)
+
+    def is_protected(self, version: VersionStamp) -> bool:
+        return version.label not in (None, AUTOSAVE_LABEL)
+
+    def prunable(self, versions: Sequence[VersionStamp], now: datetime) -> set[int]:
+        """Return the ids of ``versions`` (all from one idea) that the policy drops."""
+        now = _as_utc(now)
+        ordered = sorted(versions, key=lambda v: (_as_utc(v.created_at), v.id), reverse=True)
+        seen_buckets: set[tuple[str, datetime]] = set()
+        doomed: set[int] = set()
+        for position, version in enumerate(ordered):
+            created = _as_utc(version.created_at)
+            age = now - created
+            if position == 0 or self.is_protected(version) or age <= self.keep_all:
+                continue
+            if age <= self.hourly:
+                bucket = ("hour", created.replace(minute=0, second=0, microsecond=0))
+            elif age <= self.daily:
+                bucket = ("day", created.replace(hour=0, minute=0, second=0, microsecond=0))
+            else:
+                doomed.add(version.id)
+                continue
+            if bucket in seen_buckets:
+                doomed.add(version.id)
+            else:
+                seen_buckets.add(bucket)
+        return doomed
+
+
+@dataclass
+class CompactionStats:
+    runs: int = 0
+    ideas_scanned: int = 0
+    rows_pruned: int = 0
+    rows_rebased: int = 0
+    seconds: float = 0.0
+    last_run_at: datetime | None = None
+    last_run_seconds: float = 0.0
+    last_run_pruned: int = 0
+
+
+class VersionCompactor:
+    def __init__(
+        self,
+        policy: RetentionPolicy | None = None,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        batch_size: int = VERSION_COMPACTION_BATCH,
+        interval: float = VERSION_COMPACTION_INTERVAL,
+    ) -> None:
+        self.policy = policy or RetentionPolicy()
+        self._session_factory = session_factory or (lambda: database.SessionLocal())
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stats = CompactionStats()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self, now: datetime | None = None) -> CompactionStats:
+        """Apply the policy to every idea with prunable versions; returns cumulative stats."""
+        now = now or datetime.now(timezone.utc)
+        started = time.perf_counter()
+        with self._run_lock:
+            pruned_before = self.stats.rows_pruned
+            with self._session_factory() as db:
+                cutoff = (now - self.policy.keep_all).replace(tzinfo=None)
+                idea_ids = db.scalars(
+                    select(IdeaBriefVersion.idea_id)
+                    .where(
+                        IdeaBriefVersion.created_at < cutoff,
+                        or_(
+                            IdeaBriefVersion.label.is_(None),
+                            IdeaBriefVersion.label == AUTOSAVE_LABEL,
+                        ),
+                    )
+                    .distinct()
+                ).all()
+                for idea_id in idea_ids:
+                    if self._stop.is_set():
+                        break
+                    self._compact_idea(db, idea_id, now)
+                    self.stats.ideas_scanned += 1
+            elapsed = time.perf_counter() - started
+            self.stats.runs += 1
+            self.stats.seconds += elapsed
+            self.stats.last_run_seconds = elapsed
+            self.stats.last_run_pruned = self.stats.rows_pruned - pruned_before
+            self.stats.last_run_at = now
+        return self.stats
+
+    def _compact_idea(self, db: Session, idea_id: int, now: datetime) -> None:
+        stamps = [
+            VersionStamp(*row)
+            for row in db.execute(
+                select(IdeaBriefVersion.id, IdeaBriefVersion.created_at, IdeaBriefVersion.label)
+                .where(IdeaBriefVersion.idea_id == idea_id)
+            )
+        ]
+        doomed = self.policy.prunable(stamps, now)
+        # New autosaves are encoded against the latest keyframe, so it is never pruned here;
+        # that keeps concurrent writers from referencing a row this pass deletes.
+        latest_keyframe = db.scalar(
+            select(IdeaBriefVersion.id)
+            .where(IdeaBriefVersion.idea_id == idea_id, IdeaBriefVersion.base_version_id.is_(None))
+            .order_by(IdeaBriefVersion.id.desc())
+            .limit(1)
+        )
+        doomed.discard(latest_keyframe)
+        if not doomed:
+            return
+        self._rebase_dependents(db, idea_id, doomed)
+        ordered = sorted(doomed)
+        for offset in range(0, len(ordered), self.batch_size):
+            chunk = ordered[offset : offset + self.batch_size]
+            db.execute(delete(IdeaBriefVersion).where(IdeaBriefVersion.id.in_(chunk)))
+            db.commit()
+            self.stats.rows_pruned += len(chunk)
+
+    def _rebase_dependents(self, db: Session, idea_id: int, doomed: set[int]) -> None:
+        """Re-anchor surviving deltas whose keyframe is about to be deleted."""
+        doomed_keyframes = db.scalars(
+            select(IdeaBriefVersion).where(
+                IdeaBriefVersion.idea_id == idea_id,
+                IdeaBriefVersion.base_version_id.is_(None),
+                IdeaBriefVersion.id.in_(doomed),
+            )
+        ).all()
+        for keyframe in doomed_keyframes:
+            dependents = db.scalars(
+                select(IdeaBriefVersion)
+                .where(
+                    IdeaBriefVersion.base_version_id == keyframe.id,
+                    IdeaBriefVersion.id.not_in(doomed),
+                )
+                .order_by(IdeaBriefVersion.id.asc())
+            ).all()
+            if not dependents:
+                continue
+            base = brief_codec.decode_keyframe(keyframe.snapshot)
+            promoted, *rest = dependents
+            promoted_payload = brief_codec.apply_delta(base, promoted.snapshot)
+            promoted.snapshot = brief_codec.encode_keyframe(
+                json.dumps(promoted_payload, separators=(",", ":"), ensure_ascii=False)
+            )
+            promoted.base_version_id = None
+            for dependent in rest:
+                payload = brief_codec.apply_delta(base, dependent.snapshot)
+                dependent.snapshot = brief_codec.encode_delta(promoted_payload, payload)
+                dependent.base_version_id = promoted.id
+            db.commit()
+            self.stats.rows_rebased += len(dependents)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="version-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.run_once()
+            except Exception:  # retry on the next tick
+                logger.exception("Version compaction failed")
+                continue
+            logger.info(
+                "Version compaction pruned %s rows in %.2fs (total %s)",
+                stats.last_run_pruned,
+                stats.last_run_seconds,
+                stats.rows_pruned,
+            )
+
+
+version_compactor = VersionCompactor()
@@ -1,5 +1,5 @@
 """Router packages for separating HTML + API routes."""
 
-from . import ideas, pages, templates
+from . import ideas, ideas_async, pages, search, templates
 
-__all__ = ["ideas", "pages", "templates"]
+__all__ = ["ideas", "ideas_async", "pages", "search", "templates"]
@@ -0,0 +1,52 @@
+"""Attachment catalogue queries (see app.attachments); none of them read brief JSON."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from app.attachments import JOB_KIND, attachment_usage, list_attachments
+from app.database import get_db, get_read_db
+from app.schemas import AttachmentRead, AttachmentUsage, JobRead
+from app.services import enqueue_job
+
+router = APIRouter(prefix="/api", tags=["Attachments"])
+
+
+@router.get("/attachments", response_model=list[AttachmentRead])
+def list_attachments_api(
+    key: str | None = None,
+    idea_id: int | None = None,
+    content_type: str | None = Query(default=None, description='Exact, or a prefix like "video/"'),
+    after_id: int | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+) -> list[AttachmentRead]:
+    """Attachments by key ("which ideas use this clip"), idea or content type."""
+    return list_attachments(
+        db,
+        key=key,
+        idea_id=idea_id,
+        content_type=content_type,
+        after_id=after_id,
+        limit=limit,
+    )
+
+
+@router.get("/attachments/usage", response_model=list[AttachmentUsage])
+def attachment_usage_api(
+    by: Literal["month", "content_type", "idea"] = "month",
+    db: Session = Depends(get_read_db),
+) -> list[AttachmentUsage]:
+    """Attachment counts and bytes per month first attached, content type or idea."""
+    return attachment_usage(db, by)
+
+
+@router.post("/attachments/backfill", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def backfill_attachments_api(db: Session = Depends(get_db)) -> JobRead:
+    """Queue a rebuild of the catalogue from every brief."""
+    job = enqueue_job(db, JOB_KIND)
+    db.commit()
+    return JobRead.model_validate(job)
@@ -0,0 +1,124 @@
+"""Retrieval-augmented generation endpoints (see app.generation)."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import GENERATION_CONCURRENCY, GENERATION_TIMEOUT
+from app.database import get_read_db
+from app.generation import (
+    chunk,
+    generate_hooks,
+    retrieve,
+    save_variants,
+    stream_hook_variants,
+)
+from app.models import Idea, IdeaBrief
+from app.rag import RetrievalFilter
+from app.rag.response_cache import response_cache
+from app.schemas import (
+    HookGeneration,
+    HookGenerationRequest,
+    HookVariant,
+    HookVariantsContext,
+    HookVariantsDone,
+    HookVariantsRequest,
+    ResponseCacheStats,
+)
+from app.services import fetch_idea
+
+router = APIRouter(prefix="/api", tags=["Generation"])
+
+
+def _filter(payload: HookGenerationRequest) -> RetrievalFilter | None:
+    return RetrievalFilter(kinds=frozenset({payload.kind})) if payload.kind else None
+
+
+@router.post("/generate/hooks", response_model=HookGeneration)
+def generate_hooks_api(
+    payload: HookGenerationRequest, db: Session = Depends(get_read_db)
+) -> HookGeneration:
+    """Hook lines grounded in retrieved ideas/templates; repeated intents hit the cache."""
+    return generate_hooks(
+        db.connection(),
+        payload.intent,
+        count=payload.count,
+        context=payload.context,
+        where=_filter(payload),
+    )
+
+
+def _sse(event: str, model: BaseModel) -> str:
+    return f"event: {event}\ndata: {model.model_dump_json()}\n\n"
+
+
+def _save(idea_id: int, intent: str, variants: list[HookVariant]) -> IdeaBrief | None:
+    db = database.SessionLocal()
+    try:
+        idea = db.get(Idea, idea_id)
+        # The idea may have been deleted while the variants were generating.
+        return save_variants(db, idea, intent, variants) if idea is not None else None
+    finally:
+        db.close()
+
+
+@router.post("/ideas/{idea_id}/generate/hooks")
+def stream_hook_variants_api(
+    idea_id: int, payload: HookVariantsRequest, db: Session = Depends(get_read_db)
+) -> StreamingResponse:
+    """Server-Sent Events: ``context``, one ``variant`` per angle as it finishes, ``done``.
+
+    The variants' LLM calls run concurrently; with ``save`` the finished hooks are
+    appended to the idea's brief in one commit before ``done`` is sent.
+    """
+    fetch_idea(db, idea_id)
+    hits = retrieve(db.connection(), payload.intent, payload.context, _filter(payload))
+    concurrency = min(payload.concurrency or GENERATION_CONCURRENCY, GENERATION_CONCURRENCY)
+    timeout = min(payload.timeout or GENERATION_TIMEOUT, GENERATION_TIMEOUT)
+
+    async def events() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        # The request-scoped session closes before streaming starts; only ``hits`` is used.
+        yield _sse("context", HookVariantsContext(chunks=[chunk(hit) for hit in hits]))
+        variants = []
+        stream = stream_hook_variants(
+            payload.intent,
+            hits,
+            variants=payload.count,
+            concurrency=concurrency,
+            timeout=timeout,
+        )
+        async for variant in stream:
+            variants.append(variant)
+            yield _sse("variant", variant)
+        brief = None
+        if payload.save:
+            brief = await run_in_threadpool(_save, idea_id, payload.intent, variants)
+        completed = sum(1 for variant in variants if variant.hook)
+        done = HookVariantsDone(
+            completed=completed,
+            failed=len(variants) - completed,
+            saved=brief is not None,
+            brief_updated_at=brief.updated_at if brief is not None else None,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
+        yield _sse("done", done)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/generate/cache", response_model=ResponseCacheStats)
+def response_cache_stats() -> ResponseCacheStats:
+    return ResponseCacheStats(**response_cache.stats())
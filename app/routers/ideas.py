@@ -2,46 +2,258 @@
 
 from __future__ import annotations
 
-from datetime import date
+import base64
+import binascii
+import json
+import uuid
+from collections.abc import AsyncIterator
+from datetime import date, datetime
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.lib.calendar import month_context
+from app import database
+from app.autosave import PendingAutosave, autosave_buffer
+from app.config import AUTOSAVE_BUFFER
+from app.database import get_db, get_read_db
+from app.lib.cache import calendar_cache
+from app.lib.etag import brief_etag, if_match, none_match, window_etag
+from app.lib.storage import (
+    MultipartUploadError,
+    StorageConfigError,
+    abort_multipart_upload,
+    build_presigned_upload,
+    build_presigned_uploads,
+    complete_multipart_upload,
+    start_multipart_upload,
+)
 from app.models import Idea, IdeaBrief
+from app.retention import version_compactor
 from app.schemas import (
+    AttachmentItem,
+    AttachmentSignBatchRequest,
+    AttachmentSignBatchResponse,
     AttachmentSignRequest,
     AttachmentSignResponse,
+    BriefContent,
     BriefUpdate,
+    CalendarCacheStats,
     IdeaBriefRead,
     IdeaBriefVersionRead,
     IdeaCreate,
+    IdeaImportRecord,
+    IdeaPage,
     IdeaRead,
     IdeaUpdate,
+    ImportLineError,
+    ImportResult,
+    MultipartUploadAbort,
+    MultipartUploadComplete,
+    MultipartUploadCreate,
+    MultipartUploadRead,
+    VersionCompactionStats,
 )
 from app.services import (
+    add_attachment,
+    brief_attachment,
+    brief_content_json,
+    brief_timestamp,
+    brief_updated_at,
+    bulk_insert_ideas,
+    calendar_window,
     fetch_idea,
-    get_or_create_brief,
-    ideas_in_range,
+    fetch_idea_with_brief,
+    ideas_page,
+    ideas_with_briefs,
+    iter_export_lines,
     list_versions,
     parse_brief_content,
     restore_version,
     toggle_completion,
     update_brief,
 )
-from app.lib.storage import StorageConfigError, build_presigned_upload
 
 
 def _to_read_model(idea: Idea) -> IdeaRead:
     return IdeaRead.model_validate(idea)
 
 
-def _brief_response(idea: Idea, brief: IdeaBrief) -> IdeaBriefRead:
-    return IdeaBriefRead(idea_id=idea.id, updated_at=brief.updated_at, content=parse_brief_content(brief))
+IMPORT_CHUNK_SIZE = 500
+MAX_BATCH_BRIEFS = 200
+MAX_REPORTED_IMPORT_ERRORS = 100
+_DATETIME = TypeAdapter(datetime)
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """Split a streamed request body into numbered lines without buffering the whole body."""
+    pending = b""
+    line_no = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line
+    if pending:
+        yield line_no + 1, pending
+
+
+def _encode_cursor(key: tuple[date, datetime, int]) -> str:
+    target_date, created_at, idea_id = key
+    raw = json.dumps([target_date.isoformat(), created_at.isoformat(), idea_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[date, datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        target_date, created_at, idea_id = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(target_date), datetime.fromisoformat(created_at), int(idea_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from exc
+
+
+def _brief_response(
+    idea: Idea,
+    brief: IdeaBrief,
+    content: BriefContent | None = None,
+) -> IdeaBriefRead:
+    """Envelope for a brief; pass ``content`` when the caller already holds the model."""
+    if content is None:
+        content = parse_brief_content(brief)
+    return IdeaBriefRead(idea_id=idea.id, updated_at=brief.updated_at, content=content)
+
+
+def _brief_envelope(idea: Idea) -> tuple[bytes, datetime]:
+    """Serialize the ``IdeaBriefRead`` envelope around the stored JSON without parsing it.
+
+    Returns the body and the timestamp behind its ETag; a buffered autosave wins.
+    """
+    pending = autosave_buffer.peek(idea.id)
+    if pending is not None:
+        body = _pending_response(idea.id, pending).model_dump_json().encode("utf-8")
+        return body, pending.updated_at
+    updated_at = brief_timestamp(idea)
+    body = b'{"idea_id":%d,"updated_at":%s,"content":%s}' % (
+        idea.id,
+        _DATETIME.dump_json(updated_at),
+        brief_content_json(idea.brief).encode("utf-8"),
+    )
+    return body, updated_at
+
+
+def _brief_json_response(idea: Idea) -> Response:
+    body, updated_at = _brief_envelope(idea)
+    return Response(
+        body,
+        media_type="application/json",
+        headers={"ETag": brief_etag(idea.id, updated_at)},
+    )
+
+
+def _briefs_json_response(ideas: list[Idea]) -> Response:
+    body = b"[" + b",".join(_brief_envelope(idea)[0] for idea in ideas) + b"]"
+    return Response(body, media_type="application/json")
+
+
+def _pending_response(idea_id: int, pending: PendingAutosave) -> IdeaBriefRead:
+    return IdeaBriefRead(idea_id=idea_id, updated_at=pending.updated_at, content=pending.content)
+
+
+def _not_modified(tag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+
+
+def _tagged(response: Response, brief: IdeaBriefRead) -> IdeaBriefRead:
+    response.headers["ETag"] = brief_etag(brief.idea_id, brief.updated_at)
+    return brief
+
+
+def _brief_state(db: Session, idea_id: int) -> datetime | None:
+    """Timestamp behind the brief's ETag; a buffered autosave wins over the stored row."""
+    pending = autosave_buffer.peek(idea_id)
+    return pending.updated_at if pending is not None else brief_updated_at(db, idea_id)
+
+
+def _check_if_match(idea_id: int, header: str | None, updated_at: datetime | None) -> None:
+    current = brief_etag(idea_id, updated_at) if updated_at is not None else None
+    if not if_match(header, current):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Brief was modified by another editor",
+        )
+
+
 router = APIRouter(prefix="/api", tags=["Ideas"])
 
 
+@router.get("/ideas", response_model=IdeaPage)
+def list_ideas(
+    start: date | None = None,
+    end: date | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    db: Session = Depends(get_read_db),
+) -> IdeaPage:
+    """Page through ideas in ``[start, end]`` using an opaque keyset cursor."""
+    after = _decode_cursor(cursor) if cursor else None
+    rows, next_key = ideas_page(db, start=start, end=end, after=after, limit=limit)
+    return IdeaPage(
+        items=[_to_read_model(idea) for idea in rows],
+        next_cursor=_encode_cursor(next_key) if next_key else None,
+    )
+
+
+@router.post("/ideas/import", response_model=ImportResult)
+async def import_ideas(request: Request, db: Session = Depends(get_db)) -> ImportResult:
+    """Stream NDJSON ideas (with an optional ``brief`` and completion state) into bulk inserts."""
+    chunk: list[IdeaImportRecord] = []
+    errors: list[ImportLineError] = []
+    imported = failed = 0
+    async for line_no, line in _ndjson_lines(request.stream()):
+        if not line.strip():
+            continue
+        try:
+            record = IdeaImportRecord.model_validate_json(line)
+            if not record.title.strip():
+                raise ValueError("Title is required")
+        except ValueError as exc:
+            failed += 1
+            if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                errors.append(ImportLineError(line=line_no, error=str(exc)[:500]))
+            continue
+        chunk.append(record)
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            imported += len(await run_in_threadpool(bulk_insert_ideas, db, chunk))
+            chunk = []
+    if chunk:
+        imported += len(await run_in_threadpool(bulk_insert_ideas, db, chunk))
+    return ImportResult(imported=imported, failed=failed, errors=errors)
+
+
+@router.get("/ideas/export")
+def export_ideas() -> StreamingResponse:
+    """Stream every idea with its brief as NDJSON (the format ``/ideas/import`` accepts)."""
+    autosave_buffer.flush()
+
+    def lines():
+        # The request-scoped session closes before streaming starts, so own one here.
+        db = database.ReadSessionLocal()
+        try:
+            yield from iter_export_lines(db)
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.post("/ideas", response_model=IdeaRead, status_code=status.HTTP_201_CREATED)
 def create_idea(payload: IdeaCreate, db: Session = Depends(get_db)) -> IdeaRead:
     title = payload.title.strip()
@@ -51,12 +263,14 @@ def create_idea(payload: IdeaCreate, db: Session = Depends(get_db)) -> IdeaRead:
     db.add(idea)
     db.commit()
     db.refresh(idea)
+    calendar_cache.invalidate_dates(idea.target_date)
     return _to_read_model(idea)
 
 
 @router.patch("/ideas/{idea_id}", response_model=IdeaRead)
 def patch_idea(idea_id: int, payload: IdeaUpdate, db: Session = Depends(get_db)) -> IdeaRead:
     idea = fetch_idea(db, idea_id)
+    previous_date = idea.target_date
     if payload.title is not None:
         cleaned = payload.title.strip()
         if not cleaned:
@@ -68,6 +282,7 @@ def patch_idea(idea_id: int, payload: IdeaUpdate, db: Session = Depends(get_db))
         idea.target_date = payload.target_date
     db.commit()
     db.refresh(idea)
+    calendar_cache.invalidate_dates(previous_date, idea.target_date)
     return _to_read_model(idea)
 
 
@@ -77,37 +292,89 @@ def toggle_idea(idea_id: int, db: Session = Depends(get_db)) -> IdeaRead:
     toggle_completion(idea)
     db.commit()
     db.refresh(idea)
+    calendar_cache.invalidate_dates(idea.target_date)
     return _to_read_model(idea)
 
 
 @router.get("/ideas/{idea_id}/brief", response_model=IdeaBriefRead)
-def read_brief(idea_id: int, db: Session = Depends(get_db)) -> IdeaBriefRead:
-    idea = fetch_idea(db, idea_id)
-    brief = get_or_create_brief(db, idea)
-    return _brief_response(idea, brief)
+def read_brief(
+    idea_id: int,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_read_db),
+) -> Response:
+    if if_none_match:
+        updated_at = _brief_state(db, idea_id)
+        if updated_at is not None:
+            tag = brief_etag(idea_id, updated_at)
+            if none_match(if_none_match, tag):
+                return _not_modified(tag)
+    return _brief_json_response(fetch_idea_with_brief(db, idea_id))
+
+
+@router.get("/briefs", response_model=list[IdeaBriefRead])
+def read_briefs(
+    ids: Annotated[list[int], Query(min_length=1, max_length=MAX_BATCH_BRIEFS)],
+    db: Session = Depends(get_read_db),
+) -> Response:
+    """Briefs for several ideas in one query, in the order requested (unknown ids skipped)."""
+    return _briefs_json_response(ideas_with_briefs(db, ids))
 
 
 @router.put("/ideas/{idea_id}/brief", response_model=IdeaBriefRead)
-def write_brief(idea_id: int, payload: BriefUpdate, db: Session = Depends(get_db)) -> IdeaBriefRead:
+def write_brief(
+    idea_id: int,
+    payload: BriefUpdate,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_db),
+) -> IdeaBriefRead:
     idea = fetch_idea(db, idea_id)
-    brief = update_brief(db, idea, payload.content, autosave=False, label=payload.label)
-    return _brief_response(idea, brief)
+    expected = None
+    if if_match is not None:
+        expected = _brief_state(db, idea.id)
+        _check_if_match(idea.id, if_match, expected)
+    # Flushing persists a buffered draft with its own timestamp, so ``expected`` still holds.
+    autosave_buffer.flush([idea.id])
+    brief = update_brief(
+        db,
+        idea,
+        payload.content,
+        autosave=False,
+        label=payload.label,
+        expected_updated_at=expected,
+    )
+    return _tagged(response, _brief_response(idea, brief, payload.content))
 
 
 @router.post("/ideas/{idea_id}/brief/autosave", response_model=IdeaBriefRead)
-def autosave_brief(idea_id: int, payload: BriefUpdate, db: Session = Depends(get_db)) -> IdeaBriefRead:
+def autosave_brief(
+    idea_id: int,
+    payload: BriefUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> IdeaBriefRead:
     idea = fetch_idea(db, idea_id)
-    brief = update_brief(db, idea, payload.content, autosave=True, label=payload.label or "Autosave")
-    return _brief_response(idea, brief)
+    label = payload.label or "Autosave"
+    if AUTOSAVE_BUFFER:
+        pending = autosave_buffer.submit(idea.id, payload.content, label)
+        return _tagged(response, _pending_response(idea.id, pending))
+    brief = update_brief(db, idea, payload.content, autosave=True, label=label)
+    return _tagged(response, _brief_response(idea, brief, payload.content))
 
 
 @router.get("/ideas/{idea_id}/brief/versions", response_model=list[IdeaBriefVersionRead])
-def brief_versions(idea_id: int, db: Session = Depends(get_db)) -> list[IdeaBriefVersionRead]:
+def brief_versions(idea_id: int, db: Session = Depends(get_read_db)) -> list[IdeaBriefVersionRead]:
     idea = fetch_idea(db, idea_id)
+    autosave_buffer.flush([idea.id])
     versions = list_versions(db, idea)
     return [IdeaBriefVersionRead.model_validate(v) for v in versions]
 
 
+@router.get("/brief-versions/compaction", response_model=VersionCompactionStats)
+def brief_version_compaction_stats() -> VersionCompactionStats:
+    return VersionCompactionStats.model_validate(version_compactor.stats, from_attributes=True)
+
+
 @router.post("/ideas/{idea_id}/brief/versions/{version_id}/restore", response_model=IdeaBriefRead)
 def restore_brief_version(
     idea_id: int,
@@ -115,11 +382,12 @@ def restore_brief_version(
     db: Session = Depends(get_db),
 ) -> IdeaBriefRead:
     idea = fetch_idea(db, idea_id)
+    autosave_buffer.flush([idea.id])
     version, content = restore_version(db, version_id)
     if version.idea_id != idea.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Autosave not found")
     brief = update_brief(db, idea, content, autosave=True, label=version.label or "Restore")
-    return _brief_response(idea, brief)
+    return _brief_response(idea, brief, content)
 
 
 @router.post("/ideas/{idea_id}/brief/attachments/sign", response_model=AttachmentSignResponse)
@@ -145,19 +413,146 @@ def presign_attachment(
         content_type=presigned["content_type"],
     )
 
+
+@router.post(
+    "/ideas/{idea_id}/brief/attachments/sign-batch", response_model=AttachmentSignBatchResponse
+)
+def presign_attachments(
+    idea_id: int,
+    payload: AttachmentSignBatchRequest,
+    db: Session = Depends(get_read_db),
+) -> AttachmentSignBatchResponse:
+    """Sign a whole drop of files in one round trip (one idea check, parallel signing)."""
+    fetch_idea(db, idea_id)
+    try:
+        presigned = build_presigned_uploads(
+            [(file.filename, file.content_type) for file in payload.files]
+        )
+    except StorageConfigError as exc:  # pragma: no cover - depends on env config
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+    return AttachmentSignBatchResponse(
+        uploads=[AttachmentSignResponse(**upload) for upload in presigned]
+    )
+
+
+def _storage_unavailable(exc: StorageConfigError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+
+
+def _upload_rejected(exc: MultipartUploadError) -> HTTPException:
+    if exc.code == "NoSuchUpload":
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{exc.code}: {exc}")
+
+
+@router.post(
+    "/ideas/{idea_id}/brief/attachments/multipart",
+    response_model=MultipartUploadRead,
+    status_code=status.HTTP_201_CREATED,
+)
+def start_multipart(
+    idea_id: int,
+    payload: MultipartUploadCreate,
+    db: Session = Depends(get_read_db),
+) -> MultipartUploadRead:
+    """Start a multipart upload with a presigned PUT URL per part (upload them in parallel)."""
+    fetch_idea(db, idea_id)
+    try:
+        upload = start_multipart_upload(payload.filename, payload.size, payload.content_type)
+    except StorageConfigError as exc:  # pragma: no cover - depends on env config
+        raise _storage_unavailable(exc) from exc
+    except MultipartUploadError as exc:
+        raise _upload_rejected(exc) from exc
+    return MultipartUploadRead(**upload)
+
+
+@router.post("/ideas/{idea_id}/brief/attachments/multipart/complete", response_model=IdeaBriefRead)
+def complete_multipart(
+    idea_id: int,
+    payload: MultipartUploadComplete,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> IdeaBriefRead:
+    """Assemble the parts and add the object to the brief's attachments (one commit).
+
+    Completing an upload whose key is already attached is a no-op, so clients can retry.
+    """
+    idea = fetch_idea(db, idea_id)
+    autosave_buffer.flush([idea.id])
+    if brief_attachment(idea, payload.key) is None:
+        parts = [(part.part_number, part.etag) for part in payload.parts]
+        try:
+            stored = complete_multipart_upload(payload.key, payload.upload_id, parts)
+        except StorageConfigError as exc:  # pragma: no cover - depends on env config
+            raise _storage_unavailable(exc) from exc
+        except MultipartUploadError as exc:
+            raise _upload_rejected(exc) from exc
+        item = AttachmentItem(
+            id=str(uuid.uuid4()),
+            filename=payload.filename,
+            url=stored["url"],
+            key=stored["key"],
+            content_type=payload.content_type,
+            size=stored["size"],
+        )
+        add_attachment(db, idea, item)
+    return _tagged(response, _brief_response(idea, idea.brief))
+
+
+@router.post(
+    "/ideas/{idea_id}/brief/attachments/multipart/abort",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+def abort_multipart(
+    idea_id: int,
+    payload: MultipartUploadAbort,
+    db: Session = Depends(get_read_db),
+) -> Response:
+    """Discard an unfinished upload; aborting one that is already gone succeeds."""
+    fetch_idea(db, idea_id)
+    try:
+        abort_multipart_upload(payload.key, payload.upload_id)
+    except StorageConfigError as exc:  # pragma: no cover - depends on env config
+        raise _storage_unavailable(exc) from exc
+    except MultipartUploadError as exc:
+        if exc.code != "NoSuchUpload":
+            raise _upload_rejected(exc) from exc
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.delete("/ideas/{idea_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 def delete_idea(idea_id: int, db: Session = Depends(get_db)) -> Response:
     idea = fetch_idea(db, idea_id)
+    target_date = idea.target_date
+    autosave_buffer.discard(idea.id)
     db.delete(idea)
     db.commit()
+    calendar_cache.invalidate_dates(target_date)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/calendar")
-def calendar_api(year: int | None = None, month: int | None = None, db: Session = Depends(get_db)):
+def calendar_api(
+    response: Response,
+    year: int | None = None,
+    month: int | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_read_db),
+):
     today = date.today()
-    year = year or today.year
-    month = month or today.month
-    ctx = month_context(year, month)
-    ideas = ideas_in_range(db, ctx["range_start"], ctx["range_end"])
-    return [_to_read_model(idea) for idea in ideas]
+    year, month = year or today.year, month or today.month
+    # Read the version before loading: a write racing the load only makes the tag stale.
+    tag = window_etag(year, month, calendar_cache.version((year, month)))
+    if none_match(if_none_match, tag):
+        return _not_modified(tag)
+    response.headers["ETag"] = tag
+    return calendar_window(db, year, month)
+
+
+@router.get("/calendar/cache", response_model=CalendarCacheStats)
+def calendar_cache_stats() -> CalendarCacheStats:
+    return CalendarCacheStats(**calendar_cache.stats())
@@ -0,0 +1,184 @@
+"""Async-native calendar + brief routes, mounted ahead of the sync ones when ASYNC_DB is on.
+
+Handlers mirror the request/response contracts in :mod:`app.routers.ideas` and
+:mod:`app.routers.pages` but run on the event loop with an AsyncSession, so the hot
+calendar and autosave paths never queue for a threadpool worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.async_services import (
+    brief_updated_at,
+    calendar_window,
+    fetch_idea,
+    fetch_idea_with_brief,
+    ideas_with_briefs,
+    list_versions,
+    restore_version,
+    update_brief,
+)
+from app.autosave import autosave_buffer
+from app.config import AUTOSAVE_BUFFER
+from app.database import get_async_db
+from app.lib.cache import calendar_cache
+from app.lib.calendar import month_context
+from app.lib.etag import brief_etag, none_match, window_etag
+from app.routers.ideas import (
+    MAX_BATCH_BRIEFS,
+    _brief_json_response,
+    _brief_response,
+    _briefs_json_response,
+    _check_if_match,
+    _not_modified,
+    _pending_response,
+    _tagged,
+)
+from app.routers.pages import render_calendar
+from app.schemas import BriefUpdate, IdeaBriefRead, IdeaBriefVersionRead, IdeaRead
+
+router = APIRouter(tags=["Ideas"])
+
+
+@router.get("/", response_class=HTMLResponse, include_in_schema=False)
+async def calendar_page_async(
+    request: Request,
+    year: int | None = None,
+    month: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> HTMLResponse:
+    today = date.today()
+    year, month = year or today.year, month or today.month
+    ideas = await calendar_window(db, year, month)
+    return render_calendar(request, month_context(year, month), ideas, today)
+
+
+@router.get("/api/calendar", response_model=list[IdeaRead], include_in_schema=False)
+async def calendar_api_async(
+    response: Response,
+    year: int | None = None,
+    month: int | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> list[IdeaRead] | Response:
+    today = date.today()
+    year, month = year or today.year, month or today.month
+    tag = window_etag(year, month, calendar_cache.version((year, month)))
+    if none_match(if_none_match, tag):
+        return _not_modified(tag)
+    response.headers["ETag"] = tag
+    return await calendar_window(db, year, month)
+
+
+async def _brief_state(db: AsyncSession, idea_id: int) -> datetime | None:
+    pending = autosave_buffer.peek(idea_id)
+    return pending.updated_at if pending is not None else await brief_updated_at(db, idea_id)
+
+
+@router.get("/api/ideas/{idea_id}/brief", response_model=IdeaBriefRead, include_in_schema=False)
+async def read_brief_async(
+    idea_id: int,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    if if_none_match:
+        updated_at = await _brief_state(db, idea_id)
+        if updated_at is not None:
+            tag = brief_etag(idea_id, updated_at)
+            if none_match(if_none_match, tag):
+                return _not_modified(tag)
+    return _brief_json_response(await fetch_idea_with_brief(db, idea_id))
+
+
+@router.get("/api/briefs", response_model=list[IdeaBriefRead], include_in_schema=False)
+async def read_briefs_async(
+    ids: Annotated[list[int], Query(min_length=1, max_length=MAX_BATCH_BRIEFS)],
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    return _briefs_json_response(await ideas_with_briefs(db, ids))
+
+
+@router.put("/api/ideas/{idea_id}/brief", response_model=IdeaBriefRead, include_in_schema=False)
+async def write_brief_async(
+    idea_id: int,
+    payload: BriefUpdate,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> IdeaBriefRead:
+    idea = await fetch_idea(db, idea_id)
+    expected = None
+    if if_match is not None:
+        expected = await _brief_state(db, idea.id)
+        _check_if_match(idea.id, if_match, expected)
+    await asyncio.to_thread(autosave_buffer.flush, [idea.id])
+    brief = await update_brief(
+        db,
+        idea,
+        payload.content,
+        autosave=False,
+        label=payload.label,
+        expected_updated_at=expected,
+    )
+    return _tagged(response, _brief_response(idea, brief, payload.content))
+
+
+@router.post(
+    "/api/ideas/{idea_id}/brief/autosave",
+    response_model=IdeaBriefRead,
+    include_in_schema=False,
+)
+async def autosave_brief_async(
+    idea_id: int,
+    payload: BriefUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+) -> IdeaBriefRead:
+    idea = await fetch_idea(db, idea_id)
+    label = payload.label or "Autosave"
+    if AUTOSAVE_BUFFER:
+        pending = autosave_buffer.submit(idea.id, payload.content, label)
+        return _tagged(response, _pending_response(idea.id, pending))
+    brief = await update_brief(db, idea, payload.content, autosave=True, label=label)
+    return _tagged(response, _brief_response(idea, brief, payload.content))
+
+
+@router.get(
+    "/api/ideas/{idea_id}/brief/versions",
+    response_model=list[IdeaBriefVersionRead],
+    include_in_schema=False,
+)
+async def brief_versions_async(
+    idea_id: int,
+    db: AsyncSession = Depends(get_async_db),
+) -> list[IdeaBriefVersionRead]:
+    idea = await fetch_idea(db, idea_id)
+    await asyncio.to_thread(autosave_buffer.flush, [idea.id])
+    versions = await list_versions(db, idea)
+    return [IdeaBriefVersionRead.model_validate(v) for v in versions]
+
+
+@router.post(
+    "/api/ideas/{idea_id}/brief/versions/{version_id}/restore",
+    response_model=IdeaBriefRead,
+    include_in_schema=False,
+)
+async def restore_brief_version_async(
+    idea_id: int,
+    version_id: int,
+    db: AsyncSession = Depends(get_async_db),
+) -> IdeaBriefRead:
+    idea = await fetch_idea(db, idea_id)
+    await asyncio.to_thread(autosave_buffer.flush, [idea.id])
+    version, content = await restore_version(db, version_id)
+    if version.idea_id != idea.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Autosave not found")
+    brief = await update_brief(db, idea, content, autosave=True, label=version.label or "Restore")
+    return _brief_response(idea, brief, content)
@@ -0,0 +1,26 @@
+"""Background job status."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.jobs import job_queue
+from app.models import Job
+from app.schemas import JobRead, JobStats
+
+router = APIRouter(prefix="/api", tags=["Jobs"])
+
+
+@router.get("/jobs/stats", response_model=JobStats)
+def job_stats() -> JobStats:
+    return JobStats(**job_queue.stats())
+
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+def read_job(job_id: int, db: Session = Depends(get_read_db)) -> JobRead:
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobRead.model_validate(job)
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
 from datetime import date, datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
+from markupsafe import Markup
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.lib.cache import calendar_cache, calendar_fragments
 from app.lib.calendar import group_ideas_by_day, month_context
-from app.services import fetch_idea, ideas_in_range
+from app.services import calendar_window, fetch_idea
 from app.ui import templates
 
 router = APIRouter(tags=["Pages"])
@@ -21,22 +24,60 @@ def calendar_page(
     request: Request,
     year: int | None = None,
     month: int | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> HTMLResponse:
     today = date.today()
     year = year or today.year
     month = month or today.month
 
     ctx = month_context(year, month)
-    ideas = ideas_in_range(db, ctx["range_start"], ctx["range_end"])
-    ideas_by_day = group_ideas_by_day(ideas)
+    ideas = calendar_window(db, year, month)
+    return render_calendar(request, ctx, ideas, today)
+
+
+def render_weeks(
+    weeks: Sequence[Sequence[date]], ideas_by_day: dict, current_month: int, today: date
+) -> list[Markup]:
+    """HTML of each week row, reusing cached day cells and weeks that have not changed.
+
+    A cell's key is everything ``_day_card.html`` shows: the day, whether it is muted or
+    today, and the id, title and completed flag of each of its ideas in order. A week's
+    key is its seven cell keys, so a month where one idea changed re-renders one cell.
+    """
+    day_card = templates.get_template("_day_card.html")
+    rows = []
+    for week in weeks:
+        cells = []
+        for day in week:
+            ideas = ideas_by_day.get(day, [])
+            versions = tuple((idea.id, idea.title, idea.completed) for idea in ideas)
+            cells.append(((day, day.month != current_month, day == today, versions), ideas))
+        week_key = ("week", tuple(key for key, _ in cells))
+        html = calendar_fragments.get(week_key)
+        if html is None:
+            parts = []
+            for key, ideas in cells:
+                cell = calendar_fragments.get(("day", key))
+                if cell is None:
+                    day, muted, is_today, _ = key
+                    cell = day_card.render(day=day, ideas=ideas, muted=muted, is_today=is_today)
+                    calendar_fragments.put(("day", key), cell)
+                parts.append(cell)
+            # Stored as Markup so a hit does not copy the row again.
+            html = Markup("".join(parts))
+            calendar_fragments.put(week_key, html)
+        rows.append(html)
+    return rows
 
+
+def render_calendar(request: Request, ctx: dict, ideas: Iterable, today: date) -> HTMLResponse:
+    """Render the month grid; shared by the sync and async calendar routes."""
+    ideas_by_day = group_ideas_by_day(ideas)
     return templates.TemplateResponse(
         "calendar.html",
         {
             "request": request,
-            "weeks": ctx["weeks"],
-            "ideas_by_day": ideas_by_day,
+            "week_html": render_weeks(ctx["weeks"], ideas_by_day, ctx["current_month"], today),
             "today": today,
             "current_month": ctx["current_month"],
             "current_year": ctx["current_year"],
@@ -50,7 +91,11 @@ def calendar_page(
 
 
 @router.get("/ideas/{idea_id}/edit", response_class=HTMLResponse)
-def edit_page(request: Request, idea_id: int, db: Session = Depends(get_db)) -> HTMLResponse:
+def edit_page(
+    request: Request,
+    idea_id: int,
+    db: Session = Depends(get_read_db),
+) -> HTMLResponse:
     idea = fetch_idea(db, idea_id)
     return templates.TemplateResponse(
         "edit.html",
@@ -61,6 +106,7 @@ def edit_page(request: Request, idea_id: int, db: Session = Depends(get_db)) ->
 @router.post("/ideas/{idea_id}/edit", response_class=HTMLResponse)
 async def edit_submit(request: Request, idea_id: int, db: Session = Depends(get_db)) -> HTMLResponse:
     idea = fetch_idea(db, idea_id)
+    previous_date = idea.target_date
     form = await request.form()
     title = (form.get("title") or "").strip()
     if not title:
@@ -74,6 +120,7 @@ async def edit_submit(request: Request, idea_id: int, db: Session = Depends(get_
     idea.completed = completed
     idea.completed_at = datetime.now(timezone.utc) if completed else None
     db.commit()
+    calendar_cache.invalidate_dates(previous_date, idea.target_date)
     return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -0,0 +1,32 @@
+"""Hook recipes mined from templates and briefs (see app.patterns)."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db, get_read_db
+from app.patterns import JOB_KIND, recipes
+from app.schemas import HookRecipe, JobRead
+from app.services import enqueue_job
+
+router = APIRouter(prefix="/api", tags=["Patterns"])
+
+
+@router.get("/recipes", response_model=list[HookRecipe])
+def list_recipes(
+    limit: int = Query(default=10, ge=1, le=100),
+    examples: int = Query(default=3, ge=0, le=20),
+    min_size: int = Query(default=2, ge=1),
+    db: Session = Depends(get_read_db),
+) -> list[HookRecipe]:
+    """Hook clusters ranked by their weight (template ratings and completed briefs)."""
+    return recipes(db, limit=limit, examples=examples, min_size=min_size)
+
+
+@router.post("/recipes/rebuild", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def rebuild_recipes(db: Session = Depends(get_db)) -> JobRead:
+    """Queue a from-scratch refit of the pattern model (incremental updates never re-cluster)."""
+    job = enqueue_job(db, JOB_KIND, {"rebuild": True})
+    db.commit()
+    return JobRead.model_validate(job)
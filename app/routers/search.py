@@ -0,0 +1,69 @@
+"""Full-text search and hybrid retrieval across ideas, briefs and templates."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.rag import RetrievalFilter, retrieval_index
+from app.schemas import RetrievalPage, RetrievedChunk, SearchPage
+from app.search import search
+
+router = APIRouter(prefix="/api", tags=["Search"])
+
+
+@router.get("/search", response_model=SearchPage)
+def search_api(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    kind: Literal["idea", "template"] | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0, le=10_000)] = 0,
+    db: Session = Depends(get_read_db),
+) -> SearchPage:
+    """Rank matches with bm25 (title hits first); the last word matches as a prefix."""
+    return search(db, q, kind=kind, limit=limit, offset=offset)
+
+
+@router.get("/retrieve", response_model=RetrievalPage)
+def retrieve_api(
+    q: Annotated[str, Query(min_length=1, max_length=500)],
+    k: Annotated[int, Query(ge=1, le=50)] = 10,
+    kind: Literal["idea", "template"] | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    completed: bool | None = None,
+    category: Annotated[list[str] | None, Query()] = None,
+    mode: Literal["hybrid", "bm25", "dense"] = "hybrid",
+    db: Session = Depends(get_read_db),
+) -> RetrievalPage:
+    """Chunks ranked by BM25 + embedding similarity (fused), after metadata filtering."""
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
+        )
+    where = RetrievalFilter(
+        kinds=frozenset({kind}) if kind else None,
+        date_from=date_from,
+        date_to=date_to,
+        completed=completed,
+        categories=frozenset(category) if category else None,
+    )
+    hits = retrieval_index.search(db.connection(), q, k, where=where, mode=mode)
+    return RetrievalPage(
+        items=[
+            RetrievedChunk(
+                kind=hit.kind,
+                id=hit.source_id,
+                text=hit.text,
+                score=hit.score,
+                bm25_rank=hit.bm25_rank,
+                dense_rank=hit.dense_rank,
+            )
+            for hit in hits
+        ]
+    )
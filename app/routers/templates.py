@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.config import RATING_QUEUE
+from app.database import get_db, get_read_db
+from app.models import IdeaTemplate
+from app.ratings import rating_queue
 from app.schemas import (
     TemplateCreate,
     TemplateFavoriteRequest,
@@ -18,8 +22,9 @@ from app.schemas import (
 from app.services import (
     create_template as persist_template,
     fetch_template,
-    list_templates,
+    ranked_templates,
     rate_template,
+    template_read,
     toggle_template_favorite,
     update_template as persist_template_update,
 )
@@ -27,32 +32,15 @@ from app.services import (
 router = APIRouter(prefix="/api/templates", tags=["Templates"])
 
 
-def _to_read(template) -> TemplateRead:
-    rating = None
-    if template.rating_count:
-        rating = round(template.rating_sum / template.rating_count, 2)
-    return TemplateRead(
-        id=template.id,
-        name=template.name,
-        body=template.body,
-        category=template.category,
-        favorite=template.favorite,
-        created_at=template.created_at,
-        rating=rating,
-        rating_count=template.rating_count,
-    )
-
-
 @router.get("", response_model=list[TemplateRead])
-def templates_index(db: Session = Depends(get_db)) -> list[TemplateRead]:
-    templates = list_templates(db)
-    return [_to_read(item) for item in templates]
+def templates_index(db: Session = Depends(get_read_db)) -> list[TemplateRead]:
+    return ranked_templates(db)
 
 
 @router.post("", response_model=TemplateRead, status_code=status.HTTP_201_CREATED)
 def templates_create(payload: TemplateCreate, db: Session = Depends(get_db)) -> TemplateRead:
     template = persist_template(db, name=payload.name.strip(), body=payload.body.strip(), category=payload.category)
-    return _to_read(template)
+    return template_read(template)
 
 
 @router.patch("/{template_id}", response_model=TemplateRead)
@@ -66,7 +54,7 @@ def templates_update(template_id: int, payload: TemplateUpdate, db: Session = De
         category=payload.category,
         favorite=payload.favorite,
     )
-    return _to_read(template)
+    return template_read(template)
 
 
 @router.post("/{template_id}/favorite", response_model=TemplateFavoriteResponse)
@@ -87,6 +75,17 @@ def templates_rate(
     db: Session = Depends(get_db),
 ) -> TemplateRatingResponse:
     template = fetch_template(db, template_id)
-    template = rate_template(db, template, payload.rating)
-    rating = round(template.rating_sum / template.rating_count, 2) if template.rating_count else None
-    return TemplateRatingResponse(id=template.id, rating=rating, rating_count=template.rating_count)
+    if RATING_QUEUE:
+        # Queued ratings are counted in the response right away; the row catches up on flush.
+        rating_queue.submit(template.id, payload.rating)
+        stored = select(IdeaTemplate.rating_sum, IdeaTemplate.rating_count).where(
+            IdeaTemplate.id == template.id
+        )
+        rating_sum, rating_count = rating_queue.with_pending(
+            template.id, lambda: tuple(db.execute(stored).one())
+        )
+    else:
+        template = rate_template(db, template, payload.rating)
+        rating_sum, rating_count = template.rating_sum, template.rating_count
+    rating = round(rating_sum / rating_count, 2) if rating_count else None
+    return TemplateRatingResponse(id=template.id, rating=rating, rating_count=rating_count)
@@ -32,6 +32,46 @@ class IdeaRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class IdeaPage(BaseModel):
+    items: list[IdeaRead]
+    next_cursor: str | None = None
+
+
+class SearchHit(BaseModel):
+    kind: Literal["idea", "template"]
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchPage(BaseModel):
+    items: list[SearchHit]
+    next_offset: int | None = None
+
+
+class RetrievedChunk(BaseModel):
+    kind: Literal["idea", "template"]
+    id: int
+    text: str
+    score: float
+    bm25_rank: int | None
+    dense_rank: int | None
+
+
+class RetrievalPage(BaseModel):
+    items: list[RetrievedChunk]
+
+
+class CalendarCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
+    size: int
+    maxsize: int
+
+
 class BriefBlock(BaseModel):
     id: str
     type: Literal["text", "heading", "quote", "checklist"]
@@ -70,6 +110,26 @@ class BriefContent(BaseModel):
     attachments: list[AttachmentItem] = Field(default_factory=list)
 
 
+class IdeaImportRecord(IdeaCreate):
+    """One NDJSON line of a bulk import; an export's ``id`` is ignored, the rest kept."""
+
+    created_at: datetime | None = None
+    completed: bool = False
+    completed_at: datetime | None = None
+    brief: BriefContent | None = None
+
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[ImportLineError]
+
+
 class BriefUpdate(BaseModel):
     content: BriefContent
     label: str | None = None
@@ -90,6 +150,17 @@ class IdeaBriefVersionRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class VersionCompactionStats(BaseModel):
+    runs: int
+    ideas_scanned: int
+    rows_pruned: int
+    rows_rebased: int
+    seconds: float
+    last_run_at: datetime | None
+    last_run_seconds: float
+    last_run_pruned: int
+
+
 class AttachmentSignRequest(BaseModel):
     filename: str
     content_type: str = "application/octet-stream"
@@ -104,6 +175,53 @@ class AttachmentSignResponse(BaseModel):
     content_type: str
 
 
+class AttachmentSignBatchRequest(BaseModel):
+    files: list[AttachmentSignRequest] = Field(..., min_length=1, max_length=100)
+
+
+class AttachmentSignBatchResponse(BaseModel):
+    # Same order as the request's ``files``.
+    uploads: list[AttachmentSignResponse]
+
+
+class MultipartUploadCreate(BaseModel):
+    filename: str
+    content_type: str = "application/octet-stream"
+    size: int = Field(..., gt=0)
+
+
+class MultipartPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+
+class MultipartUploadRead(BaseModel):
+    key: str
+    upload_id: str
+    url: str
+    content_type: str
+    part_size: int
+    parts: list[MultipartPartUrl]
+
+
+class MultipartPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=10_000)
+    etag: str = Field(..., min_length=1)
+
+
+class MultipartUploadComplete(BaseModel):
+    key: str
+    upload_id: str
+    filename: str
+    content_type: str = "application/octet-stream"
+    parts: list[MultipartPart] = Field(..., min_length=1, max_length=10_000)
+
+
+class MultipartUploadAbort(BaseModel):
+    key: str
+    upload_id: str
+
+
 class TemplateCreate(BaseModel):
     name: str = Field(..., min_length=3, max_length=120)
     body: str = Field(..., min_length=1, max_length=500)
@@ -147,3 +265,130 @@ class TemplateRatingResponse(BaseModel):
     id: int
     rating: float | None
     rating_count: int
+
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: Literal["queued", "leased", "done", "failed"]
+    priority: int
+    attempts: int
+    max_attempts: int
+    last_error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobStats(BaseModel):
+    queued: int
+    leased: int
+    done: int
+    failed: int
+
+
+class RecipeExample(BaseModel):
+    kind: Literal["template", "brief"]
+    source_id: int
+    block_id: str | None = None
+    text: str
+    weight: float
+
+
+class HookRecipe(BaseModel):
+    id: int
+    label: str
+    terms: list[str]
+    size: int
+    templates: int
+    briefs: int
+    weight: float
+    mean_weight: float
+    examples: list[RecipeExample]
+
+
+class HookGenerationRequest(BaseModel):
+    intent: str = Field(min_length=1, max_length=500)
+    count: int = Field(default=5, ge=1, le=20)
+    # Retrieved chunks quoted in the prompt (0 = no retrieval).
+    context: int = Field(default=6, ge=0, le=20)
+    kind: Literal["idea", "template"] | None = None
+
+
+class HookGeneration(BaseModel):
+    hooks: list[str]
+    context: list[RetrievedChunk]
+    cached: bool
+    near_duplicate: bool = False
+    elapsed_ms: float
+
+
+class ResponseCacheStats(BaseModel):
+    hits: int
+    near_hits: int
+    misses: int
+    hit_rate: float
+    saved_seconds: float
+    evictions: int
+    expirations: int
+    invalidations: int
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+
+
+class HookVariantsRequest(HookGenerationRequest):
+    """One LLM call per variant, each from its own angle (see app.generation.ANGLES)."""
+
+    count: int = Field(default=4, ge=1, le=8)
+    # Lower the server's per-request limits (CONTENTHUB_GENERATION_*); never raises them.
+    concurrency: int | None = Field(default=None, ge=1)
+    timeout: float | None = Field(default=None, gt=0)
+    # Append the finished hooks to the idea's brief (one versioned save) when the stream ends.
+    save: bool = True
+
+
+class HookVariantsContext(BaseModel):
+    chunks: list[RetrievedChunk]
+
+
+class HookVariant(BaseModel):
+    index: int
+    angle: str
+    hook: str | None = None
+    cached: bool = False
+    # "timeout", "empty" or the client's exception; ``hook`` is None when set.
+    error: str | None = None
+    elapsed_ms: float
+
+
+class HookVariantsDone(BaseModel):
+    completed: int
+    failed: int
+    saved: bool
+    brief_updated_at: datetime | None = None
+    elapsed_ms: float
+
+
+class AttachmentRead(BaseModel):
+    id: int
+    idea_id: int
+    idea_title: str
+    item_id: str
+    key: str
+    filename: str
+    url: str
+    content_type: str | None = None
+    size: int | None = None
+    # When the key first appeared in the idea's brief.
+    created_at: datetime
+
+
+class AttachmentUsage(BaseModel):
+    group: str
+    attachments: int
+    ideas: int
+    # Sum of the known sizes (attachments without a size count as 0).
+    bytes: int
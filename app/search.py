@@ -0,0 +1,249 @@
+"""Full-text search over ideas, briefs and templates backed by an SQLite FTS5 table.
+
+The ``search_index`` virtual table (declared in :mod:`app.models`) holds one row per idea
+(title; description plus the text of its brief's blocks, shot cues, CTAs and hashtags)
+and one per template (name; body and category). It is kept in sync from a session
+``after_flush`` hook, so every ORM write path updates the index inside its own
+transaction. Core bulk inserts bypass the hook and call :func:`reindex_ideas` themselves.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models import Idea, IdeaBrief, IdeaTemplate
+from app.schemas import SearchHit, SearchPage
+
+_IDEA_FIELDS = ("title", "description")
+_TEMPLATE_FIELDS = ("name", "body", "category")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Title matches weigh more than body matches in bm25 (lower scores rank first).
+_TITLE_WEIGHT = 8.0
+REINDEX_BATCH = 500
+_INSERT = text("INSERT INTO search_index (rowid, title, body) VALUES (:rowid, :title, :body)")
+
+
+def idea_rowid(idea_id: int) -> int:
+    return idea_id * 2
+
+
+def template_rowid(template_id: int) -> int:
+    return template_id * 2 + 1
+
+
+def brief_text(content: str | None) -> str:
+    """Flatten the searchable parts of stored brief JSON into one string."""
+    if not content:
+        return ""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return ""
+    parts = [block.get("text") for block in data.get("blocks") or ()]
+    parts += [shot.get("cue") for shot in data.get("shots") or ()]
+    parts += [cta.get("text") for cta in data.get("ctas") or ()]
+    parts += data.get("hashtags") or []
+    return "\n".join(part for part in parts if part)
+
+
+def _enabled(conn: Connection) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def _delete_rows(conn: Connection, rowids: list[int]) -> None:
+    if rowids:
+        conn.execute(
+            text("DELETE FROM search_index WHERE rowid = :rowid"),
+            [{"rowid": rowid} for rowid in rowids],
+        )
+
+
+def reindex_ideas(conn: Connection, idea_ids: Iterable[int]) -> None:
+    """Rewrite the index rows for ``idea_ids`` from the current ideas/briefs rows."""
+    idea_ids = list(dict.fromkeys(idea_ids))
+    if not idea_ids or not _enabled(conn):
+        return
+    for offset in range(0, len(idea_ids), REINDEX_BATCH):
+        chunk = idea_ids[offset : offset + REINDEX_BATCH]
+        rows = conn.execute(
+            text(
+                "SELECT ideas.id, ideas.title, ideas.description, idea_briefs.content "
+                "FROM ideas LEFT JOIN idea_briefs ON idea_briefs.idea_id = ideas.id "
+                "WHERE ideas.id IN (SELECT value FROM json_each(:ids))"
+            ),
+            {"ids": json.dumps(chunk)},
+        ).all()
+        _delete_rows(conn, [idea_rowid(idea_id) for idea_id in chunk])
+        if rows:
+            conn.execute(
+                _INSERT,
+                [
+                    {
+                        "rowid": idea_rowid(row.id),
+                        "title": row.title,
+                        "body": "\n".join(filter(None, (row.description, brief_text(row.content)))),
+                    }
+                    for row in rows
+                ],
+            )
+
+
+def reindex_templates(conn: Connection, template_ids: Iterable[int]) -> None:
+    template_ids = list(dict.fromkeys(template_ids))
+    if not template_ids or not _enabled(conn):
+        return
+    rows = conn.execute(
+        text(
+            "SELECT id, name, body, category FROM idea_templates "
+            "WHERE id IN (SELECT value FROM json_each(:ids))"
+        ),
+        {"ids": json.dumps(template_ids)},
+    ).all()
+    _delete_rows(conn, [template_rowid(template_id) for template_id in template_ids])
+    if rows:
+        conn.execute(
+            _INSERT,
+            [
+                {
+                    "rowid": template_rowid(row.id),
+                    "title": row.name,
+                    "body": "\n".join(filter(None, (row.body, row.category))),
+                }
+                for row in rows
+            ],
+        )
+
+
+def _changed(obj: object, fields: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@dataclass
+class SourceChanges:
+    """Ideas and templates whose indexed text a flush changed or removed."""
+
+    ideas: set[int] = field(default_factory=set)
+    templates: set[int] = field(default_factory=set)
+    dropped_ideas: set[int] = field(default_factory=set)
+    dropped_templates: set[int] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.ideas or self.templates or self.dropped_ideas or self.dropped_templates)
+
+
+def source_changes(session: Session, idea_fields: Iterable[str] = _IDEA_FIELDS) -> SourceChanges:
+    """Inspect a session's new/dirty/deleted objects (call from ``after_flush``).
+
+    An updated idea only counts when one of ``idea_fields`` changed.
+    """
+    changes = SourceChanges()
+    for obj in session.new:
+        if isinstance(obj, Idea):
+            changes.ideas.add(obj.id)
+        elif isinstance(obj, IdeaBrief):
+            changes.ideas.add(obj.idea_id)
+        elif isinstance(obj, IdeaTemplate):
+            changes.templates.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Idea) and _changed(obj, idea_fields):
+            changes.ideas.add(obj.id)
+        elif isinstance(obj, IdeaBrief) and _changed(obj, ("content",)):
+            changes.ideas.add(obj.idea_id)
+        elif isinstance(obj, IdeaTemplate) and _changed(obj, _TEMPLATE_FIELDS):
+            changes.templates.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Idea):
+            changes.dropped_ideas.add(obj.id)
+        elif isinstance(obj, IdeaTemplate):
+            changes.dropped_templates.add(obj.id)
+        elif isinstance(obj, IdeaBrief):
+            changes.ideas.add(obj.idea_id)
+    changes.ideas -= changes.dropped_ideas
+    changes.templates -= changes.dropped_templates
+    return changes
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session: Session, flush_context) -> None:
+    changes = source_changes(session)
+    if not changes:
+        return
+    conn = session.connection()
+    if not _enabled(conn):
+        return
+    _delete_rows(
+        conn,
+        [idea_rowid(idea_id) for idea_id in changes.dropped_ideas]
+        + [template_rowid(template_id) for template_id in changes.dropped_templates],
+    )
+    reindex_ideas(conn, changes.ideas)
+    reindex_templates(conn, changes.templates)
+
+
+def rebuild_search_index(engine: Engine) -> None:
+    """Re-create every index row from the source tables (used to backfill old databases)."""
+    with engine.begin() as conn:
+        if not _enabled(conn):
+            return
+        conn.execute(text("DELETE FROM search_index"))
+        reindex_ideas(conn, conn.execute(text("SELECT id FROM ideas")).scalars())
+        reindex_templates(conn, conn.execute(text("SELECT id FROM idea_templates")).scalars())
+
+
+def fts_query(raw: str) -> str | None:
+    """Turn free text into a safe FTS5 query: AND of quoted terms, last one as a prefix."""
+    terms = _TOKEN.findall(raw.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(
+    db: Session,
+    q: str,
+    *,
+    kind: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> SearchPage:
+    """Ranked (bm25) search; ``kind`` restricts hits to ``"idea"`` or ``"template"``."""
+    match = fts_query(q)
+    if match is None:
+        return SearchPage(items=[])
+    params = {"match": match, "limit": limit + 1, "offset": offset}
+    kind_filter = ""
+    if kind is not None:
+        kind_filter = "AND rowid % 2 = :parity "
+        params["parity"] = 1 if kind == "template" else 0
+    rows = db.execute(
+        text(
+            "SELECT rowid, title, "
+            "snippet(search_index, -1, '**', '**', '…', 12) AS snippet, "
+            f"bm25(search_index, {_TITLE_WEIGHT}, 1.0) AS score "
+            "FROM search_index WHERE search_index MATCH :match "
+            + kind_filter
+            + "ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        params,
+    ).all()
+    items = [
+        SearchHit(
+            kind="template" if row.rowid % 2 else "idea",
+            id=row.rowid // 2,
+            title=row.title,
+            snippet=row.snippet,
+            score=-row.score,
+        )
+        for row in rows[:limit]
+    ]
+    return SearchPage(items=items, next_offset=offset + limit if len(rows) > limit else None)
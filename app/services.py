@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
+import json
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta, timezone
 from typing import Iterable
 
 from fastapi import HTTPException, status
-from sqlalchemy import case
-from sqlalchemy.orm import Session
-
-from app.models import Idea, IdeaBrief, IdeaBriefVersion, IdeaTemplate
-from app.schemas import BriefContent
+from sqlalchemy import Float, Select, bindparam, cast, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer, joinedload
+
+from app.attachments import sync_attachments
+from app.config import JOB_MAX_ATTEMPTS, VERSION_KEYFRAME_INTERVAL
+from app.lib import brief_codec
+from app.lib.cache import brief_content_cache, calendar_cache, template_cache
+from app.lib.calendar import window_bounds
+from app.models import Idea, IdeaBrief, IdeaBriefVersion, IdeaTemplate, Job, utc_now
+from app.patterns import queue_mining
+from app.rag.index import note_changes
+from app.schemas import AttachmentItem, BriefContent, IdeaImportRecord, IdeaRead, TemplateRead
+from app.search import reindex_ideas
 
 DEFAULT_TEMPLATE_SEED = [
     {
@@ -42,6 +53,28 @@ def fetch_idea(db: Session, idea_id: int) -> Idea:
     return idea
 
 
+def ideas_with_briefs_query(idea_ids: Iterable[int]) -> Select:
+    """Ideas with their briefs joined in, so a brief read is a single round trip."""
+    return select(Idea).options(joinedload(Idea.brief)).where(Idea.id.in_(list(idea_ids)))
+
+
+def fetch_idea_with_brief(db: Session, idea_id: int) -> Idea:
+    """Return an idea with ``idea.brief`` already loaded, or raise a 404."""
+    idea = db.scalars(ideas_with_briefs_query([idea_id])).first()
+    if not idea:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Idea not found",
+        )
+    return idea
+
+
+def ideas_with_briefs(db: Session, idea_ids: list[int]) -> list[Idea]:
+    """Return ideas (briefs eager-loaded) in the order requested; unknown ids are skipped."""
+    found = {idea.id: idea for idea in db.scalars(ideas_with_briefs_query(idea_ids)).unique()}
+    return [found[idea_id] for idea_id in dict.fromkeys(idea_ids) if idea_id in found]
+
+
 def toggle_completion(idea: Idea) -> None:
     """Flip the completion flag and timestamp."""
     idea.completed = not idea.completed
@@ -58,27 +91,186 @@ def ideas_in_range(db: Session, start: date, end: date) -> list[Idea]:
     )
 
 
+IdeaSeekKey = tuple[date, datetime, int]
+
+
+def ideas_page(
+    db: Session,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    after: IdeaSeekKey | None = None,
+    limit: int = 100,
+) -> tuple[list[Idea], IdeaSeekKey | None]:
+    """Return one keyset page of ideas plus the seek key for the next page (None when done).
+
+    Rows are ordered by ``(target_date, created_at, id)`` which is exactly the composite
+    index, so each page is a bounded index range scan no matter how deep the cursor is.
+    """
+    query = db.query(Idea)
+    if start is not None:
+        query = query.filter(Idea.target_date >= start)
+    if end is not None:
+        query = query.filter(Idea.target_date <= end)
+    if after is not None:
+        query = query.filter(tuple_(Idea.target_date, Idea.created_at, Idea.id) > tuple_(*after))
+    rows = (
+        query.order_by(Idea.target_date.asc(), Idea.created_at.asc(), Idea.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], (last.target_date, last.created_at, last.id)
+
+
+def calendar_window(db: Session, year: int, month: int) -> list[IdeaRead]:
+    """Return the serialized ideas for a month grid, served from the window cache when warm."""
+    start, end = window_bounds(year, month)
+    return calendar_cache.get_or_load(
+        (year, month),
+        lambda: [IdeaRead.model_validate(idea) for idea in ideas_in_range(db, start, end)],
+    )
+
+
+def _stored_utc(value: datetime | None) -> datetime | None:
+    """Naive UTC, as SQLite keeps ``utc_now()`` values; naive input is taken as UTC already."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bulk_insert_ideas(db: Session, records: list[IdeaImportRecord]) -> list[int]:
+    """Insert ideas (and their briefs) with two executemany statements; commits once."""
+    if not records:
+        return []
+    idea_ids = db.scalars(
+        insert(Idea).returning(Idea.id, sort_by_parameter_order=True),
+        [
+            {
+                "title": record.title.strip(),
+                "description": record.description,
+                "target_date": record.target_date,
+                "created_at": _stored_utc(record.created_at or utc_now()),
+                "completed": record.completed,
+                "completed_at": _stored_utc(record.completed_at),
+            }
+            for record in records
+        ],
+    ).all()
+    brief_rows = [
+        {"idea_id": idea_id, "content": record.brief.model_dump_json()}
+        for idea_id, record in zip(idea_ids, records, strict=True)
+        if record.brief is not None
+    ]
+    if brief_rows:
+        db.execute(insert(IdeaBrief), brief_rows)
+    # Bulk inserts skip the flush hooks that maintain the search and retrieval indexes and
+    # the attachment catalogue, and queue pattern mining.
+    reindex_ideas(db.connection(), idea_ids)
+    sync_attachments(db.connection(), [row["idea_id"] for row in brief_rows])
+    note_changes(db, ideas=idea_ids)
+    queue_mining(db.connection(), ideas=[row["idea_id"] for row in brief_rows])
+    db.commit()
+    calendar_cache.invalidate_dates(*{record.target_date for record in records})
+    return list(idea_ids)
+
+
+def iter_export_lines(db: Session, batch_size: int = 1000) -> Iterator[str]:
+    """Yield one NDJSON line per idea, streaming rows instead of loading the table.
+
+    Stored brief JSON is spliced into the line verbatim rather than parsed and re-dumped.
+    """
+    rows = db.execute(
+        select(
+            Idea.id,
+            Idea.title,
+            Idea.description,
+            Idea.target_date,
+            Idea.created_at,
+            Idea.completed,
+            Idea.completed_at,
+            IdeaBrief.content,
+        )
+        .outerjoin(IdeaBrief, IdeaBrief.idea_id == Idea.id)
+        .order_by(Idea.id.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        meta = json.dumps(
+            {
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "target_date": row.target_date.isoformat(),
+                "created_at": row.created_at.isoformat(),
+                "completed": row.completed,
+                "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+            },
+            ensure_ascii=False,
+        )
+        brief = row.content if row.content else "null"
+        yield f'{meta[:-1]}, "brief": {brief}}}\n'
+
+
 def _blank_brief_content() -> BriefContent:
     return BriefContent()
 
 
-def get_or_create_brief(db: Session, idea: Idea) -> IdeaBrief:
-    """Return a brief for the idea, creating a blank canvas on first access."""
-    if idea.brief:
-        return idea.brief
-    brief = IdeaBrief(idea_id=idea.id, content=_blank_brief_content().model_dump_json())
-    db.add(brief)
-    db.commit()
-    db.refresh(brief)
-    return brief
+_BLANK_BRIEF_JSON = BriefContent().model_dump_json()
+
+
+def brief_timestamp(idea: Idea) -> datetime:
+    """The brief's ``updated_at``; an idea without a saved brief reports its ``created_at``.
+
+    Reads never insert: until the first save the brief is a synthesized blank canvas.
+    """
+    return idea.brief.updated_at if idea.brief is not None else idea.created_at
+
+
+def brief_state_query(idea_id: int) -> Select:
+    return (
+        select(func.coalesce(IdeaBrief.updated_at, Idea.created_at))
+        .select_from(Idea)
+        .outerjoin(IdeaBrief, IdeaBrief.idea_id == Idea.id)
+        .where(Idea.id == idea_id)
+    )
+
+
+def brief_updated_at(db: Session, idea_id: int) -> datetime | None:
+    """Return :func:`brief_timestamp` for an idea without loading any content (None if missing)."""
+    return db.scalar(brief_state_query(idea_id))
+
+
+def brief_content_json(brief: IdeaBrief | None) -> str:
+    """Return the stored brief JSON for splicing into a response without re-parsing it.
+
+    Content is validated once on write (``stage_brief_update`` stores ``model_dump_json``
+    output), so the text is already exactly what serializing the model would produce.
+    """
+    content = brief.content if brief is not None else None
+    return content if content and content != "{}" else _BLANK_BRIEF_JSON
 
 
 def parse_brief_content(brief: IdeaBrief) -> BriefContent:
-    """Safely parse the stored JSON payload into a BriefContent object."""
+    """Safely parse the stored JSON payload into a BriefContent object.
+
+    Results are cached per ``(brief.id, updated_at)`` and shared: do not mutate them.
+    """
+    key = (brief.id, brief.updated_at)
+    cacheable = brief.id is not None and brief.updated_at is not None
+    if cacheable:
+        cached = brief_content_cache.get(key)
+        if cached is not None:
+            return cached
     try:
-        return BriefContent.model_validate_json(brief.content or "{}")
+        content = BriefContent.model_validate_json(brief.content or "{}")
     except ValueError:
         return _blank_brief_content()
+    if cacheable:
+        brief_content_cache.put(key, content)
+    return content
 
 
 def update_brief(
@@ -87,27 +279,151 @@ def update_brief(
     content: BriefContent,
     autosave: bool = False,
     label: str | None = None,
+    expected_updated_at: datetime | None = None,
 ) -> IdeaBrief:
-    """Persist the latest brief content and optionally snapshot an autosave version."""
-    brief = get_or_create_brief(db, idea)
-    brief.content = content.model_dump_json()
-    if autosave:
-        db.add(
-            IdeaBriefVersion(
-                idea_id=idea.id,
-                snapshot=brief.content,
-                label=label,
-            )
+    """Persist the latest brief content and optionally snapshot an autosave version.
+
+    With ``expected_updated_at`` the write only happens if the stored brief still carries
+    that timestamp (an ``If-Match`` precondition); otherwise a 412 is raised.
+    """
+    if expected_updated_at is not None and idea.brief is not None:
+        # Compare-and-set on updated_at: the claim also takes SQLite's write lock, so no
+        # other editor can slip in between the check and the content update below.
+        claimed = db.execute(
+            update(IdeaBrief)
+            .where(IdeaBrief.idea_id == idea.id, IdeaBrief.updated_at == expected_updated_at)
+            .values(updated_at=utc_now())
+            .execution_options(synchronize_session=False)
         )
-    db.commit()
+        if claimed.rowcount != 1:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Brief was modified by another editor",
+            )
+    brief = stage_brief_update(db, idea, content, autosave=autosave, label=label)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if expected_updated_at is None:
+            raise
+        # A blank canvas has no row to claim; a racing first save trips unique(idea_id).
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Brief was modified by another editor",
+        ) from None
     db.refresh(brief)
     return brief
 
 
+def brief_attachment(idea: Idea, key: str) -> AttachmentItem | None:
+    """The brief's attachment stored under ``key``, if any."""
+    if idea.brief is None:
+        return None
+    return next(
+        (item for item in parse_brief_content(idea.brief).attachments if item.key == key), None
+    )
+
+
+def add_attachment(db: Session, idea: Idea, item: AttachmentItem) -> IdeaBrief:
+    """Append an uploaded file to the brief and commit; a key already attached is kept."""
+    content = parse_brief_content(idea.brief) if idea.brief is not None else BriefContent()
+    if any(existing.key == item.key for existing in content.attachments):
+        return idea.brief
+    # Parsed content is shared through brief_content_cache: copy, never mutate.
+    content = content.model_copy(update={"attachments": [*content.attachments, item]})
+    return update_brief(db, idea, content)
+
+
+def stage_brief_update(
+    db: Session,
+    idea: Idea,
+    content: BriefContent,
+    autosave: bool = False,
+    label: str | None = None,
+    updated_at: datetime | None = None,
+) -> IdeaBrief:
+    """Apply brief content (plus an optional version row) to the session without committing.
+
+    ``updated_at`` pins the brief's timestamp (the autosave buffer passes the time the
+    edit was accepted, so the brief's ETag does not change when it is flushed).
+    """
+    brief = idea.brief
+    if brief is None:
+        brief = IdeaBrief(idea_id=idea.id)
+        idea.brief = brief
+    brief.content = content.model_dump_json()
+    if updated_at is not None:
+        brief.updated_at = updated_at
+    if autosave:
+        db.add(build_version(db, idea.id, brief.content, label=label))
+    return brief
+
+
+def _latest_keyframe(db: Session, idea_id: int) -> IdeaBriefVersion | None:
+    return (
+        db.query(IdeaBriefVersion)
+        .filter(IdeaBriefVersion.idea_id == idea_id, IdeaBriefVersion.base_version_id.is_(None))
+        .order_by(IdeaBriefVersion.id.desc())
+        .first()
+    )
+
+
+def build_version(
+    db: Session,
+    idea_id: int,
+    content_json: str,
+    label: str | None = None,
+) -> IdeaBriefVersion:
+    """Return an unsaved version row encoded as a delta or keyframe (see brief_codec)."""
+    keyframe = _latest_keyframe(db, idea_id)
+    since = 0
+    if keyframe is not None:
+        since = (
+            db.query(func.count(IdeaBriefVersion.id))
+            .filter(IdeaBriefVersion.idea_id == idea_id, IdeaBriefVersion.id > keyframe.id)
+            .scalar()
+        )
+    snapshot, base_id = brief_codec.encode_snapshot(
+        content_json,
+        (keyframe.id, keyframe.snapshot) if keyframe is not None else None,
+        since,
+        VERSION_KEYFRAME_INTERVAL,
+    )
+    return IdeaBriefVersion(
+        idea_id=idea_id,
+        snapshot=snapshot,
+        base_version_id=base_id,
+        label=label,
+    )
+
+
+def version_content(db: Session, version: IdeaBriefVersion) -> BriefContent:
+    """Decode a stored version snapshot (keyframe, delta or legacy JSON)."""
+    try:
+        if version.base_version_id is None:
+            payload = brief_codec.decode_keyframe(version.snapshot)
+        else:
+            base = db.get(IdeaBriefVersion, version.base_version_id)
+            if base is None:
+                raise brief_codec.SnapshotDecodeError("Keyframe is missing")
+            payload = brief_codec.apply_delta(
+                brief_codec.decode_keyframe(base.snapshot), version.snapshot
+            )
+    except brief_codec.SnapshotDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Autosave snapshot is unreadable",
+        ) from exc
+    return BriefContent.model_validate(payload)
+
+
 def list_versions(db: Session, idea: Idea, limit: int = 10) -> list[IdeaBriefVersion]:
     """Return the most recent autosave versions for display."""
     return (
         db.query(IdeaBriefVersion)
+        .options(defer(IdeaBriefVersion.snapshot))
         .filter(IdeaBriefVersion.idea_id == idea.id)
         .order_by(IdeaBriefVersion.created_at.desc())
         .limit(limit)
@@ -120,40 +436,60 @@ def restore_version(db: Session, version_id: int) -> tuple[IdeaBriefVersion, Bri
     version = db.query(IdeaBriefVersion).filter(IdeaBriefVersion.id == version_id).first()
     if not version:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Autosave not found")
-    content = BriefContent.model_validate_json(version.snapshot)
-    return version, content
+    return version, version_content(db, version)
 
 
 def ensure_seed_templates(db: Session) -> None:
-    """Populate the templates table with baseline snippets exactly once."""
+    """Populate the templates table with baseline snippets exactly once (run at startup)."""
     existing = db.query(IdeaTemplate.id).first()
     if existing:
         return
     for data in DEFAULT_TEMPLATE_SEED:
         db.add(IdeaTemplate(**data))
     db.commit()
+    template_cache.invalidate()
+
+
+def template_read(template: IdeaTemplate) -> TemplateRead:
+    rating = None
+    if template.rating_count:
+        rating = round(template.rating_sum / template.rating_count, 2)
+    return TemplateRead(
+        id=template.id,
+        name=template.name,
+        body=template.body,
+        category=template.category,
+        favorite=template.favorite,
+        created_at=template.created_at,
+        rating=rating,
+        rating_count=template.rating_count,
+    )
 
 
 def list_templates(db: Session) -> Iterable[IdeaTemplate]:
-    """Return templates ordered by favorites and rating."""
-    ensure_seed_templates(db)
-    rating_score = case(
-        (IdeaTemplate.rating_count > 0, IdeaTemplate.rating_sum / IdeaTemplate.rating_count),
-        else_=0,
-    )
+    """Return templates ordered by favorites and rating (served by ix_idea_templates_ranking)."""
     return (
         db.query(IdeaTemplate)
-        .order_by(IdeaTemplate.favorite.desc(), rating_score.desc(), IdeaTemplate.created_at.asc())
+        .order_by(
+            IdeaTemplate.favorite.desc(),
+            IdeaTemplate.rating_score.desc(),
+            IdeaTemplate.created_at.asc(),
+        )
         .all()
     )
 
 
+def ranked_templates(db: Session) -> list[TemplateRead]:
+    """Return the ranked template list, from memory unless a template write invalidated it."""
+    return template_cache.get_or_load(lambda: [template_read(t) for t in list_templates(db)])
+
+
 def create_template(db: Session, name: str, body: str, category: str | None = None) -> IdeaTemplate:
-    ensure_seed_templates(db)
     template = IdeaTemplate(name=name, body=body, category=category)
     db.add(template)
     db.commit()
     db.refresh(template)
+    template_cache.invalidate()
     return template
 
 
@@ -183,6 +519,7 @@ def update_template(
         template.favorite = favorite
     db.commit()
     db.refresh(template)
+    template_cache.invalidate()
     return template
 
 
@@ -190,12 +527,67 @@ def toggle_template_favorite(db: Session, template: IdeaTemplate, favorite: bool
     template.favorite = favorite
     db.commit()
     db.refresh(template)
+    template_cache.invalidate()
     return template
 
 
+def apply_template_ratings(db: Session, totals: dict[int, tuple[int, int]]) -> None:
+    """Add ``{template_id: (rating_sum, rating_count)}`` server-side; does not commit.
+
+    One executemany UPDATE increments the counters in SQL (no read-modify-write in Python,
+    so concurrent raters cannot lose updates) and recomputes ``rating_score`` alongside.
+    """
+    if not totals:
+        return
+    table = IdeaTemplate.__table__
+    new_sum = table.c.rating_sum + bindparam("add_sum")
+    new_count = table.c.rating_count + bindparam("add_count")
+    db.connection().execute(
+        update(table)
+        .where(table.c.id == bindparam("template_id"))
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_score=cast(new_sum, Float) / new_count,
+        ),
+        [
+            {"template_id": template_id, "add_sum": rating_sum, "add_count": rating_count}
+            for template_id, (rating_sum, rating_count) in totals.items()
+        ],
+    )
+    # Core UPDATE: the flush hook never sees it, so re-weigh the templates' hooks here.
+    queue_mining(db.connection(), templates=totals)
+
+
 def rate_template(db: Session, template: IdeaTemplate, rating: int) -> IdeaTemplate:
-    template.rating_sum += rating
-    template.rating_count += 1
+    apply_template_ratings(db, {template.id: (rating, 1)})
     db.commit()
     db.refresh(template)
+    template_cache.invalidate()
     return template
+
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    payload: dict | None = None,
+    *,
+    priority: int = 0,
+    delay: float = 0.0,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> Job:
+    """Add a background job to ``db``; it is queued when the caller commits.
+
+    Enqueueing inside the caller's transaction means a job is never left behind for a
+    write that rolled back. Handlers are registered in :mod:`app.jobs`.
+    """
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}, separators=(",", ":")),
+        priority=priority,
+        max_attempts=max_attempts,
+        available_at=utc_now() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    db.flush()
+    return job
@@ -2,10 +2,37 @@
 
 from __future__ import annotations
 
+from pathlib import Path
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import (
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
+
+from app.config import JINJA_BYTECODE_CACHE, JINJA_CACHE_DIR, TEMPLATE_DIR
+
+
+def bytecode_cache() -> BytecodeCache | None:
+    """Compiled templates on disk, so new workers skip parsing and compiling them."""
+    if not JINJA_BYTECODE_CACHE:
+        return None
+    if not JINJA_CACHE_DIR:
+        return FileSystemBytecodeCache()
+    directory = Path(JINJA_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(str(directory))
 
-from app.config import TEMPLATE_DIR
 
-templates = Jinja2Templates(directory=str(TEMPLATE_DIR))
+templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache(),
+    )
+)
 
-__all__ = ["templates"]
+__all__ = ["bytecode_cache", "templates"]
@@ -0,0 +1,44 @@
+"""Small helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import statistics
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def temp_sqlite_url(name: str = "bench.db") -> Iterator[str]:
+    """Yield a SQLite URL inside a throwaway directory."""
+    with tempfile.TemporaryDirectory(prefix="contenthub-bench-") as tmp:
+        yield f"sqlite:///{Path(tmp) / name}"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn: Callable[[], object], repeat: int) -> list[float]:
+    """Return per-call wall times in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(label: str, samples_ms: list[float]) -> str:
+    if not samples_ms:
+        return f"{label:<32} n=0"
+    return (
+        f"{label:<32} n={len(samples_ms):<6} mean={statistics.fmean(samples_ms):8.3f}ms "
+        f"p50={percentile(samples_ms, 50):8.3f}ms p95={percentile(samples_ms, 95):8.3f}ms"
+    )
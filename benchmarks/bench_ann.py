@@ -0,0 +1,139 @@
+"""IVF-PQ index vs the exact dense scan: build, cold open, query latency and recall@10.
+
+Chunks are synthetic topic-structured texts -- 30 of their 40 words come from one of
+``--topics`` small topical vocabularies, the rest from the Zipf vocabulary used by
+``bench_search`` -- embedded with the hashing embedder. Queries are held-out chunks with
+a third of their words dropped; ground truth is the exact inner-product top 10.
+
+    python -m benchmarks.bench_ann --chunks 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.rag import HashingEmbedder
+from app.rag.ann import IVFPQIndex
+from benchmarks._common import summarize, time_calls
+from benchmarks.bench_search import vocabulary
+
+BATCH = 65_536
+
+
+def topic_texts(count: int, topics: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocab, cum_weights = vocabulary()
+    topic_rng = random.Random(1)
+    topic_words = [topic_rng.sample(vocab[200:], 30) for _ in range(topics)]
+    texts = []
+    for _ in range(count):
+        words = rng.choices(topic_words[rng.randrange(topics)], k=30)
+        words += rng.choices(vocab, cum_weights=cum_weights, k=10)
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    return texts
+
+
+def perturbed(texts: list[str], seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(word for word in text.split() if rng.random() > 1 / 3) for text in texts]
+
+
+def exact_top(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def bench_size(size: int, args: argparse.Namespace) -> None:
+    embedder = HashingEmbedder(dim=args.dim)
+    with tempfile.TemporaryDirectory(prefix="contenthub-bench-") as tmp:
+        path = Path(tmp) / "bench.ann"
+        index = IVFPQIndex(path, args.dim, m=args.m, signature=embedder.signature)
+        matrix = np.empty((size, args.dim), dtype=np.float32)
+        embed_seconds = upsert_seconds = 0.0
+        for start in range(0, size, BATCH):
+            count = min(BATCH, size - start)
+            texts = topic_texts(count, args.topics, seed=start)
+            started = time.perf_counter()
+            matrix[start : start + count] = embedder.embed(texts)
+            embed_seconds += time.perf_counter() - started
+            keys = np.arange(start, start + count, dtype=np.int64)
+            started = time.perf_counter()
+            index.upsert(keys, keys, matrix[start : start + count])
+            upsert_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        index.compact()
+        train_seconds = time.perf_counter() - started
+        stats = index.stats
+        index.close()
+        print(
+            f"\n== {size:,} chunks, dim {args.dim}, m {args.m}: nlist={stats['nlist']}, "
+            f"embed {embed_seconds:.1f}s, append {upsert_seconds:.1f}s, "
+            f"train+compact {train_seconds:.1f}s"
+        )
+
+        queries = embedder.embed(perturbed(topic_texts(args.queries, args.topics, seed=-1), 2))
+        started = time.perf_counter()
+        index = IVFPQIndex(path, args.dim, m=args.m, signature=embedder.signature)
+        index.search(queries[0], 10)
+        cold = time.perf_counter() - started
+        print(f"cold open + first query {cold * 1000:8.1f}ms (re-embedding: {embed_seconds:.1f}s)")
+
+        truth = [set(exact_top(matrix, query, 10).tolist()) for query in queries]
+        exact = [
+            ms
+            for query in queries
+            for ms in time_calls(lambda q=query: exact_top(matrix, q, 10), 1)
+        ]
+        print(summarize("exact scan", exact))
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            samples, hits = [], 0
+            for query, expected in zip(queries, truth, strict=True):
+                started = time.perf_counter()
+                keys, _ = index.search(query, 10)
+                samples.append((time.perf_counter() - started) * 1000)
+                hits += len(expected & set(keys.tolist()))
+            recall = hits / (10 * len(queries))
+            print(f"{summarize(f'ivf-pq nprobe={nprobe}', samples)} recall@10={recall:.3f}")
+
+        fresh = embedder.embed(topic_texts(args.updates, args.topics, seed=size))
+        keys = np.arange(size, size + args.updates, dtype=np.int64)
+        inserts = [
+            ms
+            for n in range(args.updates)
+            for ms in time_calls(
+                lambda n=n: index.upsert(keys[n : n + 1], keys[n : n + 1], fresh[n : n + 1]), 1
+            )
+        ]
+        print(summarize("single-row upsert", inserts))
+        deletes = [
+            ms for key in keys.tolist() for ms in time_calls(lambda key=key: index.remove([key]), 1)
+        ]
+        print(summarize("single-row delete", deletes))
+        index.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--m", type=int, default=32)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+    for size in args.chunks:
+        bench_size(size, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Attachment queries: the ``attachments`` catalogue vs loading and parsing every brief.
+
+Seeds ``--ideas`` ideas whose briefs carry ``--per-brief`` attachments drawn from a pool
+of shared clips, then times "which ideas use this clip" and per-month storage totals both
+ways, and the full backfill that fills the catalogue for an existing database.
+
+    python -m benchmarks.bench_attachments --ideas 50000 --per-brief 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.attachments import attachment_usage, backfill_attachments, list_attachments
+from app.models import IdeaBrief
+from app.schemas import AttachmentItem, BriefContent, IdeaImportRecord
+from app.services import bulk_insert_ideas, parse_brief_content
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+
+
+def records(count: int, per_brief: int, clips: int, rng: random.Random) -> list[IdeaImportRecord]:
+    start = date(2025, 1, 1)
+    return [
+        IdeaImportRecord(
+            title=f"Idea {n}",
+            target_date=start + timedelta(days=rng.randrange(365)),
+            brief=BriefContent(
+                attachments=[
+                    AttachmentItem(
+                        id=f"a{n}-{slot}",
+                        filename=f"clip-{clip}.mp4",
+                        url=f"https://cdn.example.com/briefs/clip-{clip}.mp4",
+                        key=f"briefs/clip-{clip}.mp4",
+                        content_type=rng.choice(["video/mp4", "video/quicktime", "image/png"]),
+                        size=rng.randrange(10**6, 10**9),
+                    )
+                    for slot, clip in enumerate(rng.sample(range(clips), per_brief))
+                ]
+            ),
+        )
+        for n in range(count)
+    ]
+
+
+def parse_all(db, key: str | None) -> object:
+    """The pre-catalogue way: read and parse every brief."""
+    users, totals = [], defaultdict(int)
+    for brief in db.scalars(select(IdeaBrief).execution_options(yield_per=1000)):
+        for item in parse_brief_content(brief).attachments:
+            if key is None:
+                totals[brief.updated_at.strftime("%Y-%m")] += item.size or 0
+            elif item.key == key:
+                users.append(brief.idea_id)
+    return users if key is not None else totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ideas", type=int, default=20_000)
+    parser.add_argument("--per-brief", type=int, default=4)
+    parser.add_argument("--clips", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(11)
+    with temp_sqlite_url() as url:
+        database.configure_database(url)
+        database.Base.metadata.create_all(bind=database.engine)
+        db = sessionmaker(bind=database.engine)()
+        for offset in range(0, args.ideas, 1000):
+            count = min(1000, args.ideas - offset)
+            bulk_insert_ideas(db, records(count, args.per_brief, args.clips, rng))
+        key = "briefs/clip-42.mp4"
+
+        print(
+            summarize(
+                "which ideas use a clip: parse", time_calls(lambda: parse_all(db, key), args.repeat)
+            )
+        )
+        lookup = time_calls(lambda: list_attachments(db, key=key), args.repeat * 20)
+        print(summarize("which ideas use a clip: table", lookup))
+        print(
+            summarize(
+                "bytes per month: parse", time_calls(lambda: parse_all(db, None), args.repeat)
+            )
+        )
+        usage = time_calls(lambda: attachment_usage(db, "month"), args.repeat)
+        print(summarize("bytes per month: table", usage))
+
+        db.close()
+        started = time.perf_counter()
+        synced = backfill_attachments(database.engine)
+        print(f"backfill: {synced} briefs in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Brief read latency: parse + re-serialize vs splicing the stored JSON into the envelope.
+
+Builds briefs with 1k+ blocks (plus shots and attachments), stores them through
+``update_brief`` and times the old ``model_validate_json`` -> ``IdeaBriefRead`` ->
+JSON round trip against the zero-reparse read path and the parsed-content cache.
+
+    python -m benchmarks.bench_brief_read --blocks 1000 5000 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.models import Idea
+from app.routers.ideas import _brief_json_response
+from app.schemas import AttachmentItem, BriefBlock, BriefContent, IdeaBriefRead, ShotListItem
+from app.services import parse_brief_content, update_brief
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+from benchmarks.bench_version_codec import WORDS
+
+
+def large_brief(blocks: int, seed: int = 3) -> BriefContent:
+    rng = random.Random(seed)
+    return BriefContent(
+        blocks=[
+            BriefBlock(
+                id=f"b{n}",
+                type=rng.choice(["text", "heading", "quote", "checklist"]),
+                text=" ".join(rng.choice(WORDS) for _ in range(16)),
+                checked=rng.random() < 0.2,
+            )
+            for n in range(blocks)
+        ],
+        shots=[
+            ShotListItem(id=f"s{n}", cue=" ".join(rng.choice(WORDS) for _ in range(6)))
+            for n in range(blocks // 10)
+        ],
+        attachments=[
+            AttachmentItem(
+                id=f"a{n}",
+                filename=f"clip-{n}.mp4",
+                url=f"https://cdn.example.com/uploads/clip-{n}.mp4",
+                key=f"uploads/clip-{n}.mp4",
+                content_type="video/mp4",
+                size=rng.randrange(10**6, 10**8),
+            )
+            for n in range(blocks // 20)
+        ],
+        hashtags=["#studytok", "#founder"],
+    )
+
+
+def bench_size(db, blocks: int, repeat: int) -> None:
+    idea = Idea(title=f"{blocks} blocks", target_date=date.today())
+    db.add(idea)
+    db.commit()
+    brief = update_brief(db, idea, large_brief(blocks))
+
+    def reparse() -> bytes:
+        content = BriefContent.model_validate_json(brief.content)
+        envelope = IdeaBriefRead(idea_id=idea.id, updated_at=brief.updated_at, content=content)
+        return envelope.model_dump_json().encode()
+
+    def splice() -> bytes:
+        return _brief_json_response(idea.id, brief, brief.updated_at).body
+
+    parse_brief_content(brief)
+    print(f"-- {blocks} blocks, {len(brief.content) / 1024:.0f} KiB stored")
+    print(summarize("parse + re-serialize (before)", time_calls(reparse, repeat)))
+    print(summarize("spliced stored JSON", time_calls(splice, repeat)))
+    print(
+        summarize(
+            "parsed model, cache warm",
+            time_calls(lambda: parse_brief_content(brief), repeat),
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with temp_sqlite_url() as url:
+        engine = database._build_engine(url)
+        database.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            for blocks in args.blocks:
+                bench_size(db, blocks, args.repeat)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
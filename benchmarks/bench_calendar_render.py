@@ -0,0 +1,110 @@
+"""Calendar page render time: full re-render vs cached day/week fragments.
+
+Builds a month with ``--per-day`` ideas on each of the 42 visible days and times
+``render_calendar`` three ways: with the fragment cache disabled (every cell rendered on
+every request), with a warm cache, and with a warm cache where one idea is toggled
+before each request (the week holding it re-renders one cell). It also times compiling
+the calendar templates in a fresh Jinja environment, as a new worker does, with and
+without the bytecode cache.
+
+    python -m benchmarks.bench_calendar_render --per-day 100 300 --repeat 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+from datetime import date, datetime, timezone
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from starlette.requests import Request
+
+from app.config import TEMPLATE_DIR
+from app.lib.cache import calendar_fragments
+from app.lib.calendar import month_context
+from app.routers.pages import render_calendar
+from app.schemas import IdeaRead
+from benchmarks._common import summarize, time_calls
+from benchmarks.bench_version_codec import WORDS
+
+TEMPLATES = ("calendar.html", "_day_card.html")
+
+
+def month_ideas(ctx: dict, per_day: int, seed: int = 3) -> list[IdeaRead]:
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    days = [day for week in ctx["weeks"] for day in week]
+    return [
+        IdeaRead(
+            id=n + 1,
+            title=" ".join(rng.choice(WORDS) for _ in range(6)),
+            description=None,
+            target_date=days[n // per_day],
+            created_at=created,
+            completed=rng.random() < 0.3,
+            completed_at=None,
+        )
+        for n in range(per_day * len(days))
+    ]
+
+
+def compile_templates(cache: FileSystemBytecodeCache | None) -> None:
+    env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)), autoescape=True)
+    env.bytecode_cache = cache
+    for name in TEMPLATES:
+        env.get_template(name)
+
+
+def run(per_day: int, repeat: int) -> None:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    ctx = month_context(2024, 5)
+    today = date(2024, 5, 14)
+    ideas = month_ideas(ctx, per_day)
+    print(f"-- {per_day} ideas per day ({len(ideas)} ideas)")
+
+    max_chars = calendar_fragments.max_chars
+    calendar_fragments.max_chars = 0
+    calendar_fragments.clear()
+    full = time_calls(lambda: render_calendar(request, ctx, ideas, today), repeat)
+    print(summarize("full re-render", full))
+
+    calendar_fragments.max_chars = max_chars
+    calendar_fragments.clear()
+    render_calendar(request, ctx, ideas, today)
+    warm = time_calls(lambda: render_calendar(request, ctx, ideas, today), repeat)
+    print(summarize("cached fragments", warm))
+
+    rng = random.Random(11)
+
+    def toggle_and_render() -> None:
+        n = rng.randrange(len(ideas))
+        ideas[n] = ideas[n].model_copy(update={"completed": not ideas[n].completed})
+        render_calendar(request, ctx, ideas, today)
+
+    print(summarize("cached, one idea toggled", time_calls(toggle_and_render, repeat)))
+    stats = calendar_fragments.stats()
+    print(
+        f"fragment cache: {stats['size']} entries, {stats['chars'] / 1024 / 1024:.1f} MiB, "
+        f"hit rate {stats['hit_rate']:.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--per-day", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for per_day in args.per_day:
+        run(per_day, args.repeat)
+
+    with tempfile.TemporaryDirectory(prefix="contenthub-jinja-") as tmp:
+        bytecode = FileSystemBytecodeCache(tmp)
+        compile_templates(bytecode)
+        print("-- template compile in a fresh environment")
+        print(summarize("no bytecode cache", time_calls(lambda: compile_templates(None), 50)))
+        print(summarize("bytecode cache", time_calls(lambda: compile_templates(bytecode), 50)))
+
+
+if __name__ == "__main__":
+    main()
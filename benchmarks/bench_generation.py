@@ -0,0 +1,103 @@
+"""Semantic response cache: hit rate and latency saved on a repetitive intent workload.
+
+Seeds ``--ideas`` ideas (``bench_search`` records), then replays ``--requests`` hook
+requests drawn Zipf-style from ``--intents`` distinct topics, each phrased one of several
+ways ("give me 5 ... hooks", "5 ... hooks please", reordered words). The stub LLM sleeps
+``--llm-latency`` seconds per call. Every ``--edit-every`` requests the brief of an idea
+the previous answer cited is saved, which drops the cached answers that cited it. The
+same workload runs with and without the cache.
+
+    python -m benchmarks.bench_generation --ideas 20000 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.generation import generate_hooks
+from app.models import Idea
+from app.rag import retrieval_index
+from app.rag.llm import StubLLM
+from app.rag.response_cache import ResponseCache, response_cache
+from app.schemas import BriefBlock, BriefContent
+from app.services import bulk_insert_ideas, update_brief
+from benchmarks._common import summarize, temp_sqlite_url
+from benchmarks.bench_search import _records, vocabulary
+
+PHRASINGS = (
+    "give me 5 {a} {b} hooks",
+    "Give me five {a} {b} hooks!",
+    "5 hooks on {b} {a}, please",
+    "could you write 5 hooks about {a} {b}?",
+)
+
+
+def workload(count: int, intents: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocab, _ = vocabulary()
+    topics = [(vocab[2 * n], vocab[2 * n + 1]) for n in range(intents)]
+    weights = [1 / rank for rank in range(1, intents + 1)]
+    requests = []
+    for a, b in rng.choices(topics, weights=weights, k=count):
+        requests.append(rng.choice(PHRASINGS).format(a=a, b=b))
+    return requests
+
+
+def replay(db, requests, args, cache: ResponseCache | None) -> list[float]:
+    llm = StubLLM(latency=args.llm_latency)
+    samples = []
+    cited: list[int] = []
+    for n, intent in enumerate(requests):
+        if args.edit_every and n % args.edit_every == args.edit_every - 1 and cited:
+            text = f"edited brief {n}"
+            brief = BriefContent(blocks=[BriefBlock(id="b1", type="text", text=text)])
+            update_brief(db, db.get(Idea, cited[0]), brief)
+        started = time.perf_counter()
+        result = generate_hooks(db.connection(), intent, llm=llm, cache=cache)
+        samples.append((time.perf_counter() - started) * 1000)
+        cited = [chunk.id for chunk in result.context if chunk.kind == "idea"]
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ideas", type=int, default=5_000)
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--intents", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--edit-every", type=int, default=200)
+    args = parser.parse_args()
+    requests = workload(args.requests, args.intents, seed=7)
+    with temp_sqlite_url() as url:
+        database.configure_database(url)
+        database.Base.metadata.create_all(bind=database.engine)
+        db = sessionmaker(bind=database.engine)()
+        rng = random.Random(5)
+        for offset in range(0, args.ideas, 1000):
+            bulk_insert_ideas(db, _records(min(1000, args.ideas - offset), offset, rng))
+        retrieval_index.search(db.connection(), "warm up", 1)
+
+        baseline = replay(db, requests, args, cache=None)
+        print(summarize("no cache", baseline))
+        # The shared cache: saved briefs invalidate it through the index commit hook.
+        cache = response_cache
+        cache.clear()
+        cached = replay(db, requests, args, cache)
+        print(summarize("semantic cache", cached))
+        stats = cache.stats()
+        print(
+            f"hit rate {stats['hit_rate']:.1%} ({stats['near_hits']} near-duplicate hits), "
+            f"{stats['invalidations']} entries invalidated by edits, "
+            f"{stats['entries']} entries / {stats['bytes'] / 1024:.0f} KiB, "
+            f"LLM time saved {stats['saved_seconds']:.1f}s of {sum(baseline) / 1000:.1f}s"
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
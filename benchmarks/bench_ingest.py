@@ -0,0 +1,79 @@
+"""Archive ingestion throughput: per-stage rates, worker scaling, batching and resume.
+
+Writes ``--files`` synthetic archive files (Markdown scripts, JSON threads and SRT
+transcripts of 200-1,200 words from the ``bench_search`` vocabulary) to a temp dir and
+runs :func:`app.ingest.ingest` into a fresh database for each ``--workers`` value, then
+once more with one file per transaction, and finally re-runs the last import to time a
+resume that finds every file checkpointed.
+
+    python -m benchmarks.bench_ingest --files 20000 --workers 1 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from app import database
+from app.ingest import ingest
+from benchmarks._common import temp_sqlite_url
+from benchmarks.bench_search import vocabulary
+
+
+def write_archive(root: Path, count: int, seed: int = 11) -> int:
+    rng = random.Random(seed)
+    vocab, cum_weights = vocabulary()
+    total = 0
+    for n in range(count):
+        words = rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(200, 1200))
+        total += len(words)
+        paragraphs = [" ".join(words[i : i + 60]) for i in range(0, len(words), 60)]
+        kind = n % 3
+        if kind == 0:
+            body = f"# Script {n}\n\n" + "\n\n".join(
+                f"## Beat {i}\n\n{p}" if i % 4 == 0 else p for i, p in enumerate(paragraphs)
+            )
+            (root / f"script{n}.md").write_text(body)
+        elif kind == 1:
+            posts = [{"full_text": p} for p in paragraphs]
+            (root / f"thread{n}.json").write_text(json.dumps({"tweets": posts}))
+        else:
+            cues = [
+                f"{i + 1}\n00:00:{i:02d},000 --> 00:00:{i:02d},900\n{p}"
+                for i, p in enumerate(paragraphs)
+            ]
+            (root / f"episode{n}.srt").write_text("\n\n".join(cues))
+    return total
+
+
+def run(label: str, url: str, root: Path, **kwargs) -> None:
+    database.configure_database(url)
+    database.Base.metadata.create_all(bind=database.engine)
+    report = ingest([root], **kwargs)
+    rate = report.ingested / report.wall_seconds if report.wall_seconds else 0.0
+    print(f"\n== {label}: {rate:,.0f} files/s end to end")
+    print(report.summary())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="contenthub-archive-") as tmp:
+        root = Path(tmp)
+        words = write_archive(root, args.files)
+        print(f"{args.files:,} files, {words:,} words")
+        for workers in args.workers:
+            with temp_sqlite_url() as url:
+                run(f"workers={workers}", url, root, workers=workers)
+        with temp_sqlite_url() as url:
+            run("workers=1, one file per transaction", url, root, workers=1, batch_size=1)
+            run("resume (everything checkpointed)", url, root, workers=1)
+
+
+if __name__ == "__main__":
+    main()
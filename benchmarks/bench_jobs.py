@@ -0,0 +1,78 @@
+"""Job queue throughput: enqueue rate and jobs/second drained by worker processes.
+
+Queues ``--jobs`` no-op jobs in a throwaway SQLite database and times how fast
+:class:`app.jobs.WorkerPool` drains them for every ``--workers`` x ``--batch`` setting, so
+the numbers are the queue's own overhead (lease, acknowledge, SQLite write lock) rather
+than handler work.
+
+    python -m benchmarks.bench_jobs --jobs 20000 --workers 1 2 4 --batch 1 10 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app import database
+from app.jobs import JobQueue, WorkerPool, handler
+from benchmarks._common import temp_sqlite_url
+
+
+@handler("bench_noop")
+def noop(payload: dict) -> None:
+    return None
+
+
+def drain(queue: JobQueue, jobs: int, workers: int, batch: int) -> float:
+    queue.enqueue_many("bench_noop", ({"n": n} for n in range(jobs)))
+    pool = WorkerPool(
+        workers, modules=("benchmarks.bench_jobs",), batch_size=batch, poll_interval=0.01
+    )
+    started = time.perf_counter()
+    pool.start()
+    try:
+        while queue.stats()["done"] < jobs:
+            time.sleep(0.05)
+    finally:
+        elapsed = time.perf_counter() - started
+        pool.stop()
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM jobs")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    with temp_sqlite_url() as url:
+        database.configure_database(url)
+        database.Base.metadata.create_all(bind=database.engine)
+        queue = JobQueue()
+
+        count = min(args.jobs, 2_000)
+        started = time.perf_counter()
+        for n in range(count):
+            queue.enqueue("bench_noop", {"n": n})
+        single = count / (time.perf_counter() - started)
+        started = time.perf_counter()
+        queue.enqueue_many("bench_noop", ({"n": n} for n in range(args.jobs)))
+        many = args.jobs / (time.perf_counter() - started)
+        print(f"enqueue: {single:,.0f} jobs/s one per transaction, {many:,.0f} jobs/s batched")
+        with database.engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM jobs")
+
+        # Includes process start-up (~1s per spawn), which matters less as --jobs grows.
+        for workers in args.workers:
+            for batch in args.batch:
+                elapsed = drain(queue, args.jobs, workers, batch)
+                print(
+                    f"workers={workers:<3} batch={batch:<4} {args.jobs / elapsed:10,.0f} jobs/s "
+                    f"({elapsed:.1f}s)"
+                )
+
+
+if __name__ == "__main__":
+    main()
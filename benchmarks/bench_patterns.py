@@ -0,0 +1,126 @@
+"""Hook pattern mining at scale: full fit vs incremental updates, and recipe reads.
+
+Seeds ``--items`` hooks -- five brief text blocks per idea, imported with
+``bulk_insert_ideas``, plus the seeded templates -- where each hook is 9 words from one of
+``--topics`` topical vocabularies and 3 from the Zipf vocabulary used by
+``bench_search``. Times the from-scratch mini-batch k-means fit, the incremental job
+that one saved brief (or a batch of them) queues, and ``/api/recipes``.
+
+    python -m benchmarks.bench_patterns --items 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.models import Idea, PatternItem
+from app.patterns import recipes, update_patterns
+from app.schemas import BriefBlock, BriefContent, IdeaImportRecord
+from app.services import (
+    bulk_insert_ideas,
+    ensure_seed_templates,
+    parse_brief_content,
+    update_brief,
+)
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+from benchmarks.bench_search import vocabulary
+
+BLOCKS = 5
+IMPORT_BATCH = 5_000
+
+
+class HookWriter:
+    def __init__(self, topics: int, seed: int = 5) -> None:
+        self.rng = random.Random(seed)
+        self.vocab, self.cum_weights = vocabulary()
+        topic_rng = random.Random(1)
+        self.topics = [topic_rng.sample(self.vocab[200:], 20) for _ in range(topics)]
+
+    def hook(self) -> str:
+        words = self.rng.choices(self.rng.choice(self.topics), k=9)
+        words += self.rng.choices(self.vocab, cum_weights=self.cum_weights, k=3)
+        self.rng.shuffle(words)
+        return " ".join(words)
+
+    def brief(self) -> BriefContent:
+        return BriefContent(
+            blocks=[BriefBlock(id=f"b{n}", type="text", text=self.hook()) for n in range(BLOCKS)]
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=32)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--bulk", type=int, default=1_000)
+    args = parser.parse_args()
+    writer = HookWriter(args.topics)
+    with temp_sqlite_url() as url:
+        database.configure_database(url)
+        database.Base.metadata.create_all(bind=database.engine)
+        db = sessionmaker(bind=database.engine)()
+        ensure_seed_templates(db)
+        ideas = args.items // BLOCKS
+        for start in range(0, ideas, IMPORT_BATCH):
+            records = [
+                IdeaImportRecord(
+                    title=f"Idea {n}", target_date=date(2026, 1, 1), brief=writer.brief()
+                )
+                for n in range(start, min(ideas, start + IMPORT_BATCH))
+            ]
+            bulk_insert_ideas(db, records)
+
+        stats = update_patterns(rebuild=True, clusters=args.clusters)
+        mined = db.scalar(select(func.count()).select_from(PatternItem))
+        print(
+            f"full fit: {mined:,} hooks, k={args.clusters}: {stats.seconds:.1f}s "
+            f"({mined / stats.seconds:,.0f} hooks/s, embedding included)"
+        )
+
+        idea_ids = db.scalars(select(Idea.id)).all()
+        rng = random.Random(9)
+        samples = []
+        for idea_id in rng.sample(idea_ids, args.updates):
+            # A typical save edits one block of the brief.
+            idea = db.get(Idea, idea_id)
+            content = parse_brief_content(idea.brief)
+            content.blocks[0].text = writer.hook()
+            update_brief(db, idea, content)
+            samples += time_calls(lambda idea_id=idea_id: update_patterns(ideas=[idea_id]), 1)
+        print(summarize("incremental, one brief saved", samples))
+        print(
+            summarize(
+                "incremental, brief unchanged",
+                time_calls(lambda: update_patterns(ideas=[idea_ids[0]]), 50),
+            )
+        )
+
+        batch = rng.sample(idea_ids, args.bulk)
+        for idea_id in batch:
+            update_brief(db, db.get(Idea, idea_id), writer.brief())
+        started = time.perf_counter()
+        stats = update_patterns(ideas=batch)
+        elapsed = time.perf_counter() - started
+        print(
+            f"incremental, {args.bulk:,} briefs saved: {elapsed * 1000:.0f}ms "
+            f"({stats.embedded:,} hooks embedded, {stats.removed:,} removed)"
+        )
+
+        reads = time_calls(lambda: recipes(db, limit=10, examples=3), 20)
+        print(summarize("recipes (top 10)", reads))
+        for recipe in recipes(db, limit=3):
+            print(f"  {recipe.label:<40} size={recipe.size:<6} weight={recipe.weight:,.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
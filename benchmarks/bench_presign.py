@@ -0,0 +1,83 @@
+"""Attachment signing: one sign call per file vs one batch call, against a moto S3 server.
+
+Starts a local ``moto`` S3 server (``pip install "moto[server]"``), points the app at it
+with ``CONTENTHUB_S3_ENDPOINT_URL`` and signs ``--files`` uploads for one idea through
+the HTTP API: as serial ``/brief/attachments/sign`` calls (what the browser did), as one
+``/brief/attachments/sign-batch`` call signing inline, and as one batch call on a
+``--workers`` signing pool. ``--rtt-ms`` adds a simulated browser round trip to every HTTP call.
+
+    python -m benchmarks.bench_presign --files 50 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import date
+
+from fastapi.testclient import TestClient
+from moto.server import ThreadedMotoServer
+
+from app import database
+from app.lib import storage
+from app.main import create_app
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    _, port = server.get_host_and_port()
+    os.environ.update(
+        CONTENTHUB_S3_BUCKET="bench-briefs",
+        CONTENTHUB_S3_ENDPOINT_URL=f"http://127.0.0.1:{port}",
+        AWS_ACCESS_KEY_ID="bench",
+        AWS_SECRET_ACCESS_KEY="bench",
+    )
+    storage._s3_client.cache_clear()
+    storage._s3_client().create_bucket(Bucket="bench-briefs")
+    files = [
+        {"filename": f"b-roll {n:02d}.mp4", "content_type": "video/mp4"} for n in range(args.files)
+    ]
+
+    with temp_sqlite_url() as url:
+        database.configure_database(url)
+        database.Base.metadata.create_all(bind=database.engine)
+        with TestClient(create_app()) as client:
+            idea = client.post(
+                "/api/ideas", json={"title": "Shoot day", "target_date": date.today().isoformat()}
+            ).json()
+            base = f"/api/ideas/{idea['id']}/brief/attachments"
+
+            def call(path: str, body: dict) -> dict:
+                time.sleep(args.rtt_ms / 1000)
+                response = client.post(path, json=body)
+                response.raise_for_status()
+                return response.json()
+
+            def serial() -> None:
+                for file in files:
+                    call(f"{base}/sign", file)
+
+            def batch() -> None:
+                uploads = call(f"{base}/sign-batch", {"files": files})["uploads"]
+                assert len(uploads) == args.files
+
+            print(summarize(f"{args.files} x /sign", time_calls(serial, args.repeat)))
+            os.environ["CONTENTHUB_S3_SIGN_WORKERS"] = "1"
+            print(summarize("/sign-batch inline", time_calls(batch, args.repeat)))
+            os.environ["CONTENTHUB_S3_SIGN_WORKERS"] = str(args.workers)
+            print(summarize(f"/sign-batch {args.workers} workers", time_calls(batch, args.repeat)))
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
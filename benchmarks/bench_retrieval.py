@@ -0,0 +1,103 @@
+"""Build and query latency of the in-process hybrid retriever at growing corpus sizes.
+
+Chunks are synthetic ~40-word texts drawn from the Zipf vocabulary used by
+``bench_search`` (85% idea chunks with dates/completion, 15% templates with a category);
+queries are two or three mid-frequency words.
+
+    python -m benchmarks.bench_retrieval --chunks 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.rag import Chunk, HashingEmbedder, HybridRetriever, RetrievalFilter
+from benchmarks._common import summarize, time_calls
+from benchmarks.bench_search import vocabulary
+
+CATEGORIES = ["Hook", "Story", "Tutorial", "Routine", "Myth", "Challenge"]
+START = date(2023, 1, 1)
+
+
+def corpus(count: int, seed: int = 5) -> list[Chunk]:
+    rng = random.Random(seed)
+    vocab, cum_weights = vocabulary()
+    texts = (" ".join(rng.choices(vocab, cum_weights=cum_weights, k=40)) for _ in range(count))
+    chunks = []
+    for n, text in enumerate(texts):
+        if rng.random() < 0.15:
+            chunks.append(Chunk("template", n, text, category=rng.choice(CATEGORIES)))
+        else:
+            chunks.append(
+                Chunk(
+                    "idea",
+                    n,
+                    text,
+                    target_date=START + timedelta(days=rng.randrange(730)),
+                    completed=rng.random() < 0.4,
+                )
+            )
+    return chunks
+
+
+def queries(count: int, seed: int = 9) -> list[str]:
+    rng = random.Random(seed)
+    vocab, _ = vocabulary()
+    # Ranks 20-2000: frequent enough to match, rare enough to discriminate.
+    return [" ".join(rng.sample(vocab[20:2000], rng.choice((2, 3)))) for _ in range(count)]
+
+
+def bench_size(size: int, args: argparse.Namespace) -> None:
+    chunks = corpus(size)
+    retriever = HybridRetriever(HashingEmbedder(dim=args.dim))
+    started = time.perf_counter()
+    retriever.add(chunks)
+    elapsed = time.perf_counter() - started
+    del chunks
+    print(
+        f"\n== {size:,} chunks: built in {elapsed:.1f}s ({size / elapsed:,.0f} chunks/s), "
+        f"vectors {size * args.dim * 4 / 2**20:,.0f} MiB"
+    )
+
+    sample = queries(args.queries)
+    month = RetrievalFilter(date_from=date(2024, 3, 1), date_to=date(2024, 3, 31))
+    cases = {
+        "hybrid": {},
+        "bm25 only": {"mode": "bm25"},
+        "dense only": {"mode": "dense"},
+        "hybrid, completed=False": {"where": RetrievalFilter(completed=False)},
+        "hybrid, one month": {"where": month},
+        "hybrid, category=Hook": {"where": RetrievalFilter(categories=frozenset({"Hook"}))},
+    }
+    for label, kwargs in cases.items():
+        samples = [
+            ms
+            for query in sample
+            for ms in time_calls(lambda q=query, kw=kwargs: retriever.search(q, 10, **kw), 1)
+        ]
+        print(summarize(label, samples))
+
+    updates = corpus(args.updates, seed=size)
+    started = time.perf_counter()
+    for chunk in updates:
+        retriever.replace(chunk.kind, [chunk.source_id], [chunk])
+    per_update = (time.perf_counter() - started) * 1000 / len(updates)
+    print(f"{'single-source replace':<32} mean={per_update:8.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+    for size in args.chunks:
+        bench_size(size, args)
+
+
+if __name__ == "__main__":
+    main()
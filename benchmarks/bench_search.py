@@ -0,0 +1,111 @@
+"""Full-text search latency over a large idea table (FTS5 bm25 vs a LIKE scan).
+
+Seeds ``--ideas`` ideas (each with a short brief) through ``bulk_insert_ideas``, which
+maintains the search index, then times ranked ``/api/search`` queries against the
+``LIKE '%term%'`` scan that was the only option before.
+
+    python -m benchmarks.bench_search --ideas 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.schemas import BriefBlock, BriefContent, IdeaImportRecord, ShotListItem
+from app.search import search
+from app.services import bulk_insert_ideas
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+from benchmarks.bench_version_codec import WORDS
+
+RARE = "oscilloscope"
+QUERIES = {
+    "common term": "study",
+    "two terms": "founder demo",
+    "prefix": "retent",
+    "rare term": RARE,
+}
+
+
+def vocabulary(size: int = 20_000) -> tuple[list[str], list[float]]:
+    """Zipf-weighted vocabulary and its cumulative weights (for ``random.choices``).
+
+    The topical WORDS are the most frequent terms.
+    """
+    words = WORDS + [f"term{n}" for n in range(size - len(WORDS))]
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+
+def _records(count: int, start: int, rng: random.Random) -> list[IdeaImportRecord]:
+    vocab, cum_weights = vocabulary()
+    records = []
+    for n in range(start, start + count):
+        words = rng.choices(vocab, cum_weights=cum_weights, k=30)
+        if n % 1000 == 0:
+            words.append(RARE)
+        records.append(
+            IdeaImportRecord(
+                title=" ".join(words[:6]).capitalize(),
+                target_date=date(2024, 1, 1) + timedelta(days=n % 365),
+                description=" ".join(words[6:14]),
+                brief=BriefContent(
+                    blocks=[BriefBlock(id="b1", type="text", text=" ".join(words[14:24]))],
+                    shots=[ShotListItem(id="s1", cue=" ".join(words[24:]))],
+                    hashtags=["#studytok"],
+                ),
+            )
+        )
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ideas", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with temp_sqlite_url() as url:
+        engine = database._build_engine(url)
+        database.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            started = time.perf_counter()
+            for offset in range(0, args.ideas, args.batch):
+                count = min(args.batch, args.ideas - offset)
+                bulk_insert_ideas(db, _records(count, offset, rng))
+            elapsed = time.perf_counter() - started
+            print(f"seeded + indexed {args.ideas} ideas in {elapsed:.1f}s "
+                  f"({args.ideas / elapsed:,.0f} ideas/s)")
+
+            for label, q in QUERIES.items():
+                samples = time_calls(lambda q=q: search(db, q, limit=20), args.repeat)
+                print(summarize(f"fts5 {label}", samples))
+            deep = time_calls(lambda: search(db, "study", limit=20, offset=500), args.repeat)
+            print(summarize("fts5 common term, offset 500", deep))
+
+            like = text(
+                "SELECT ideas.id FROM ideas "
+                "LEFT JOIN idea_briefs ON idea_briefs.idea_id = ideas.id "
+                "WHERE ideas.title LIKE :p OR ideas.description LIKE :p "
+                "OR idea_briefs.content LIKE :p LIMIT 20"
+            )
+            for label, q in (("common term", "study"), ("rare term", RARE)):
+                samples = time_calls(
+                    lambda q=q: db.execute(like, {"p": f"%{q}%"}).all(),
+                    max(3, args.repeat // 10),
+                )
+                print(summarize(f"LIKE scan {label} (before)", samples))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Mixed read/write throughput: bare SQLite engine vs the tuned WAL profile + read pool.
+
+Readers hit ``ideas_in_range`` for the current calendar window while writers run
+``update_brief(autosave=True)`` on random ideas, mirroring calendar polling next to
+editor autosaves.
+
+    python -m benchmarks.bench_sqlite_profile --seconds 5 --readers 8 --writers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.lib.calendar import month_context
+from app.models import Idea
+from app.schemas import BriefBlock, BriefContent
+from app.services import fetch_idea, ideas_in_range, update_brief
+from benchmarks._common import summarize, temp_sqlite_url
+
+
+def _seed(session_factory, ideas: int) -> list[int]:
+    start = date.today().replace(day=1)
+    with session_factory() as db:
+        db.add_all(
+            Idea(title=f"Idea {i}", target_date=start + timedelta(days=i % 28))
+            for i in range(ideas)
+        )
+        db.commit()
+        return [row[0] for row in db.query(Idea.id).all()]
+
+
+def run_profile(profile: str, *, seconds: float, readers: int, writers: int, ideas: int) -> None:
+    with temp_sqlite_url() as url:
+        write_engine = database._build_engine(url, profile=profile)
+        # The "basic" profile reproduces the original single-engine setup.
+        read_engine = (
+            database._build_engine(url, readonly=True, profile=profile)
+            if profile == "production"
+            else write_engine
+        )
+        database.Base.metadata.create_all(bind=write_engine)
+        WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+        ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+        idea_ids = _seed(WriteSession, ideas)
+        ctx = month_context(date.today().year, date.today().month)
+
+        deadline = time.perf_counter() + seconds
+        read_ms: list[float] = []
+        write_ms: list[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def reader() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    with ReadSession() as db:
+                        ideas_in_range(db, ctx["range_start"], ctx["range_end"])
+                except Exception:  # count lock timeouts instead of aborting
+                    with lock:
+                        errors += 1
+                    continue
+                with lock:
+                    read_ms.append((time.perf_counter() - started) * 1000)
+
+        def writer(seed: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                content = BriefContent(
+                    blocks=[BriefBlock(id=f"b{n}", type="text", text="x" * 200) for n in range(20)]
+                )
+                started = time.perf_counter()
+                try:
+                    with WriteSession() as db:
+                        idea = fetch_idea(db, rng.choice(idea_ids))
+                        update_brief(db, idea, content, autosave=True, label="Autosave")
+                except Exception:
+                    with lock:
+                        errors += 1
+                    continue
+                with lock:
+                    write_ms.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        print(
+            f"[{profile}] reads/s={len(read_ms) / seconds:9.1f} "
+            f"writes/s={len(write_ms) / seconds:8.1f} errors={errors}"
+        )
+        print("  " + summarize("read latency", read_ms))
+        print("  " + summarize("write latency", write_ms))
+        write_engine.dispose()
+        read_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--ideas", type=int, default=500)
+    args = parser.parse_args()
+    for profile in ("basic", "production"):
+        run_profile(
+            profile,
+            seconds=args.seconds,
+            readers=args.readers,
+            writers=args.writers,
+            ideas=args.ideas,
+        )
+
+
+if __name__ == "__main__":
+    main()
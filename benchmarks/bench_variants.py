@@ -0,0 +1,72 @@
+"""Streaming hook variants: time to first variant and to the last, sequential vs fanned out.
+
+Each LLM call takes a log-normally distributed time (median ``--latency`` seconds, a long
+tail like a hosted model's). ``--requests`` requests of ``--variants`` variants each run
+once with the calls one after another, then through
+:func:`app.generation.stream_hook_variants` with ``--concurrency`` calls in flight.
+
+    python -m benchmarks.bench_variants --variants 8 --concurrency 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.generation import stream_hook_variants
+from app.rag.llm import StubLLM
+from benchmarks._common import summarize
+
+
+class JitteryLLM(StubLLM):
+    """The stub with per-call log-normal latency."""
+
+    def __init__(self, median: float, seed: int) -> None:
+        super().__init__(latency=0)
+        self.median = median
+        self.rng = random.Random(seed)
+
+    async def acomplete(self, prompt: str) -> str:
+        await asyncio.sleep(self.median * self.rng.lognormvariate(0, 0.6))
+        return await super().acomplete(prompt)
+
+
+async def one_request(args, n: int, concurrency: int) -> tuple[float, float]:
+    llm = JitteryLLM(args.latency, seed=n)
+    started = time.perf_counter()
+    first = None
+    stream = stream_hook_variants(
+        f"study hooks {n}",
+        [],
+        variants=args.variants,
+        concurrency=concurrency,
+        timeout=60,
+        llm=llm,
+        cache=None,
+    )
+    async for _ in stream:
+        if first is None:
+            first = (time.perf_counter() - started) * 1000
+    return first, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--variants", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    for label, concurrency in (
+        ("sequential", 1),
+        (f"concurrency={args.concurrency}", args.concurrency),
+    ):
+        runs = [asyncio.run(one_request(args, n, concurrency)) for n in range(args.requests)]
+        print(summarize(f"{label} first variant", [first for first, _ in runs]))
+        print(summarize(f"{label} all variants", [total for _, total in runs]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Storage and restore latency of delta-encoded brief versions vs full JSON snapshots.
+
+Simulates an afternoon of editing: a brief with ~120 blocks receives a few hundred
+autosaves, each touching one or two blocks (and occasionally adding a block or editing
+the thumbnail notes), exactly as the editor's debounced autosave would.
+
+    python -m benchmarks.bench_version_codec --autosaves 400 --blocks 120
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.lib import brief_codec
+from app.models import Idea, IdeaBriefVersion
+from app.schemas import BriefBlock, BriefContent, CTAItem, ShotListItem
+from app.services import restore_version, update_brief
+from benchmarks._common import summarize, temp_sqlite_url, time_calls
+
+WORDS = (
+    "hook study founder campus lab demo sprint debug thesis pitch story viewer retention "
+    "cut b-roll caption loop payoff tension reveal metric growth build ship learn"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def edit_history(autosaves: int, blocks: int, seed: int = 7) -> list[BriefContent]:
+    rng = random.Random(seed)
+    content = BriefContent(
+        blocks=[
+            BriefBlock(
+                id=f"b{n}",
+                type=rng.choice(["text", "heading", "quote"]),
+                text=_sentence(rng, 18),
+            )
+            for n in range(blocks)
+        ],
+        shots=[
+            ShotListItem(id=f"s{n}", cue=_sentence(rng, 6), shot_type="A-roll") for n in range(8)
+        ],
+        ctas=[CTAItem(id="c1", text="DM me 'blueprint'", platform="tiktok")],
+        hashtags=["#studytok", "#founder", "#stem"],
+        thumbnail_notes="Big face, red arrow",
+    )
+    history = []
+    for step in range(autosaves):
+        data = content.model_copy(deep=True)
+        for _ in range(rng.randint(1, 2)):
+            block = rng.choice(data.blocks)
+            block.text = block.text[:-1] + " " + rng.choice(WORDS) + "."
+        if step % 25 == 0:
+            fresh = BriefBlock(id=f"n{step}", type="text", text=_sentence(rng, 12))
+            data.blocks.insert(rng.randrange(len(data.blocks)), fresh)
+        if step % 40 == 0:
+            data.thumbnail_notes = _sentence(rng, 5)
+        content = data
+        history.append(content)
+    return history
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--autosaves", type=int, default=400)
+    parser.add_argument("--blocks", type=int, default=120)
+    parser.add_argument("--restores", type=int, default=200)
+    args = parser.parse_args()
+
+    history = edit_history(args.autosaves, args.blocks)
+    full_bytes = sum(len(content.model_dump_json()) for content in history)
+
+    with temp_sqlite_url() as url:
+        engine = database._build_engine(url)
+        database.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            idea = Idea(title="Benchmark", target_date=date.today())
+            db.add(idea)
+            db.commit()
+            save_ms = []
+            for content in history:
+                save_ms.extend(
+                    time_calls(lambda c=content: update_brief(db, idea, c, autosave=True), 1)
+                )
+            rows = db.query(IdeaBriefVersion.id, IdeaBriefVersion.snapshot).all()
+            stored_bytes = sum(len(snapshot) for _, snapshot in rows)
+            keyframes = sum(1 for _, snapshot in rows if snapshot.startswith("K1:"))
+
+            rng = random.Random(11)
+            version_ids = [rng.choice(rows)[0] for _ in range(args.restores)]
+            warm_ms = [
+                sample
+                for version_id in version_ids
+                for sample in time_calls(lambda v=version_id: restore_version(db, v), 1)
+            ]
+
+            def cold_restore(version_id: int) -> None:
+                brief_codec.decode_keyframe.cache_clear()
+                db.expire_all()
+                restore_version(db, version_id)
+
+            cold_ms = [
+                sample
+                for version_id in version_ids
+                for sample in time_calls(lambda v=version_id: cold_restore(v), 1)
+            ]
+            legacy_json = [rng.choice(history).model_dump_json() for _ in version_ids]
+            legacy_ms = [
+                sample
+                for payload in legacy_json
+                for sample in time_calls(lambda p=payload: BriefContent.model_validate_json(p), 1)
+            ]
+        engine.dispose()
+
+    print(f"versions={len(history)} keyframes={keyframes} blocks~{args.blocks}")
+    print(f"full JSON snapshots : {full_bytes / 1024:10.1f} KiB")
+    print(
+        f"keyframe + deltas   : {stored_bytes / 1024:10.1f} KiB "
+        f"({full_bytes / max(stored_bytes, 1):.1f}x smaller)"
+    )
+    print(summarize("autosave write (codec)", save_ms))
+    print(summarize("restore, keyframe cached", warm_ms))
+    print(summarize("restore, cold", cold_ms))
+    print(summarize("parse full JSON (baseline)", legacy_ms))
+
+
+if __name__ == "__main__":
+    main()
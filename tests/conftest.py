@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+
+from app import database
+from app.autosave import autosave_buffer
+from app.database import Base
+from app.lib.cache import (
+    brief_content_cache,
+    calendar_cache,
+    calendar_fragments,
+    template_cache,
+)
+from app.rag import retrieval_index
+from app.rag.response_cache import response_cache
+from app.ratings import rating_queue
+from app.services import ensure_seed_templates
+
+
+@pytest.fixture()
+def db_session(tmp_path):
+    test_db = tmp_path / "test.db"
+    database.configure_database(f"sqlite:///{test_db}")
+    Base.metadata.create_all(bind=database.engine)
+    calendar_cache.clear()
+    calendar_fragments.clear()
+    brief_content_cache.clear()
+    template_cache.invalidate()
+    autosave_buffer.clear()
+    rating_queue.clear()
+    retrieval_index.invalidate()
+    response_cache.clear()
+    session = database.SessionLocal()
+    # Mirrors main.lifespan, which seeds templates at startup.
+    ensure_seed_templates(session)
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+from fastapi import Response
+
+from app.rag import HashingEmbedder, retrieval_index
+from app.rag.ann import IVFPQIndex
+from app.rag.embedders import normalize_rows
+from app.rag.index import ann_path
+from app.routers import ideas, search
+from app.schemas import BriefBlock, BriefContent, BriefUpdate, IdeaCreate
+
+
+def _clustered(count: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(40, dim))
+    data = centres[rng.integers(0, 40, count)] + 0.3 * rng.normal(size=(count, dim))
+    return normalize_rows(data.astype(np.float32))
+
+
+def _index(path, **kwargs) -> IVFPQIndex:
+    return IVFPQIndex(path, 32, m=8, min_rows=500, **kwargs)
+
+
+def test_ivfpq_recall_and_reopen(tmp_path):
+    data = _clustered(3000)
+    keys = np.arange(len(data), dtype=np.int64) * 7
+    hashes = np.arange(len(data), dtype=np.int64)
+    index = _index(tmp_path / "ann")
+    assert index.upsert(keys, hashes, data) == len(data)
+    assert index.needs_compaction()
+    index.compact()
+    assert index.trained and len(index) == len(data)
+
+    queries = _clustered(50, seed=1)
+    exact = np.argsort(-(queries @ data.T), axis=1)[:, :10]
+    recall = np.mean(
+        [
+            len(set(index.search(query, 10)[0].tolist()) & set((keys[row]).tolist())) / 10
+            for query, row in zip(queries, exact, strict=True)
+        ]
+    )
+    assert recall >= 0.8
+    before = [index.search(query, 10)[0].tolist() for query in queries[:5]]
+    index.close()
+
+    reopened = _index(tmp_path / "ann")
+    assert reopened.trained and len(reopened) == len(data)
+    assert [reopened.search(query, 10)[0].tolist() for query in queries[:5]] == before
+    reopened.close()
+
+
+def test_ivfpq_upsert_remove_and_crash_leftovers(tmp_path):
+    data = _clustered(20)
+    keys = np.arange(20, dtype=np.int64)
+    hashes = keys + 100
+    index = _index(tmp_path / "ann")
+    index.upsert(keys, hashes, data)
+    # Same hash: nothing is written; changed hash: the old row is tombstoned.
+    assert index.upsert(keys[:5], hashes[:5], data[:5]) == 0
+    assert index.upsert(keys[:2], hashes[:2] + 1, data[2:4]) == 2
+    assert len(index) == 20 and index.stats["count"] == 22
+    found, vectors = index.lookup(keys[:3], np.array([101, 102, 102]))
+    assert found.tolist() == [True, True, True]
+    assert np.array_equal(vectors[0], data[2])
+
+    assert index.remove([0, 1, 99]) == 2
+    assert index.retain(keys[2:10]) == 10
+    assert sorted(index.search(data[5], 20)[0].tolist()) == list(range(2, 10))
+
+    # A write that died before meta.json was replaced leaves bytes past ``count``.
+    with open(index._file("keys"), "ab") as handle:
+        handle.write(b"\0" * 64)
+    index.close()
+    reopened = _index(tmp_path / "ann")
+    assert reopened.stats["count"] == 22
+    assert reopened._file("keys").stat().st_size == 22 * 8
+    assert reopened.search(data[5], 1)[0].tolist() == [5]
+    # A second process only gets a read-only view.
+    assert not _index(tmp_path / "ann").writable
+    reopened.close()
+    # Vectors from another embedder are never mixed in.
+    assert len(_index(tmp_path / "ann", signature="other")) == 0
+
+
+class _CountingEmbedder(HashingEmbedder):
+    calls = 0
+
+    def embed(self, texts):
+        type(self).calls += len(texts)
+        return super().embed(texts)
+
+
+def test_retrieval_index_reuses_persisted_vectors(db_session, monkeypatch):
+    monkeypatch.setattr(retrieval_index, "_embedder_factory", _CountingEmbedder)
+    monkeypatch.setattr(retrieval_index, "ann_enabled", True)
+    first = ideas.create_idea(
+        IdeaCreate(title="Laser cutter jig", target_date=date(2024, 2, 1)), db=db_session
+    )
+    second = ideas.create_idea(
+        IdeaCreate(title="Resin casting molds", target_date=date(2024, 2, 2)), db=db_session
+    )
+    assert search.retrieve_api(q="laser jig", db=db_session).items[0].id == first.id
+    assert ann_path(str(db_session.bind.url)).is_dir()
+    embedded = _CountingEmbedder.calls
+
+    # A restart rebuilds the retriever from the database but reuses stored vectors:
+    # only the query itself is embedded.
+    retrieval_index.invalidate()
+    assert search.retrieve_api(q="laser jig", db=db_session).items[0].id == first.id
+    assert _CountingEmbedder.calls == embedded + 1
+
+    content = BriefContent(blocks=[BriefBlock(id="b1", type="text", text="Kerf offsets")])
+    ideas.write_brief(first.id, BriefUpdate(content=content), response=Response(), db=db_session)
+    ideas.delete_idea(second.id, db=db_session)
+    hits = search.retrieve_api(q="kerf resin", kind="idea", mode="dense", db=db_session).items
+    assert [hit.id for hit in hits] == [first.id]
+    assert len(retrieval_index._ann) == len(retrieval_index._retriever)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+from fastapi import Response
+
+from app.autosave import autosave_buffer
+from app.models import IdeaBrief, IdeaBriefVersion
+from app.routers import ideas
+from app.schemas import BriefBlock, BriefContent, BriefUpdate, IdeaCreate
+
+
+def _content(text: str) -> BriefContent:
+    return BriefContent(blocks=[BriefBlock(id="b1", type="text", text=text)])
+
+
+def _versions(db_session, idea_id: int) -> int:
+    return db_session.query(IdeaBriefVersion).filter_by(idea_id=idea_id).count()
+
+
+def test_autosave_burst_collapses_into_one_version(db_session):
+    created = ideas.create_idea(
+        IdeaCreate(title="Burst", target_date=date.today()), db=db_session
+    )
+    for n in range(5):
+        payload = BriefUpdate(content=_content(f"draft {n}"))
+        ack = ideas.autosave_brief(created.id, payload, response=Response(), db=db_session)
+        assert ack.content.blocks[0].text == f"draft {n}"
+
+    # Acknowledged but not yet written; reads still see the latest draft.
+    assert _versions(db_session, created.id) == 0
+    draft = json.loads(ideas.read_brief(created.id, db=db_session).body)
+    assert draft["content"]["blocks"][0]["text"] == "draft 4"
+
+    assert autosave_buffer.flush() == 1
+    assert _versions(db_session, created.id) == 1
+    brief = db_session.query(IdeaBrief).filter_by(idea_id=created.id).one()
+    assert "draft 4" in brief.content
+
+
+def test_direct_writes_flush_pending_autosaves_first(db_session):
+    created = ideas.create_idea(
+        IdeaCreate(title="Ordered", target_date=date.today()), db=db_session
+    )
+    autosaved = BriefUpdate(content=_content("autosaved"))
+    ideas.autosave_brief(created.id, autosaved, response=Response(), db=db_session)
+    final = BriefUpdate(content=_content("final"))
+    saved = ideas.write_brief(created.id, final, response=Response(), db=db_session)
+
+    assert saved.content.blocks[0].text == "final"
+    assert autosave_buffer.pending_count() == 0
+    assert _versions(db_session, created.id) == 1
+    current = json.loads(ideas.read_brief(created.id, db=db_session).body)
+    assert current["content"]["blocks"][0]["text"] == "final"
+
+
+def test_shutdown_flushes_buffer(db_session):
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    created = ideas.create_idea(
+        IdeaCreate(title="Shutdown", target_date=date.today()), db=db_session
+    )
+    with TestClient(create_app()) as client:
+        response = client.post(
+            f"/api/ideas/{created.id}/brief/autosave",
+            json={"content": {"blocks": [{"id": "b1", "type": "text", "text": "late"}]}},
+        )
+        assert response.status_code == 200
+    assert autosave_buffer.pending_count() == 0
+    assert _versions(db_session, created.id) == 1
+
+
+def test_reads_see_buffered_content_while_a_flush_is_in_flight(db_session, monkeypatch):
+    import threading
+
+    from app import database
+
+    created = ideas.create_idea(
+        IdeaCreate(title="In flight", target_date=date.today()), db=db_session
+    )
+    entered, release = threading.Event(), threading.Event()
+
+    def blocking_session():
+        entered.set()
+        release.wait(5)
+        return database.SessionLocal()
+
+    monkeypatch.setattr(autosave_buffer, "_session_factory", blocking_session)
+    acked = Response()
+    ideas.autosave_brief(
+        created.id, BriefUpdate(content=_content("buffered")), response=acked, db=db_session
+    )
+    flusher = threading.Thread(target=autosave_buffer.flush)
+    flusher.start()
+    try:
+        assert entered.wait(5)
+        during = ideas.read_brief(created.id, db=db_session)
+        assert json.loads(during.body)["content"]["blocks"][0]["text"] == "buffered"
+        assert during.headers["etag"] == acked.headers["etag"]
+        # A save that lands mid-flush is kept for the next one, not dropped.
+        newer = BriefUpdate(content=_content("newer"))
+        ideas.autosave_brief(created.id, newer, response=Response(), db=db_session)
+    finally:
+        release.set()
+        flusher.join(5)
+
+    assert _versions(db_session, created.id) == 1
+    assert autosave_buffer.pending_count() == 1
+    after = json.loads(ideas.read_brief(created.id, db=db_session).body)
+    assert after["content"]["blocks"][0]["text"] == "newer"
+    assert autosave_buffer.flush() == 1 and autosave_buffer.pending_count() == 0
+
+
+def test_one_failing_idea_does_not_block_the_others(db_session, monkeypatch):
+    from app import autosave
+    from app.autosave import AutosaveBuffer
+
+    good, bad, other = (
+        ideas.create_idea(IdeaCreate(title=title, target_date=date.today()), db=db_session)
+        for title in ("Good", "Corrupt", "Other")
+    )
+    stage = autosave.stage_brief_update
+
+    def corrupt_keyframe(db, idea, *args, **kwargs):
+        if idea.id == bad.id:
+            raise ValueError("corrupt keyframe")
+        return stage(db, idea, *args, **kwargs)
+
+    monkeypatch.setattr(autosave, "stage_brief_update", corrupt_keyframe)
+    buffer = AutosaveBuffer(max_attempts=3)
+    for created in (good, bad, other):
+        buffer.submit(created.id, _content(f"draft of {created.title}"), "Autosave")
+
+    assert buffer.flush() == 2
+    assert _versions(db_session, good.id) == _versions(db_session, other.id) == 1
+    assert buffer.peek(bad.id).failures == 1 and buffer.pending_count() == 1
+    # A direct write waiting on the bad draft is refused rather than reordering history.
+    with pytest.raises(ValueError):
+        buffer.flush([bad.id])
+    # A newer draft inherits the failure count; the third failure drops it.
+    buffer.submit(bad.id, _content("retyped"), "Autosave")
+    assert buffer.flush([bad.id]) == 0
+    assert buffer.pending_count() == 0 and _versions(db_session, bad.id) == 0
+    stats = buffer.stats()
+    assert (stats["flushed"], stats["failed"], stats["dropped"]) == (2, 3, 1)
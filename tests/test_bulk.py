@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.models import Idea, IdeaBrief
+
+
+def _ndjson(records: list[dict]) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+
+def test_ndjson_import_then_export_roundtrip(db_session):
+    records = [
+        {"title": f"Hook {n}", "target_date": f"2024-07-{n % 28 + 1:02d}", "description": None}
+        for n in range(1200)
+    ]
+    records[3]["brief"] = {"blocks": [{"id": "b1", "type": "text", "text": "Café intro"}]}
+    records[5].update(
+        completed=True,
+        completed_at="2024-07-09T18:30:00+00:00",
+        created_at="2024-06-01T09:00:00+00:00",
+    )
+    records[6]["created_at"] = "2024-06-01T14:30:00+05:00"
+    body = _ndjson(records) + b'{"title": "", "target_date": "2024-07-01"}\nnot json\n'
+
+    with TestClient(create_app()) as client:
+        result = client.post("/api/ideas/import", content=body).json()
+        assert result["imported"] == 1200
+        assert result["failed"] == 2
+        assert [error["line"] for error in result["errors"]] == [1201, 1202]
+
+        calendar = client.get("/api/calendar", params={"year": 2024, "month": 7}).json()
+        assert len(calendar) == 1200
+
+        exported = client.get("/api/ideas/export")
+        assert exported.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in exported.text.splitlines()]
+
+    assert len(lines) == 1200
+    assert lines[3]["brief"]["blocks"][0]["text"] == "Café intro"
+    assert lines[0]["brief"] is None
+    assert db_session.query(Idea).count() == 1200
+    assert db_session.query(IdeaBrief).count() == 1
+
+    # Exported lines are valid import records.
+    with TestClient(create_app()) as client:
+        again = client.post("/api/ideas/import", content=_ndjson(lines[:10])).json()
+    assert again["imported"] == 10
+    # Completion state and creation time survive the round trip.
+    copies = db_session.query(Idea).filter_by(title="Hook 5").order_by(Idea.id).all()
+    assert [idea.completed for idea in copies] == [True, True]
+    assert {
+        (idea.created_at.isoformat()[:19], idea.completed_at.isoformat()[:19]) for idea in copies
+    } == {("2024-06-01T09:00:00", "2024-07-09T18:30:00")}
+    assert lines[5]["completed"] and not lines[4]["completed"]
+    # Offsets are normalised to UTC like every other stored timestamp.
+    assert lines[6]["created_at"].startswith("2024-06-01T09:30:00")
@@ -3,10 +3,10 @@ from __future__ import annotations
 from datetime import date
 
 import pytest
+from fastapi import Response
 
 from app import database
-from app.database import Base
-from app.lib.calendar import month_context
+from app.lib.calendar import month_context, windows_containing
 from app.routers import ideas, templates
 from app.schemas import (
     BriefBlock,
@@ -20,18 +20,6 @@ from app.schemas import (
 )
 
 
-@pytest.fixture()
-def db_session(tmp_path):
-    test_db = tmp_path / "test.db"
-    database.configure_database(f"sqlite:///{test_db}")
-    Base.metadata.create_all(bind=database.engine)
-    session = database.SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-
-
 def test_month_context_spans_six_weeks():
     ctx = month_context(2024, 5)
     assert len(ctx["weeks"]) == 6
@@ -51,11 +39,11 @@ def test_idea_crud_flow(db_session):
     toggled = ideas.toggle_idea(idea_id, db=db_session)
     assert toggled.completed is True
 
-    calendar = ideas.calendar_api(db=db_session)
+    calendar = ideas.calendar_api(response=Response(), db=db_session)
     assert any(item.id == idea_id for item in calendar)
 
     ideas.delete_idea(idea_id, db=db_session)
-    assert ideas.calendar_api(db=db_session) == []
+    assert ideas.calendar_api(response=Response(), db=db_session) == []
 
 
 def test_brief_autosave_and_restore(db_session):
@@ -65,10 +53,17 @@ def test_brief_autosave_and_restore(db_session):
         blocks=[BriefBlock(id="b1", type="text", text="Intro line", checked=False)],
         hashtags=["#test"],
     )
-    saved = ideas.write_brief(created.id, BriefUpdate(content=content), db=db_session)
+    saved = ideas.write_brief(
+        created.id, BriefUpdate(content=content), response=Response(), db=db_session
+    )
     assert saved.content.blocks[0].text == "Intro line"
 
-    autosave = ideas.autosave_brief(created.id, BriefUpdate(content=content, label="Autosave"), db=db_session)
+    autosave = ideas.autosave_brief(
+        created.id,
+        BriefUpdate(content=content, label="Autosave"),
+        response=Response(),
+        db=db_session,
+    )
     assert autosave.content.hashtags == ["#test"]
 
     versions = ideas.brief_versions(created.id, db=db_session)
@@ -78,6 +73,76 @@ def test_brief_autosave_and_restore(db_session):
     assert restored.content.blocks[0].text == "Intro line"
 
 
+def test_brief_read_splices_stored_json_without_parsing(db_session, monkeypatch):
+    import json
+
+    from app import services
+    from app.models import IdeaBrief
+    from app.schemas import IdeaBriefRead
+
+    created = ideas.create_idea(
+        IdeaCreate(title="Large brief", target_date=date.today()), db=db_session
+    )
+    blank = json.loads(ideas.read_brief(created.id, db=db_session).body)
+    assert blank["content"] == BriefContent().model_dump(mode="json")
+
+    content = BriefContent(
+        blocks=[BriefBlock(id=f"b{n}", type="text", text=f"Line {n} ✓") for n in range(50)],
+        hashtags=["#stem"],
+    )
+    ideas.write_brief(created.id, BriefUpdate(content=content), response=Response(), db=db_session)
+    monkeypatch.setattr(ideas, "parse_brief_content", lambda brief: pytest.fail("re-parsed"))
+    raw = ideas.read_brief(created.id, db=db_session)
+    brief = db_session.query(IdeaBrief).filter_by(idea_id=created.id).one()
+    expected = IdeaBriefRead(idea_id=created.id, updated_at=brief.updated_at, content=content)
+    assert json.loads(raw.body) == expected.model_dump(mode="json")
+    assert raw.headers["etag"] == ideas.brief_etag(created.id, brief.updated_at)
+
+    # Callers that need the model share one parsed copy per (brief.id, updated_at).
+    parsed = services.parse_brief_content(brief)
+    assert services.parse_brief_content(brief) is parsed
+    assert parsed == content
+
+
+def test_brief_reads_are_write_free_and_batched(db_session):
+    import json
+
+    from sqlalchemy import event
+
+    from app.autosave import autosave_buffer
+    from app.models import IdeaBrief
+
+    first, second = (
+        ideas.create_idea(IdeaCreate(title=title, target_date=date.today()), db=db_session)
+        for title in ("Blank", "Drafted")
+    )
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        blank = ideas.read_brief(first.id, db=db_session)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]) == 1
+    assert db_session.query(IdeaBrief).count() == 0
+    assert json.loads(blank.body)["content"] == BriefContent().model_dump(mode="json")
+
+    # The synthesized blank brief carries a stable tag that If-Match accepts on first save.
+    assert ideas.read_brief(first.id, db=db_session).headers["etag"] == blank.headers["etag"]
+    ideas.write_brief(
+        first.id,
+        BriefUpdate(content=BriefContent(hashtags=["#first"])),
+        response=Response(),
+        if_match=blank.headers["etag"],
+        db=db_session,
+    )
+    autosave_buffer.submit(second.id, BriefContent(hashtags=["#draft"]), "Autosave")
+
+    batch = json.loads(ideas.read_briefs(ids=[second.id, 999, first.id], db=db_session).body)
+    assert [item["idea_id"] for item in batch] == [second.id, first.id]
+    assert [item["content"]["hashtags"] for item in batch] == [["#draft"], ["#first"]]
+
+
 def test_templates_router_seeds_defaults(db_session):
     catalog = templates.templates_index(db=db_session)
     assert catalog, "Seed templates should auto-populate"
@@ -104,3 +169,259 @@ def test_template_favorite_and_rating(db_session):
         db=db_session,
     )
     assert rating_response.rating_count >= 1
+
+
+def test_template_ranking_is_cached_and_uses_stored_score(db_session):
+    from sqlalchemy import event, text
+
+    from app.ratings import rating_queue
+
+    catalog = templates.templates_index(db=db_session)
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(database.read_engine, "before_cursor_execute", listener)
+    try:
+        assert templates.templates_index(db=db_session) == catalog
+    finally:
+        event.remove(database.read_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    # 4.5 vs 4.0 only separates once scores are real numbers, not integer division.
+    low, high = catalog[-1], catalog[-2]
+    for template, ratings in ((low, (5, 4)), (high, (4, 4))):
+        for rating in ratings:
+            payload = TemplateRatingRequest(rating=rating)
+            templates.templates_rate(template.id, payload, db=db_session)
+    rating_queue.flush()
+    ranked = templates.templates_index(db=db_session)
+    assert [item.id for item in ranked[:2]] == [low.id, high.id]
+    assert ranked[0].rating == 4.5
+
+    plan = db_session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT * FROM idea_templates "
+            "ORDER BY favorite DESC, rating_score DESC, created_at ASC"
+        )
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_idea_templates_ranking" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_migrations_backfill_template_scores(db_session):
+    from sqlalchemy import text
+
+    from app.migrations import run_migrations
+    from app.models import IdeaTemplate
+
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_idea_templates_ranking"))
+        conn.execute(text("ALTER TABLE idea_templates DROP COLUMN rating_score"))
+        conn.execute(text("UPDATE idea_templates SET rating_sum = 9, rating_count = 2"))
+    run_migrations(database.engine)
+    db_session.expire_all()
+    assert {t.rating_score for t in db_session.query(IdeaTemplate)} == {4.5}
+
+
+def test_async_routes_share_the_database(db_session):
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    created = ideas.create_idea(
+        IdeaCreate(title="Async hook", target_date=date.today(), description=None),
+        db=db_session,
+    )
+    with TestClient(create_app(async_db=True)) as client:
+        calendar = client.get("/api/calendar")
+        assert calendar.status_code == 200
+        assert [item["id"] for item in calendar.json()] == [created.id]
+
+        content = {"blocks": [{"id": "b1", "type": "text", "text": "Async line"}]}
+        saved = client.post(f"/api/ideas/{created.id}/brief/autosave", json={"content": content})
+        assert saved.status_code == 200
+        assert saved.json()["content"]["blocks"][0]["text"] == "Async line"
+
+        versions = client.get(f"/api/ideas/{created.id}/brief/versions").json()
+        assert versions[0]["label"] == "Autosave"
+        assert client.get("/").status_code == 200
+
+    # The sync session observes rows written through the aiosqlite engine.
+    assert ideas.brief_versions(created.id, db=db_session)[0].id == versions[0]["id"]
+
+
+@pytest.mark.parametrize("async_db", [False, True])
+def test_conditional_requests_for_calendar_and_brief(db_session, async_db):
+    from fastapi.testclient import TestClient
+
+    from app.autosave import autosave_buffer
+    from app.main import create_app
+
+    created = ideas.create_idea(
+        IdeaCreate(title="Tagged hook", target_date=date(2024, 5, 20), description=None),
+        db=db_session,
+    )
+    params = {"year": 2024, "month": 5}
+    with TestClient(create_app(async_db=async_db)) as client:
+        first = client.get("/api/calendar", params=params)
+        tag = first.headers["etag"]
+        cached = client.get("/api/calendar", params=params, headers={"If-None-Match": tag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        client.post(f"/api/ideas/{created.id}/toggle")
+        changed = client.get("/api/calendar", params=params, headers={"If-None-Match": tag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != tag
+
+        url = f"/api/ideas/{created.id}/brief"
+        brief_tag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": brief_tag}).status_code == 304
+
+        # A buffered autosave changes the tag, and flushing it keeps the new tag valid.
+        content = {"blocks": [{"id": "b1", "type": "text", "text": "draft"}]}
+        draft_tag = client.post(f"{url}/autosave", json={"content": content}).headers["etag"]
+        assert draft_tag != brief_tag
+        autosave_buffer.flush()
+        assert client.get(url, headers={"If-None-Match": draft_tag}).status_code == 304
+
+        stale = client.put(url, json={"content": content}, headers={"If-Match": brief_tag})
+        assert stale.status_code == 412
+        saved = client.put(url, json={"content": content}, headers={"If-Match": draft_tag})
+        assert saved.status_code == 200
+        assert saved.headers["etag"] not in (draft_tag, brief_tag)
+        again = client.put(url, json={"content": content}, headers={"If-Match": draft_tag})
+        assert again.status_code == 412
+
+
+def test_production_profile_enables_wal_and_read_only_pool(db_session):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    assert db_session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db_session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+    reader = database.ReadSessionLocal()
+    try:
+        assert reader.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(OperationalError):
+            reader.execute(text("DELETE FROM ideas"))
+    finally:
+        reader.close()
+
+
+def test_windows_containing_covers_spillover_days():
+    # 2024-05-31 is rendered by the May grid and the leading week of June's grid.
+    assert windows_containing(date(2024, 5, 31)) == [(2024, 5), (2024, 6)]
+    # 2024-06-03 also appears in the trailing rows of May's grid.
+    assert windows_containing(date(2024, 6, 3)) == [(2024, 5), (2024, 6)]
+    assert windows_containing(date(2024, 6, 15)) == [(2024, 6)]
+
+
+def test_calendar_cache_hits_and_invalidates_on_moves(db_session):
+    created = ideas.create_idea(
+        IdeaCreate(title="Cached", target_date=date(2024, 5, 15)), db=db_session
+    )
+    before = ideas.calendar_cache_stats()
+
+    def window(month: int) -> list:
+        return ideas.calendar_api(year=2024, month=month, response=Response(), db=db_session)
+
+    assert [i.id for i in window(5)] == [created.id]
+    assert [i.id for i in window(5)] == [created.id]
+    assert window(9) == []
+    stats = ideas.calendar_cache_stats()
+    assert (stats.hits - before.hits, stats.misses - before.misses) == (1, 2)
+
+    ideas.patch_idea(created.id, IdeaUpdate(target_date=date(2024, 9, 10)), db=db_session)
+    assert window(5) == []
+    assert [i.id for i in window(9)] == [created.id]
+
+    toggled = ideas.toggle_idea(created.id, db=db_session)
+    assert window(9)[0].completed is toggled.completed
+
+
+def test_calendar_page_reuses_rendered_cells_until_an_idea_changes(db_session):
+    from starlette.requests import Request
+
+    from app.lib.cache import calendar_fragments
+    from app.routers import pages
+
+    first = ideas.create_idea(
+        IdeaCreate(title="<b>Hook</b>", target_date=date(2024, 5, 15)), db=db_session
+    )
+    ideas.create_idea(IdeaCreate(title="Spillover", target_date=date(2024, 4, 29)), db=db_session)
+    request = Request(
+        {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}
+    )
+
+    def page() -> str:
+        response = pages.calendar_page(request, year=2024, month=5, db=db_session)
+        return response.body.decode()
+
+    html = page()
+    assert html.count('class="day-card') == 42
+    assert "&lt;b&gt;Hook&lt;/b&gt;" in html and "<b>Hook</b>" not in html
+    assert 'class="day-card muted " data-date="2024-04-29"' in html
+    cold = calendar_fragments.stats()
+    assert cold["hits"] == 0 and cold["misses"] == 6 + 42
+
+    assert page() == html
+    warm = calendar_fragments.stats()
+    assert (warm["hits"] - cold["hits"], warm["misses"] - cold["misses"]) == (6, 0)
+
+    # Completing the idea re-renders its week and that week's one changed cell.
+    ideas.toggle_idea(first.id, db=db_session)
+    toggled = page()
+    assert 'class="idea-text done"' in toggled
+    stats = calendar_fragments.stats()
+    assert (stats["hits"] - warm["hits"], stats["misses"] - warm["misses"]) == (5 + 6, 1 + 1)
+
+
+def test_keyset_pagination_walks_every_idea_once(db_session):
+    for offset in range(7):
+        for n in range(3):
+            ideas.create_idea(
+                IdeaCreate(title=f"Idea {offset}-{n}", target_date=date(2024, 3, 1 + offset)),
+                db=db_session,
+            )
+    seen = []
+    cursor = None
+    while True:
+        page = ideas.list_ideas(
+            start=date(2024, 3, 2), end=date(2024, 3, 6), cursor=cursor, limit=4, db=db_session
+        )
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == 15
+    assert len({item.id for item in seen}) == 15
+    keys = [(item.target_date, item.created_at, item.id) for item in seen]
+    assert keys == sorted(keys)
+
+
+def test_ideas_range_index_is_used(db_session):
+    from sqlalchemy import text
+
+    plan = db_session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT * FROM ideas WHERE target_date BETWEEN :a AND :b "
+            "ORDER BY target_date, created_at"
+        ),
+        {"a": "2024-01-01", "b": "2024-02-11"},
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_ideas_target_date_created_at_id" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_migrations_add_missing_indexes(db_session):
+    from sqlalchemy import inspect, text
+
+    from app.migrations import run_migrations
+
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_ideas_target_date_created_at_id"))
+    run_migrations(database.engine)
+    names = {index["name"] for index in inspect(database.engine).get_indexes("ideas")}
+    assert "ix_ideas_target_date_created_at_id" in names
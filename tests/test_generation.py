@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.generation import (
+    ANGLES,
+    generate_hooks,
+    hooks_prompt,
+    parse_lines,
+    stream_hook_variants,
+)
+from app.models import Idea, IdeaBriefVersion
+from app.rag.llm import StubLLM
+from app.rag.response_cache import ResponseCache, normalize_intent
+from app.routers import generation as generation_router
+from app.schemas import BriefBlock, BriefContent, HookVariantsRequest
+from app.services import parse_brief_content, update_brief
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_response_cache_near_duplicates_eviction_and_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=3, max_bytes=1 << 20, ttl=60, similarity=0.9, clock=clock)
+    assert normalize_intent("Could you give me FIVE study hooks?!") == "5 study hooks"
+
+    cache.store("hooks:5", "study hooks for exam season", "ctx", "A", sources=[("idea", 1)])
+    hit = cache.lookup("hooks:5", "Exam season study hooks, please", "ctx")
+    assert hit is not None and hit.response == "A"
+    # Another context, task or topic is a different question.
+    assert cache.lookup("hooks:5", "exam season study hooks", "other ctx") is None
+    assert cache.lookup("hooks:3", "exam season study hooks", "ctx") is None
+    assert cache.lookup("hooks:5", "exam season startup hooks", "ctx") is None
+
+    for n in range(3):
+        cache.store("hooks:5", f"topic {n}", "ctx", "B")
+    assert cache.lookup("hooks:5", "study hooks for exam season", "ctx") is None  # LRU
+    clock.now = 61
+    assert cache.lookup("hooks:5", "topic 2", "ctx") is None  # expired
+    stats = cache.stats()
+    assert (stats["hits"], stats["near_hits"], stats["evictions"]) == (1, 1, 1)
+    assert stats["expirations"] == 3 and stats["entries"] == 0  # expired on the way past
+
+    small = ResponseCache(max_bytes=3000)
+    assert small.store("t", "one", "ctx", "x" * 1000)
+    assert small.store("t", "two", "ctx", "x" * 1000)
+    assert small.stats()["entries"] == 1 and small.stats()["bytes"] <= 3000
+    assert not small.store("t", "three", "ctx", "x" * 5000)
+
+    cache.store("hooks:5", "cited", "ctx", "C", sources=[("idea", 7), ("template", 2)])
+    assert cache.invalidate_sources(templates=[2]) == 1
+    assert cache.lookup("hooks:5", "cited", "ctx") is None
+
+
+def test_stub_llm_follows_the_prompt_deterministically():
+    prompt = hooks_prompt("study hooks", [], 3)
+    first = StubLLM().complete(prompt)
+    assert first == StubLLM().complete(prompt)
+    assert len(parse_lines(first, 5)) == 3
+    assert parse_lines("1. one\n\n2) two\n- three", 2) == ["one", "two"]
+
+
+def test_generate_hooks_caches_until_a_cited_brief_changes(db_session):
+    idea = Idea(title="Organic chemistry finals", target_date=date(2026, 5, 1))
+    db_session.add(idea)
+    db_session.commit()
+    update_brief(
+        db_session,
+        idea,
+        BriefContent(blocks=[BriefBlock(id="b1", type="text", text="Pomodoro study sessions")]),
+    )
+    llm = StubLLM()
+    conn = db_session.connection()
+
+    first = generate_hooks(conn, "Give me 5 study hooks", llm=llm)
+    assert not first.cached and len(first.hooks) == 5 and llm.calls == 1
+    assert ("idea", idea.id) in {(chunk.kind, chunk.id) for chunk in first.context}
+    again = generate_hooks(conn, "give me five study hooks!", llm=llm)
+    assert again.cached and not again.near_duplicate
+    assert again.hooks == first.hooks and llm.calls == 1
+    assert generate_hooks(conn, "give me 3 study hooks", count=3, llm=llm).cached is False
+
+    # Saving a brief the answer cited drops it; the next request regenerates.
+    update_brief(
+        db_session,
+        idea,
+        BriefContent(blocks=[BriefBlock(id="b1", type="text", text="Flashcards before exams")]),
+    )
+    stats = generation_router.response_cache_stats()
+    assert stats.invalidations >= 1 and stats.hits == 1
+    regenerated = generate_hooks(db_session.connection(), "Give me 5 study hooks", llm=llm)
+    assert not regenerated.cached and llm.calls == 3
+
+
+class SlowLLM:
+    """Async client: per-angle delays, one angle that fails, and an in-flight high-water mark."""
+
+    name = "slow"
+
+    def __init__(self, delays: dict[str, float], fail: str | None = None) -> None:
+        self.delays = delays
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+
+    async def acomplete(self, prompt: str) -> str:
+        angle = prompt.rsplit("Angle: ", 1)[1]
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(angle, 0.01))
+            if angle == self.fail:
+                raise RuntimeError("model overloaded")
+            return f"1. {angle} hook"
+        finally:
+            self.running -= 1
+
+
+def test_stream_hook_variants_streams_in_completion_order_with_limits():
+    llm = SlowLLM({ANGLES[0]: 0.15, ANGLES[1]: 0.01, ANGLES[3]: 5}, fail=ANGLES[2])
+
+    async def collect():
+        stream = stream_hook_variants(
+            "study hooks", [], variants=5, concurrency=2, timeout=0.5, llm=llm, cache=None
+        )
+        return [variant async for variant in stream]
+
+    variants = asyncio.run(collect())
+    assert [variant.index for variant in variants][:2] == [1, 2]  # fastest first
+    by_index = {variant.index: variant for variant in variants}
+    assert by_index[0].hook == f"{ANGLES[0]} hook" and by_index[4].hook == f"{ANGLES[4]} hook"
+    assert by_index[2].error == "RuntimeError: model overloaded" and by_index[2].hook is None
+    assert by_index[3].error == "timeout" and variants[-1].index == 3
+    assert llm.peak == 2
+
+
+def _events(body: list[str]) -> list[tuple[str, dict]]:
+    events = []
+    for message in "".join(body).strip().split("\n\n"):
+        event, data = message.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_stream_hook_variants_api_appends_hooks_to_the_brief(db_session):
+    idea = Idea(title="Dorm room startup", target_date=date(2026, 5, 1))
+    db_session.add(idea)
+    db_session.commit()
+    update_brief(
+        db_session,
+        idea,
+        BriefContent(blocks=[BriefBlock(id="b1", type="text", text="Shipping an MVP in a week")]),
+    )
+    payload = HookVariantsRequest(intent="startup hooks", count=3, concurrency=99)
+    response = generation_router.stream_hook_variants_api(idea.id, payload, db=db_session)
+    assert response.media_type == "text/event-stream"
+
+    async def collect():
+        return [part async for part in response.body_iterator]
+
+    events = _events(asyncio.run(collect()))
+    assert [event for event, _ in events] == ["context", "variant", "variant", "variant", "done"]
+    assert any(chunk["id"] == idea.id for chunk in events[0][1]["chunks"])
+    done = events[-1][1]
+    assert (done["completed"], done["failed"], done["saved"]) == (3, 0, True)
+
+    db_session.expire_all()
+    blocks = parse_brief_content(db_session.get(Idea, idea.id).brief).blocks
+    assert [block.type for block in blocks] == [
+        "text",
+        "heading",
+        "checklist",
+        "checklist",
+        "checklist",
+    ]
+    hooks = {data["hook"] for event, data in events if event == "variant"}
+    assert {block.text for block in blocks[2:]} == hooks
+    version = db_session.query(IdeaBriefVersion).filter_by(idea_id=idea.id).one()
+    assert version.label == "Generated hooks"
+
+    with pytest.raises(HTTPException) as missing:
+        generation_router.stream_hook_variants_api(999, payload, db=db_session)
+    assert missing.value.status_code == 404
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app import database
+from app.ingest import ingest
+from app.models import ArchiveChunk, ArchiveDocument, IngestCheckpoint
+
+
+def _archive(root):
+    (root / "threads").mkdir()
+    (root / "script.md").write_text(
+        "# Dorm lab tour\n\nHook: what if   your dorm\r\nwas a lab?\n\n## Payoff\n\nShow the build."
+    )
+    (root / "threads" / "launch.json").write_text(
+        '{"tweets": [{"full_text": "1/2 building in public"}, {"full_text": "2/2 ship it"}]}'
+    )
+    (root / "ep1.srt").write_text(
+        "1\n00:00:01,000 --> 00:00:02,500\nWelcome <i>back</i>\n\n"
+        "2\n00:00:02,500 --> 00:00:04,000\nto the channel\n"
+    )
+    (root / "broken.json").write_text("{not json")
+    (root / "empty.txt").write_text("")
+    (root / "image.png").write_bytes(b"\x89PNG")
+
+
+def _documents(db) -> dict[str, tuple[str, str, list[str]]]:
+    rows = db.scalars(select(ArchiveDocument)).all()
+    return {
+        os.path.basename(doc.source_path): (doc.kind, doc.title, [c.text for c in doc.chunks])
+        for doc in rows
+    }
+
+
+def test_ingest_normalises_chunks_and_embeds(db_session, tmp_path):
+    _archive(tmp_path)
+    report = ingest([tmp_path], workers=1)
+    assert (report.seen, report.ingested, report.failed) == (5, 4, 1)
+    assert report.stages["embed"].items == report.chunks == 4
+
+    documents = _documents(db_session)
+    assert documents["script.md"] == (
+        "note",
+        "Dorm lab tour",
+        [
+            "Dorm lab tour\n# Dorm lab tour\nHook: what if your dorm\nwas a lab?",
+            "Dorm lab tour\n## Payoff\nShow the build.",
+        ],
+    )
+    assert documents["launch.json"][2] == [
+        "1/2 building in public\n1/2 building in public\n2/2 ship it"
+    ]
+    assert documents["ep1.srt"] == ("transcript", "ep1", ["ep1\nWelcome back to the channel"])
+    assert "empty.txt" not in documents
+
+    vectors = [
+        np.frombuffer(blob, dtype=np.float32)
+        for blob in db_session.scalars(select(ArchiveChunk.embedding))
+    ]
+    assert all(np.isclose(np.linalg.norm(vector), 1.0) for vector in vectors)
+    statuses = dict(
+        db_session.execute(select(IngestCheckpoint.source_path, IngestCheckpoint.status)).all()
+    )
+    assert statuses[str(tmp_path / "broken.json")] == "failed"
+    assert statuses[str(tmp_path / "empty.txt")] == "done"
+
+
+def test_ingest_resumes_from_checkpoints(db_session, tmp_path):
+    _archive(tmp_path)
+    ingest([tmp_path], workers=1)
+
+    again = ingest([tmp_path], workers=1)
+    # Only the failed file is retried.
+    assert (again.skipped, again.ingested, again.failed) == (4, 0, 1)
+
+    script = tmp_path / "script.md"
+    os.utime(script, ns=(1, 1))
+    touched = ingest([tmp_path], workers=1)
+    assert (touched.unchanged, touched.ingested) == (1, 0)
+
+    script.write_text("# Dorm lab tour v2\n\nNew cut.")
+    (tmp_path / "broken.json").write_text('["fixed post"]')
+    edited = ingest([tmp_path], workers=1)
+    assert (edited.ingested, edited.failed) == (2, 0)
+    documents = _documents(db_session)
+    assert documents["script.md"][2] == ["Dorm lab tour v2\n# Dorm lab tour v2\nNew cut."]
+    assert documents["broken.json"][2] == ["fixed post\nfixed post"]
+    # Replaced documents leave no orphaned chunks behind.
+    assert db_session.scalar(select(func.count()).select_from(ArchiveChunk)) == 4
+
+
+def test_process_pool_matches_inline_run(db_session, tmp_path):
+    for n in range(40):
+        (tmp_path / f"note{n}.md").write_text(f"# Note {n}\n\n" + "word " * (n * 10))
+    pooled = ingest([tmp_path], workers=2, batch_size=7, task_files=3)
+    assert pooled.ingested == 40
+    pooled_rows = _documents(db_session)
+
+    database.configure_database(f"sqlite:///{tmp_path / 'inline.db'}")
+    database.Base.metadata.create_all(bind=database.engine)
+    ingest([tmp_path], workers=1)
+    with database.SessionLocal() as db:
+        assert _documents(db) == pooled_rows
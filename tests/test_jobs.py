@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import database
+from app.jobs import LEASE_EXPIRED, JobQueue, Worker, WorkerPool, handlers
+from app.models import ArchiveDocument, Job, utc_now
+from app.routers import jobs as jobs_router
+from app.services import enqueue_job
+
+
+@pytest.fixture()
+def queue(db_session):
+    # Seeding the templates queued a pattern-mining job; start from an empty queue.
+    with database.engine.begin() as conn:
+        conn.execute(delete(Job))
+    return JobQueue(visibility_timeout=30, retry_backoff=0)
+
+
+@pytest.fixture()
+def recorded(monkeypatch):
+    calls = []
+
+    def record(payload):
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+        calls.append(payload["n"])
+
+    monkeypatch.setitem(handlers, "record", record)
+    return calls
+
+
+def _expire_leases() -> None:
+    with database.engine.begin() as conn:
+        conn.execute(
+            update(Job)
+            .where(Job.status == "leased")
+            .values(available_at=utc_now() - timedelta(hours=1))
+        )
+
+
+def test_lease_orders_by_priority_and_hides_leased_jobs(queue):
+    low = queue.enqueue_many("record", [{"n": 1}, {"n": 2}])
+    high = queue.enqueue("record", {"n": 3}, priority=5)
+    later = queue.enqueue("record", {"n": 4}, delay=60)
+
+    first = queue.lease(2)
+    assert [job.id for job in first] == sorted([high, low[0]])
+    assert [job.id for job in queue.lease(10)] == [low[1]]
+    assert queue.lease(10) == []
+    assert queue.stats() == {"queued": 1, "leased": 3, "done": 0, "failed": 0}
+
+    # A lease that runs out makes the job visible again under a new token.
+    _expire_leases()
+    again = queue.lease(10)
+    assert sorted(job.id for job in again) == sorted([*low, high])
+    assert all(job.attempts == 2 for job in again)
+    assert later not in {job.id for job in again}
+    # The first holder lost its lease, so its acknowledgement is ignored.
+    assert queue.complete(first) == 0
+    assert queue.complete(again) == 3
+    assert queue.stats()["done"] == 3
+
+
+def test_failed_jobs_retry_with_backoff_then_stop(queue):
+    queue.retry_backoff = 60
+    job_id = queue.enqueue("record", {"fail": True}, max_attempts=2)
+    [job] = queue.lease()
+    assert queue.fail(job, "boom") == "queued"
+    assert queue.lease() == []  # backing off
+
+    queue.retry_backoff = 0
+    with database.engine.begin() as conn:
+        conn.execute(update(Job).values(available_at=Job.available_at - timedelta(minutes=2)))
+    [job] = queue.lease()
+    assert job.attempts == 2
+    assert queue.fail(job, "boom again") == "failed"
+    with database.SessionLocal() as db:
+        stored = db.get(Job, job_id)
+        assert (stored.status, stored.last_error) == ("failed", "boom again")
+
+
+def test_jobs_that_keep_losing_their_lease_fail_after_max_attempts(queue):
+    job_id = queue.enqueue("record", {"n": 1}, max_attempts=2)
+    for attempt in (1, 2):
+        [job] = queue.lease()
+        assert job.attempts == attempt
+        _expire_leases()  # the worker died mid-job
+    assert queue.lease() == []
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 0, "failed": 1}
+    with database.SessionLocal() as db:
+        stored = db.get(Job, job_id)
+        assert (stored.attempts, stored.lease_token) == (2, None)
+        assert stored.last_error == LEASE_EXPIRED and stored.finished_at is not None
+
+
+def test_worker_runs_batches_and_records_failures(queue, recorded):
+    queue.enqueue_many("record", [{"n": n} for n in range(5)])
+    queue.enqueue("record", {"fail": True}, max_attempts=1)
+    queue.enqueue("unknown")
+    worker = Worker(queue, batch_size=3)
+    while worker.run_once():
+        pass
+    assert sorted(recorded) == [0, 1, 2, 3, 4]
+    assert (worker.completed, worker.failed) == (5, 2)
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 5, "failed": 2}
+    assert queue.purge(timedelta(0)) == 5
+
+
+def test_workers_purge_finished_jobs_periodically(queue, recorded):
+    first, *_ = queue.enqueue_many("record", [{"n": n} for n in range(3)])
+    worker = Worker(queue, retention=3600, purge_interval=60)
+    worker.run_once()
+    with database.engine.begin() as conn:
+        conn.execute(
+            update(Job)
+            .where(Job.id == first)
+            .values(finished_at=Job.finished_at - timedelta(hours=2))
+        )
+    assert worker.purge_finished() == 1
+    assert queue.stats()["done"] == 2
+    # Not again until the interval passes.
+    with database.engine.begin() as conn:
+        conn.execute(update(Job).values(finished_at=Job.finished_at - timedelta(hours=2)))
+    assert worker.purge_finished() == 0
+    worker._next_purge = 0.0
+    assert worker.purge_finished() == 2 and worker.purged == 3
+    assert Worker(queue, purge_interval=0).purge_finished() == 0
+
+
+def test_enqueue_is_part_of_the_callers_transaction(db_session, queue):
+    enqueue_job(db_session, "record", {"n": 1})
+    db_session.rollback()
+    assert queue.stats()["queued"] == 0
+    enqueue_job(db_session, "record", {"n": 1})
+    db_session.commit()
+    assert queue.stats()["queued"] == 1
+
+
+def test_queued_archive_ingest_runs_in_worker_processes(db_session, tmp_path):
+    (tmp_path / "script.md").write_text("# Studio tour\n\nLights, then camera.")
+    job = enqueue_job(db_session, "ingest_archive", {"paths": [str(tmp_path)]})
+    db_session.commit()
+    assert job.status == "queued"
+
+    pool = WorkerPool(1, poll_interval=0.05)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        while jobs_router.read_job(job.id, db=db_session).status != "done":
+            assert time.monotonic() < deadline, jobs_router.job_stats()
+            db_session.expire_all()
+            time.sleep(0.1)
+    finally:
+        pool.stop()
+    assert db_session.query(ArchiveDocument.title).scalar() == "Studio tour"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app import database
+from app.jobs import JobQueue, Worker
+from app.models import Idea, Job, PatternItem
+from app.patterns import JOB_KIND, recipes, update_patterns
+from app.rag.kmeans import minibatch_update
+from app.routers import patterns as patterns_router
+from app.schemas import BriefBlock, BriefContent
+from app.services import apply_template_ratings, toggle_completion, update_brief
+
+COFFEE = [
+    "Morning coffee routine that fixes your focus",
+    "My morning coffee routine for deep focus",
+    "Stop ruining your morning coffee routine",
+]
+TRAVEL = [
+    "Budget travel hacks airlines hate",
+    "Three budget travel hacks for cheap flights",
+    "Budget travel hacks nobody tells you",
+]
+
+
+def _brief(*texts: str) -> BriefContent:
+    return BriefContent(
+        blocks=[BriefBlock(id=f"b{n}", type="text", text=text) for n, text in enumerate(texts)]
+    )
+
+
+def _idea(db, title: str, *texts: str) -> Idea:
+    idea = Idea(title=title, target_date=date(2026, 3, 1))
+    db.add(idea)
+    db.commit()
+    update_brief(db, idea, _brief(*texts))
+    return idea
+
+
+def _cluster_of(db, idea: Idea, block_id: str) -> int:
+    return db.scalar(
+        select(PatternItem.cluster).where(
+            PatternItem.kind == "brief",
+            PatternItem.source_id == idea.id,
+            PatternItem.block_id == block_id,
+        )
+    )
+
+
+def test_minibatch_update_moves_centroids_by_running_mean():
+    centroids = np.array([[0.0, 0.0], [10.0, 10.0]], dtype=np.float32)
+    seen = np.array([1, 0], dtype=np.int64)
+    batch = np.array([[1.0, 0.0], [2.0, 0.0], [9.0, 9.0]], dtype=np.float32)
+    labels = minibatch_update(centroids, seen, batch)
+    assert labels.tolist() == [0, 0, 1]
+    assert seen.tolist() == [3, 1]
+    # Same as absorbing the rows one by one with a 1/seen learning rate.
+    np.testing.assert_allclose(centroids, [[1.0, 0.0], [9.0, 9.0]])
+
+
+def test_recipes_group_hooks_and_weigh_ratings_and_completion(db_session):
+    coffee = _idea(db_session, "Coffee", *COFFEE)
+    travel = _idea(db_session, "Travel", *TRAVEL, "ok")  # too short to be a hook
+    stats = update_patterns(clusters=3)
+    assert stats.rebuilt and stats.embedded == 3 + 6
+
+    assert len({_cluster_of(db_session, coffee, f"b{n}") for n in range(3)}) == 1
+    assert len({_cluster_of(db_session, travel, f"b{n}") for n in range(3)}) == 1
+    assert _cluster_of(db_session, coffee, "b0") != _cluster_of(db_session, travel, "b0")
+
+    # Seeded templates, coffee and travel: three groups of three, one point each so far.
+    found = recipes(db_session, min_size=3)
+    assert [(recipe.size, recipe.weight) for recipe in found] == [(3, 3.0)] * 3
+    by_cluster = {recipe.id: recipe for recipe in found}
+    coffee_recipe = by_cluster[_cluster_of(db_session, coffee, "b0")]
+    assert {"coffee", "routine", "morning"} <= set(coffee_recipe.terms)
+    assert coffee_recipe.examples[0].kind == "brief"
+
+    # Completion and ratings queue jobs that only re-weigh the stored hooks.
+    toggle_completion(travel)
+    db_session.commit()
+    assert update_patterns(ideas=[travel.id]).reweighed == 3
+    top = recipes(db_session, limit=1, min_size=3)[0]
+    assert (top.id, top.weight, top.mean_weight) == (
+        _cluster_of(db_session, travel, "b0"),
+        9.0,
+        3.0,
+    )
+    apply_template_ratings(db_session, {1: (5, 1)})
+    db_session.commit()
+    queue = JobQueue(retry_backoff=0)
+    Worker(queue, batch_size=100).run_once()
+    assert queue.stats()["queued"] == 0
+    rated = next(r for r in recipes(db_session, min_size=1, limit=20) if r.templates)
+    assert any(example.weight == 3.0 for example in rated.examples)
+
+
+def test_brief_writes_queue_incremental_updates(db_session):
+    coffee = _idea(db_session, "Coffee", *COFFEE)
+    update_patterns(clusters=3)
+    queue = JobQueue(retry_backoff=0)
+    Worker(queue).run_once()  # drain the jobs queued before the model existed
+    before = {row.block_id: row.id for row in db_session.query(PatternItem).filter_by(kind="brief")}
+
+    update_brief(db_session, coffee, _brief(COFFEE[0], "Morning coffee routine, iced edition"))
+    assert (
+        db_session.scalar(select(func.count()).where(Job.kind == JOB_KIND, Job.status == "queued"))
+        == 1
+    )
+    travel = _idea(db_session, "Travel", *TRAVEL)
+    # The second brief merged into the job that was still waiting.
+    waiting = db_session.scalars(select(Job).where(Job.kind == JOB_KIND, Job.status == "queued"))
+    assert [json.loads(job.payload)["ideas"] for job in waiting] == [[coffee.id, travel.id]]
+    worker = Worker(queue)
+    assert worker.run_once() == 1
+    assert worker.completed == 1
+
+    db_session.expire_all()
+    after = {
+        row.block_id: row.id
+        for row in db_session.query(PatternItem).filter_by(kind="brief", source_id=coffee.id)
+    }
+    assert after.keys() == {"b0", "b1"}
+    assert after["b0"] == before["b0"]  # unchanged text: not re-embedded
+    assert after["b1"] != before["b1"]
+    # The second brief landed in a cluster of its own, without refitting the model.
+    assert _cluster_of(db_session, travel, "b0") != _cluster_of(db_session, coffee, "b0")
+    assert update_patterns(ideas=[travel.id]).embedded == 0
+
+    db_session.delete(travel)
+    db_session.commit()
+    Worker(queue).run_once()
+    assert db_session.query(PatternItem).filter_by(source_id=travel.id, kind="brief").count() == 0
+
+
+def test_recipe_endpoints(db_session):
+    _idea(db_session, "Coffee", *COFFEE)
+    assert patterns_router.list_recipes(limit=10, examples=3, min_size=2, db=db_session) == []
+    job = patterns_router.rebuild_recipes(db=db_session)
+    assert (job.kind, job.status) == (JOB_KIND, "queued")
+
+    update_patterns(database.engine, rebuild=True, clusters=2)
+    found = patterns_router.list_recipes(limit=5, examples=1, min_size=1, db=db_session)
+    assert sum(recipe.size for recipe in found) == 3 + 3
+    assert all(len(recipe.examples) == 1 for recipe in found)
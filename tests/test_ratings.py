@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.models import IdeaTemplate
+from app.ratings import RatingQueue
+from app.routers import templates
+
+
+@pytest.mark.parametrize("queued", [True, False])
+def test_parallel_ratings_lose_no_updates(db_session, monkeypatch, queued):
+    monkeypatch.setattr(templates, "RATING_QUEUE", queued)
+    template_id = db_session.query(IdeaTemplate.id).first()[0]
+    ratings = [n % 5 + 1 for n in range(300)]
+
+    with TestClient(create_app()) as client:
+
+        def rate(value: int) -> int:
+            url = f"/api/templates/{template_id}/ratings"
+            return client.post(url, json={"rating": value}).status_code
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            assert set(pool.map(rate, ratings)) == {201}
+    # Leaving the client runs the lifespan shutdown, which flushes queued ratings.
+
+    template = db_session.get(IdeaTemplate, template_id)
+    db_session.refresh(template)
+    assert (template.rating_sum, template.rating_count) == (sum(ratings), len(ratings))
+    assert template.rating_score == pytest.approx(sum(ratings) / len(ratings))
+
+
+def test_rating_queue_aggregates_into_one_flush(db_session):
+    queue = RatingQueue(max_pending=10)
+    template_id = db_session.query(IdeaTemplate.id).first()[0]
+    for rating in (5, 4, 3):
+        queue.submit(template_id, rating)
+    assert queue.with_pending(template_id, lambda: (0, 0)) == (12, 3)
+
+    assert queue.flush() == 3
+    assert queue.flushes == 1
+    assert queue.with_pending(template_id, lambda: (0, 0)) == (0, 0)
+    template = db_session.get(IdeaTemplate, template_id)
+    assert (template.rating_sum, template.rating_count, template.rating_score) == (12, 3, 4.0)
+
+
+def test_rating_response_counts_a_batch_that_is_being_flushed(db_session, monkeypatch):
+    import threading
+
+    from app import ratings
+    from app.ratings import rating_queue
+    from app.schemas import TemplateRatingRequest
+
+    monkeypatch.setattr(templates, "RATING_QUEUE", True)
+    template = db_session.query(IdeaTemplate).first()
+    base_sum, base_count = template.rating_sum, template.rating_count
+    applied, release = threading.Event(), threading.Event()
+    apply = ratings.apply_template_ratings
+
+    def slow_apply(db, totals):
+        apply(db, totals)
+        applied.set()
+        release.wait(5)
+
+    monkeypatch.setattr(ratings, "apply_template_ratings", slow_apply)
+    for rating in (5, 3):
+        rating_queue.submit(template.id, rating)
+    flusher = threading.Thread(target=rating_queue.flush)
+    flusher.start()
+    try:
+        assert applied.wait(5)
+        during = templates.templates_rate(
+            template.id, TemplateRatingRequest(rating=4), db=db_session
+        )
+    finally:
+        release.set()
+        flusher.join(5)
+    assert during.rating_count == base_count + 3
+
+    after = rating_queue.with_pending(template.id, lambda: (0, 0))
+    assert after == (4, 1)
+    db_session.refresh(template)
+    assert (template.rating_sum, template.rating_count) == (base_sum + 8, base_count + 2)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.models import Idea, IdeaBriefVersion
+from app.retention import RetentionPolicy, VersionCompactor, VersionStamp
+from app.schemas import BriefBlock, BriefContent
+from app.services import restore_version, update_brief
+
+NOW = datetime(2024, 6, 30, 12, 0, tzinfo=timezone.utc)
+
+
+def test_policy_keeps_tiers_and_labelled_versions():
+    stamps = [
+        VersionStamp(1, NOW - timedelta(minutes=5), "Autosave"),
+        VersionStamp(2, NOW - timedelta(minutes=50), "Autosave"),
+        VersionStamp(3, NOW - timedelta(hours=3, minutes=10), "Autosave"),
+        VersionStamp(4, NOW - timedelta(hours=3, minutes=40), "Autosave"),
+        VersionStamp(5, NOW - timedelta(days=3, hours=1), "Autosave"),
+        VersionStamp(6, NOW - timedelta(days=3, hours=5), None),
+        VersionStamp(7, NOW - timedelta(days=45), "Autosave"),
+        VersionStamp(8, NOW - timedelta(days=90), "Before launch"),
+    ]
+    assert RetentionPolicy().prunable(stamps, NOW) == {4, 6, 7}
+
+
+def test_compaction_prunes_and_keeps_deltas_restorable(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.VERSION_KEYFRAME_INTERVAL", 10)
+    idea = Idea(title="Retention", target_date=date(2024, 6, 1))
+    db_session.add(idea)
+    db_session.commit()
+    contents = []
+    for step in range(30):
+        content = BriefContent(
+            blocks=[
+                BriefBlock(id=f"b{n}", type="text", text=f"block {n} v{step if n == 0 else 0}")
+                for n in range(30)
+            ]
+        )
+        label = "Milestone" if step == 5 else "Autosave"
+        update_brief(db_session, idea, content, autosave=True, label=label)
+        contents.append(content)
+    rows = db_session.query(IdeaBriefVersion).order_by(IdeaBriefVersion.id).all()
+    assert [row.id for row in rows if row.base_version_id is None] == [
+        rows[0].id,
+        rows[11].id,
+        rows[22].id,
+    ]
+    # One version per hour, the newest one just now.
+    for offset, row in enumerate(reversed(rows)):
+        row.created_at = (NOW - timedelta(hours=offset)).replace(tzinfo=None)
+    db_session.commit()
+    expected = {row.id: content for row, content in zip(rows, contents, strict=True)}
+    first_keyframe, milestone = rows[0].id, rows[5].id
+
+    compactor = VersionCompactor(
+        RetentionPolicy(keep_all=timedelta(hours=1), hourly=timedelta(hours=6)), batch_size=3
+    )
+    stats = compactor.run_once(now=NOW)
+
+    db_session.expire_all()
+    survivors = db_session.query(IdeaBriefVersion).order_by(IdeaBriefVersion.id).all()
+    survivor_ids = {row.id for row in survivors}
+    assert stats.rows_pruned == len(rows) - len(survivors) > 0
+    assert first_keyframe not in survivor_ids  # old keyframe pruned...
+    assert milestone in survivor_ids  # ...after its labelled delta was promoted
+    assert stats.rows_rebased >= 1
+    for row in survivors:
+        assert restore_version(db_session, row.id)[1] == expected[row.id]
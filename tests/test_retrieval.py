@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import random
+from datetime import date
+
+import numpy as np
+from fastapi import Response
+
+from app.rag import Chunk, HashingEmbedder, HybridRetriever, RetrievalFilter
+from app.rag.bm25 import BM25Index
+from app.rag.chunking import chunk_idea
+from app.routers import ideas, search, templates
+from app.schemas import (
+    BriefBlock,
+    BriefContent,
+    BriefUpdate,
+    IdeaCreate,
+    IdeaImportRecord,
+    TemplateCreate,
+)
+from app.services import bulk_insert_ideas
+
+
+def _corpus() -> list[Chunk]:
+    return [
+        Chunk(
+            "idea",
+            1,
+            "Dorm room founder: shipping a startup between lectures",
+            target_date=date(2024, 5, 1),
+            completed=False,
+        ),
+        Chunk(
+            "idea",
+            2,
+            "Organic chemistry finals study session, pomodoro timer",
+            target_date=date(2024, 6, 1),
+            completed=True,
+        ),
+        Chunk(
+            "idea",
+            3,
+            "Founder demo day rehearsal in the hacker house",
+            target_date=date(2024, 7, 1),
+            completed=True,
+        ),
+        Chunk(
+            "template", 4, "Myth buster\nEvery founder needs a cofounder, right?", category="Hook"
+        ),
+        Chunk(
+            "template",
+            5,
+            "Study routine\nMy 5am study routine as an engineering major",
+            category="Routine",
+        ),
+    ]
+
+
+def _sources(hits) -> list[tuple[str, int]]:
+    return [(hit.kind, hit.source_id) for hit in hits]
+
+
+def test_hybrid_retriever_filters_and_fuses():
+    retriever = HybridRetriever()
+    retriever.add(_corpus())
+
+    hits = retriever.search("founder demo", k=3)
+    assert _sources(hits)[0] == ("idea", 3)
+    assert hits[0].bm25_rank == 1 and hits[0].dense_rank == 1
+
+    cases = {
+        RetrievalFilter(completed=True): {("idea", 3)},
+        RetrievalFilter(date_to=date(2024, 5, 31)): {("idea", 1)},
+        RetrievalFilter(kinds=frozenset({"template"})): {("template", 4)},
+        RetrievalFilter(categories=frozenset({"hook"})): {("template", 4)},
+        RetrievalFilter(categories=frozenset({"unknown"})): set(),
+    }
+    for where, expected in cases.items():
+        assert set(_sources(retriever.search("founder", where=where))) == expected, where
+
+    # The routine template says "study" twice.
+    assert _sources(retriever.search("study", mode="bm25")) == [("template", 5), ("idea", 2)]
+    assert retriever.search("zzz qqq", mode="dense") == []
+
+    assert retriever.remove("idea", [3]) == 1
+    assert ("idea", 3) not in _sources(retriever.search("founder demo"))
+    retriever.compact()
+    assert len(retriever) == 4
+    assert _sources(retriever.search("pomodoro")) == [("idea", 2)]
+
+
+def test_incremental_bm25_matches_a_single_batch_build():
+    rng = random.Random(3)
+    vocab = [f"w{n}" for n in range(300)]
+    docs = [[rng.choice(vocab) for _ in range(rng.randint(1, 40))] for _ in range(600)]
+
+    whole = BM25Index()
+    whole.add(docs, first_row=0)
+    pieces = BM25Index(max_segments=3)
+    row = 0
+    while row < len(docs):
+        size = rng.randint(1, 60)
+        pieces.add(docs[row : row + size], first_row=row)
+        row += size
+
+    for query in (["w1"], ["w5", "w17", "w299"], ["missing"]):
+        assert np.allclose(whole.scores(query, len(docs)), pieces.scores(query, len(docs)))
+
+    keep = np.ones(len(docs), dtype=bool)
+    keep[::3] = False
+    pieces.remove(np.flatnonzero(~keep).tolist())
+    pieces.compact(keep)
+    survivors = BM25Index()
+    survivors.add([doc for doc, kept in zip(docs, keep, strict=True) if kept], first_row=0)
+    assert np.allclose(
+        survivors.scores(["w5", "w17"], int(keep.sum())),
+        pieces.scores(["w5", "w17"], int(keep.sum())),
+    )
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    first = HashingEmbedder(dim=64).embed(["study hook", "", "founder story"])
+    second = HashingEmbedder(dim=64).embed(["study hook", "", "founder story"])
+    assert first.dtype == np.float32 and first.shape == (3, 64)
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), [1.0, 0.0, 1.0])
+
+
+def test_chunk_idea_splits_long_briefs_on_headings():
+    content = BriefContent(
+        blocks=[
+            BriefBlock(id="h1", type="heading", text="Hook"),
+            BriefBlock(id="b1", type="text", text="word " * 150),
+            BriefBlock(id="h2", type="heading", text="Payoff"),
+            BriefBlock(id="b2", type="text", text="Show the final build"),
+        ]
+    )
+    chunks = chunk_idea(
+        7,
+        "Robot arm",
+        None,
+        content.model_dump_json(),
+        target_date=date(2024, 1, 2),
+        completed=False,
+        max_words=100,
+    )
+    assert all(chunk.text.startswith("Robot arm\n") for chunk in chunks)
+    assert chunks[-1].text == "Robot arm\nPayoff\nShow the final build"
+    assert all(len(chunk.text.split()) <= 102 for chunk in chunks)
+
+
+def _retrieved(db, q: str, **kwargs) -> list[tuple[str, int]]:
+    page = search.retrieve_api(q=q, db=db, **kwargs)
+    return [(hit.kind, hit.id) for hit in page.items]
+
+
+def test_retrieval_index_follows_writes(db_session):
+    idea = ideas.create_idea(
+        IdeaCreate(title="Soldering a macro keyboard", target_date=date(2024, 3, 4)),
+        db=db_session,
+    )
+    assert ("idea", idea.id) in _retrieved(db_session, "soldering keyboard")
+
+    content = BriefContent(blocks=[BriefBlock(id="b1", type="text", text="Flux and hot glue")])
+    ideas.write_brief(idea.id, BriefUpdate(content=content), response=Response(), db=db_session)
+    assert _retrieved(db_session, "flux glue", mode="bm25") == [("idea", idea.id)]
+
+    ideas.toggle_idea(idea.id, db=db_session)
+    assert _retrieved(db_session, "flux", completed=False, mode="bm25") == []
+    assert _retrieved(db_session, "flux", completed=True, mode="bm25") == [("idea", idea.id)]
+
+    [imported] = bulk_insert_ideas(
+        db_session, [IdeaImportRecord(title="Flux capacitor prop", target_date=date(2024, 3, 9))]
+    )
+    assert _retrieved(db_session, "flux", date_from=date(2024, 3, 5), mode="bm25") == [
+        ("idea", imported)
+    ]
+
+    template = templates.templates_create(
+        TemplateCreate(name="Flux explainer", body="Why solder needs flux", category="Teach"),
+        db=db_session,
+    )
+    assert _retrieved(db_session, "flux", category=["teach"]) == [("template", template.id)]
+
+    ideas.delete_idea(idea.id, db=db_session)
+    assert ("idea", idea.id) not in _retrieved(db_session, "flux glue keyboard")
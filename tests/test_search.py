@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import Response
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import create_app
+from app.routers import ideas, search, templates
+from app.schemas import (
+    BriefBlock,
+    BriefContent,
+    BriefUpdate,
+    CTAItem,
+    IdeaCreate,
+    IdeaImportRecord,
+    IdeaUpdate,
+    ShotListItem,
+    TemplateCreate,
+)
+from app.services import bulk_insert_ideas
+
+
+def _hits(db, q: str, **kwargs) -> list[tuple[str, int]]:
+    page = search.search_api(q=q, db=db, **kwargs)
+    return [(hit.kind, hit.id) for hit in page.items]
+
+
+def test_search_follows_every_write_path(db_session):
+    idea = ideas.create_idea(
+        IdeaCreate(title="Dorm room founder hook", target_date=date(2024, 5, 1)), db=db_session
+    )
+    assert _hits(db_session, "founder") == [("idea", idea.id)]
+
+    content = BriefContent(
+        blocks=[BriefBlock(id="b1", type="text", text="Show the soldering station")],
+        shots=[ShotListItem(id="s1", cue="Macro shot of oscilloscope")],
+        ctas=[CTAItem(id="c1", text="Comment SCHEMATIC")],
+        hashtags=["#buildinpublic"],
+    )
+    ideas.write_brief(idea.id, BriefUpdate(content=content), response=Response(), db=db_session)
+    for term in ("soldering", "oscilloscope", "schematic", "buildinpublic", "oscillo"):
+        assert _hits(db_session, term) == [("idea", idea.id)], term
+
+    ideas.patch_idea(idea.id, IdeaUpdate(title="Lab bench teardown"), db=db_session)
+    assert _hits(db_session, "founder") == []
+    assert _hits(db_session, "teardown") == [("idea", idea.id)]
+
+    template = templates.templates_create(
+        TemplateCreate(name="Teardown opener", body="Unscrew the case on camera"),
+        db=db_session,
+    )
+    assert set(_hits(db_session, "teardown")) == {("idea", idea.id), ("template", template.id)}
+    assert _hits(db_session, "teardown", kind="template") == [("template", template.id)]
+
+    ideas.delete_idea(idea.id, db=db_session)
+    assert _hits(db_session, "teardown") == [("template", template.id)]
+    assert _hits(db_session, "soldering") == []
+
+
+def test_search_ranks_paginates_and_tolerates_syntax(db_session):
+    ids = bulk_insert_ideas(
+        db_session,
+        [
+            IdeaImportRecord(title=f"Study hack {n}", target_date=date(2024, 6, 1))
+            for n in range(5)
+        ],
+    )
+    first = search.search_api(q="study", limit=3, db=db_session)
+    second = search.search_api(q="study", limit=3, offset=first.next_offset, db=db_session)
+    assert first.next_offset == 3 and second.next_offset is None
+    assert sorted(hit.id for hit in first.items + second.items) == sorted(ids)
+    assert "**Study**" in first.items[0].snippet
+
+    for raw in ('"unbalanced', "NEAR(", "a-b OR", "*", "!!!"):
+        assert search.search_api(q=raw, db=db_session).items is not None
+
+
+def test_search_endpoint_and_backfill(db_session):
+    from sqlalchemy import text
+
+    from app.migrations import run_migrations
+
+    ideas.create_idea(
+        IdeaCreate(title="Café espresso reel", target_date=date(2024, 7, 1)), db=db_session
+    )
+    with database.engine.begin() as conn:
+        conn.execute(text("DELETE FROM search_index"))
+    run_migrations(database.engine)
+
+    with TestClient(create_app()) as client:
+        body = client.get("/api/search", params={"q": "cafe"}).json()
+    assert [hit["title"] for hit in body["items"]] == ["Café espresso reel"]
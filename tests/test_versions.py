@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app import database
+from app.lib import brief_codec
+from app.migrations import compact_version_snapshots
+from app.models import IdeaBriefVersion
+from app.routers import ideas
+from app.schemas import BriefBlock, BriefContent, IdeaCreate
+from app.services import fetch_idea, restore_version, update_brief
+
+
+def _content(step: int, blocks: int = 40) -> BriefContent:
+    return BriefContent(
+        blocks=[
+            BriefBlock(
+                id=f"b{n}",
+                type="text",
+                text=f"Block {n} " + ("edit " * step if n == step % blocks else "steady text"),
+            )
+            for n in range(blocks)
+        ],
+        hashtags=["#study", f"#v{step // 10}"],
+        thumbnail_notes=f"note {step}",
+    )
+
+
+def test_delta_roundtrip_preserves_content():
+    base = _content(0).model_dump(mode="json")
+    current = _content(7).model_dump(mode="json")
+    current["blocks"].insert(3, {"id": "new", "type": "quote", "text": "fresh", "checked": None})
+    snapshot = brief_codec.encode_delta(base, current)
+    assert snapshot.startswith(brief_codec.DELTA_PREFIX)
+    assert brief_codec.apply_delta(base, snapshot) == current
+
+
+def test_autosaves_store_deltas_and_restore_exactly(db_session):
+    created = ideas.create_idea(
+        IdeaCreate(title="Versions", target_date=date.today()), db=db_session
+    )
+    idea = fetch_idea(db_session, created.id)
+    history = []
+    for step in range(12):
+        content = _content(step)
+        update_brief(db_session, idea, content, autosave=True, label="Autosave")
+        history.append(content)
+
+    rows = db_session.query(IdeaBriefVersion).order_by(IdeaBriefVersion.id).all()
+    assert rows[0].base_version_id is None
+    assert all(row.base_version_id == rows[0].id for row in rows[1:])
+    for row, expected in zip(rows, history, strict=True):
+        _, restored = restore_version(db_session, row.id)
+        assert restored == expected
+
+
+def test_compaction_rewrites_legacy_snapshots(db_session):
+    created = ideas.create_idea(
+        IdeaCreate(title="Legacy", target_date=date.today()), db=db_session
+    )
+    idea = fetch_idea(db_session, created.id)
+    history = [_content(step) for step in range(6)]
+    for content in history:
+        db_session.add(IdeaBriefVersion(idea_id=idea.id, snapshot=content.model_dump_json()))
+    db_session.commit()
+
+    stats = compact_version_snapshots(database.engine)
+    assert stats["versions"] == 6
+    assert stats["bytes_after"] < stats["bytes_before"]
+
+    db_session.expire_all()
+    rows = db_session.query(IdeaBriefVersion).order_by(IdeaBriefVersion.id).all()
+    assert not any(brief_codec.is_legacy(row.snapshot) for row in rows)
+    assert [restore_version(db_session, row.id)[1] for row in rows] == history
+    assert compact_version_snapshots(database.engine)["versions"] == 0